@@ -1,23 +1,37 @@
+import multiprocessing
 import os
-from flask import Flask, render_template, jsonify, request
+import time
+from flask import (
+    Flask, Blueprint, Response, current_app, render_template, jsonify, request, url_for, stream_with_context,
+)
 from dotenv import load_dotenv
-from models import init_db, SessionLocal, Article
-from sqlalchemy import select, desc, func
-from fetch import fetch_feeds
-from emailer import send_digest
-from apscheduler.schedulers.background import BackgroundScheduler
-import random
-from datetime import datetime, timedelta
+from models import (
+    init_db, engine, read_engine, SessionLocal, ReadSession, ArticleDailyCount, Recipient,
+    latest_by_category, rebuild_daily_counts, articles_page, lead_articles_after_id, read_generation, generation_bumped_at,
+    ARTICLE_API_FIELDS,
+)
+from config import get_config, get_categories
+from cache import cached_response, generation_etag, install_static_fingerprints
+from metrics import install_request_metrics
+from sqlalchemy import select, update, desc, func
+from jobs import fetch_jobs
+from events import (
+    article_events, article_tail, article_event, format_sse, HEARTBEAT_SECONDS, MAX_CATCHUP_EVENTS, MAX_STREAM_SECONDS, RECONNECT_MS,
+)
+from search import search_articles, rebuild_search_index, SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE
+import base64
+import csv
+import json
+import click
+from datetime import datetime, timedelta, timezone
 
-# Load environment variables
-load_dotenv()
+# Routes and CLI commands; create_app() puts them on an app.
+# The ingest, email and retention modules are imported where they're used,
+# so a web worker starts without loading any of them.
+bp = Blueprint("news", __name__, cli_group=None)
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "animal-crossing-news-secret")
-
-# Initialize database
-init_db()
+# Articles shown per category on the front page
+FRONT_PAGE_ITEMS = 25
 
 # Fun greetings and messages for the UI
 UI_GREETINGS = [
@@ -28,71 +42,291 @@ UI_GREETINGS = [
     "News as fresh as morning coffee! ☕"
 ]
 
-@app.route("/")
+def count_articles(db, since_day=None):
+    """Sum the daily rollups, optionally from a UTC day onwards"""
+    query = select(func.coalesce(func.sum(ArticleDailyCount.count), 0))
+    if since_day is not None:
+        query = query.where(ArticleDailyCount.day >= since_day)
+    return db.execute(query).scalar()
+
+@bp.route("/")
 def index():
-    """Main news page"""
-    db = SessionLocal()
+    """Main news page (served from the response cache between ingests)"""
+    return cached_response("index", render_index)
+
+def render_index():
+    """Render the front page from the database.
+
+    Only the data generation keys the cached page and its ETag, so the
+    header shows when the news last changed rather than the current time.
+    """
+    categories = get_categories(get_config())
+    db = ReadSession()
     
     try:
-        # Get recent articles by category
-        ai_articles = db.execute(
-            select(Article)
-            .where(Article.category == "ai_frontier")
-            .order_by(desc(Article.published))
-            .limit(25)
-        ).scalars().all()
-        
-        econ_articles = db.execute(
-            select(Article)
-            .where(Article.category == "economics_politics")
-            .order_by(desc(Article.published))
-            .limit(25)
-        ).scalars().all()
+        # Newest articles for every configured category (one lead per story cluster)
+        latest = latest_by_category(db, [c["key"] for c in categories], FRONT_PAGE_ITEMS)
         
-        # Get some stats for fun
-        total_articles = db.execute(select(func.count(Article.id))).scalar()
-        
-        # Get articles from today
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = db.execute(
-            select(func.count(Article.id))
-            .where(Article.published >= today)
-        ).scalar()
+        # Get some stats for fun (from the daily rollups, not a table scan)
+        total_articles = count_articles(db)
+        today_count = count_articles(db, since_day=datetime.utcnow().date())
+        generation = read_generation(db)
+        updated_at = generation_bumped_at(db)
         
     finally:
         db.close()
     
+    sections = [dict(category, articles=latest[category["key"]]) for category in categories]
+    # Live updates pick up from the newest article this page already shows
+    newest_id = max((article.id for articles in latest.values() for article in articles), default=0)
+    
     return render_template(
         "index.html",
-        ai_articles=ai_articles,
-        econ_articles=econ_articles,
-        greeting=random.choice(UI_GREETINGS),
+        sections=sections,
+        newest_id=newest_id,
+        page_size=FRONT_PAGE_ITEMS,
+        # Rotates with each ingest; every worker renders the same page for a generation
+        greeting=UI_GREETINGS[generation % len(UI_GREETINGS)],
         total_articles=total_articles,
         today_count=today_count,
-        current_time=datetime.now().strftime("%B %d, %Y at %I:%M %p")
+        current_time=f"Updated {updated_at:%B %d, %Y at %I:%M %p} UTC" if updated_at else None
     )
 
-@app.route("/refresh")
+@bp.route("/refresh")
 def refresh_feeds():
-    """Manually refresh feeds"""
+    """Start a background refresh of every feed (or join the one already running)"""
+    job, started = fetch_jobs.submit()
+    return jsonify({
+        "success": True,
+        "message": "🚀 Started gathering fresh news!" if started else "🏃 A refresh is already on its way!",
+        "job_id": job.id,
+        "status_url": url_for("news.refresh_status", job_id=job.id),
+        **job.to_dict()
+    }), 202
+
+@bp.route("/refresh/<job_id>")
+def refresh_status(job_id):
+    """Progress of a refresh job"""
+    job = fetch_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "❓ No such refresh job"}), 404
+    return jsonify({"success": True, **job.to_dict()})
+
+def parse_date_arg(name):
+    """Optional YYYY-MM-DD (or ISO datetime) query argument as a naive UTC datetime"""
+    value = request.args.get(name, "").strip()
+    if not value:
+        return None
     try:
-        new_articles = fetch_feeds()
-        return jsonify({
-            "success": True,
-            "message": f"🎉 Successfully added {new_articles} new articles!",
-            "new_count": new_articles
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "message": f"❌ Error refreshing feeds: {str(e)}"
-        }), 500
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date like 2026-10-17")
+    if parsed.tzinfo is not None:
+        # An explicit offset ("Z", "+02:00") is honoured, not dropped
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def run_search():
+    """Search using the request's q/category/source/since/until/page arguments"""
+    query = request.args.get("q", "").strip()
+    page = max(1, request.args.get("page", 1, type=int) or 1)
+    limit = request.args.get("limit", SEARCH_PAGE_SIZE, type=int) or SEARCH_PAGE_SIZE
+    # Clamped here as well as in search_articles(), so offset and has_more use the real page size
+    limit = max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+    filters = {
+        "category": request.args.get("category") or None,
+        "source": request.args.get("source") or None,
+        "since": parse_date_arg("since"),
+        "until": parse_date_arg("until"),
+    }
+    results = []
+    if query:
+        db = ReadSession()
+        try:
+            results = search_articles(db, query, limit=limit, offset=(page - 1) * limit, **filters)
+        finally:
+            db.close()
+    return query, page, limit, filters, results
+
+@bp.route("/search")
+def search():
+    """Search page with highlighted, ranked results"""
+    try:
+        query, page, limit, filters, results = run_search()
+    except ValueError as e:
+        return render_template("search.html", error=str(e), query=request.args.get("q", ""),
+                               results=[], filters={}, categories=get_categories(get_config()),
+                               current_time=datetime.now().strftime("%B %d, %Y at %I:%M %p")), 400
+    args = request.args.to_dict()
+    page_url = lambda number: url_for("news.search", **dict(args, page=number))
+    return render_template(
+        "search.html",
+        query=query,
+        results=results,
+        prev_url=page_url(page - 1) if page > 1 else None,
+        next_url=page_url(page + 1) if len(results) == limit else None,
+        filters=filters,
+        categories=get_categories(get_config()),
+        current_time=datetime.now().strftime("%B %d, %Y at %I:%M %p"),
+    )
 
-@app.route("/send-digest")
+@bp.route("/api/search")
+def api_search():
+    """Search results as JSON"""
+    try:
+        query, page, limit, filters, results = run_search()
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"❌ {e}"}), 400
+    for result in results:
+        result["published"] = result["published"].isoformat() + "Z" if result["published"] else None
+    return jsonify({
+        "success": True,
+        "query": query,
+        "page": page,
+        "has_more": len(results) == limit,
+        "results": results,
+    })
+
+# Default and largest page size for /api/articles
+ARTICLES_PAGE_SIZE = 50
+MAX_ARTICLES_PAGE_SIZE = 500
+
+def encode_cursor(published, article_id):
+    """Opaque cursor pointing just past the (published, id) of a page's last article"""
+    raw = json.dumps([published.isoformat(), article_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        published, article_id = json.loads(raw)
+        return datetime.fromisoformat(published), int(article_id)
+    except (ValueError, TypeError):
+        raise ValueError("'cursor' is not valid - pass back the next_cursor of a previous page")
+
+def parse_fields_arg():
+    """Columns asked for with `fields=title,link,...` (all of them by default)"""
+    value = request.args.get("fields", "").strip()
+    if not value:
+        return list(ARTICLE_API_FIELDS)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in ARTICLE_API_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"'fields' may only name: {', '.join(ARTICLE_API_FIELDS)}")
+    return fields
+
+@bp.route("/api/articles")
+def api_articles():
+    """Articles newest first as JSON, paged with an opaque cursor (keyset, not OFFSET)"""
+    try:
+        limit = request.args.get("limit", ARTICLES_PAGE_SIZE, type=int) or ARTICLES_PAGE_SIZE
+        limit = max(1, min(limit, MAX_ARTICLES_PAGE_SIZE))
+        cursor = request.args.get("cursor") or None
+        query = {
+            "fields": parse_fields_arg(),
+            "after": decode_cursor(cursor) if cursor else None,
+            "category": request.args.get("category") or None,
+            "source": request.args.get("source") or None,
+            "since": parse_date_arg("since"),
+        }
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"❌ {e}"}), 400
+
+    # The page only changes when new articles land, so the ETag is free to compute
+    etag = generation_etag("api_articles", limit, sorted(query.items()))
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    def generate():
+        db = ReadSession()
+        try:
+            yield '{"success": true, "articles": ['
+            count, last, has_more = 0, None, False
+            # One extra row tells us whether there is a next page
+            for row in articles_page(db, limit=limit + 1, **query):
+                if count == limit:
+                    has_more = True
+                    break
+                article = {name: row[name] for name in query["fields"]}
+                if "published" in article:
+                    article["published"] = article["published"].isoformat() + "Z"
+                yield ("," if count else "") + json.dumps(article)
+                count += 1
+                last = (row["published"], row["id"])
+        finally:
+            db.close()
+        next_cursor = encode_cursor(*last) if has_more else None
+        next_url = url_for("news.api_articles", **dict(request.args.to_dict(), cursor=next_cursor)) if has_more else None
+        yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}, "next_url": {json.dumps(next_url)}}}'
+
+    response = Response(stream_with_context(generate()), mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@bp.route("/events")
+def events():
+    """Server-Sent Events stream of newly stored (cluster-lead) articles.
+    
+    Resumes after `Last-Event-ID` (sent by reconnecting browsers) or `after=`;
+    `category=` (repeatable) limits the stream to some categories. Streams
+    close after MAX_STREAM_SECONDS and the browser picks up where it left off.
+    """
+    categories = set(request.args.getlist("category"))
+    # New articles come from the scheduler or other workers; this process follows the table
+    article_tail.ensure_started()
+    resume_from = request.headers.get("Last-Event-ID") or request.args.get("after")
+    try:
+        # A brand-new client without a position only wants what comes next
+        after_id = int(resume_from) if resume_from else article_events.last_id
+    except ValueError:
+        return jsonify({"success": False, "message": "❌ Last-Event-ID must be an article id"}), 400
+    
+    def wanted(event):
+        return not categories or event["category"] in categories
+    
+    def generate():
+        cursor = after_id
+        ends_at = time.monotonic() + MAX_STREAM_SECONDS
+        yield f"retry: {RECONNECT_MS}\n\n"
+        # Only a client that missed more than the buffer holds reads the database
+        if resume_from and not article_events.covers(cursor):
+            db = ReadSession()
+            try:
+                missed = [article_event(article) for article in lead_articles_after_id(db, cursor, MAX_CATCHUP_EVENTS)]
+            finally:
+                db.close()
+            for event in missed:
+                cursor = max(cursor, event["id"])
+                if wanted(event):
+                    yield format_sse(event)
+        while (remaining := ends_at - time.monotonic()) > 0:
+            events = article_events.wait(cursor, timeout=min(HEARTBEAT_SECONDS, remaining))
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                cursor = max(cursor, event["id"])
+                if wanted(event):
+                    yield format_sse(event)
+        # An id without data dispatches nothing but moves the browser's Last-Event-ID
+        # past events this client filtered out, so the reconnect resumes from here
+        yield f"id: {cursor}\n\n"
+    
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@bp.route("/send-digest")
 def send_digest_now():
-    """Manually send email digest"""
+    """Manually send (or finish sending) today's digest; ?resend=1 sends it to everyone again"""
+    from emailer import send_digest
     try:
-        success = send_digest()
+        success = send_digest(resend=request.args.get("resend") == "1")
         if success:
             return jsonify({
                 "success": True,
@@ -109,43 +343,39 @@ def send_digest_now():
             "message": f"❌ Error sending digest: {str(e)}"
         }), 500
 
-@app.route("/stats")
+@bp.route("/stats")
 def stats():
     """Get some fun statistics"""
-    db = SessionLocal()
+    today = datetime.utcnow().date()
+    return cached_response(
+        ("stats", today),
+        lambda: current_app.json.dumps(build_stats(today)),
+        mimetype="application/json",
+    )
+
+def build_stats(today):
+    """Aggregate the statistics payload from the rollups"""
+    db = ReadSession()
     
     try:
-        # Basic stats
-        total_articles = db.execute(select(func.count(Article.id))).scalar()
+        # Everything comes from the small article_daily_counts rollup table
+        total_articles = count_articles(db)
         
         # Articles by category
-        ai_count = db.execute(
-            select(func.count(Article.id))
-            .where(Article.category == "ai_frontier")
-        ).scalar()
-        
-        econ_count = db.execute(
-            select(func.count(Article.id))
-            .where(Article.category == "economics_politics")
-        ).scalar()
+        by_category = dict(db.execute(
+            select(ArticleDailyCount.category, func.sum(ArticleDailyCount.count))
+            .group_by(ArticleDailyCount.category)
+        ).all())
         
-        # Recent activity
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = db.execute(
-            select(func.count(Article.id))
-            .where(Article.published >= today)
-        ).scalar()
-        
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        week_count = db.execute(
-            select(func.count(Article.id))
-            .where(Article.published >= week_ago)
-        ).scalar()
+        # Recent activity (rollups are per UTC day)
+        today_count = count_articles(db, since_day=today)
+        # The last seven UTC days: today and the six before it
+        week_count = count_articles(db, since_day=today - timedelta(days=6))
         
         # Top sources
         top_sources = db.execute(
-            select(Article.source, func.count(Article.id).label('count'))
-            .group_by(Article.source)
+            select(ArticleDailyCount.source, func.sum(ArticleDailyCount.count).label('count'))
+            .group_by(ArticleDailyCount.source)
             .order_by(desc('count'))
             .limit(5)
         ).all()
@@ -153,65 +383,211 @@ def stats():
     finally:
         db.close()
     
-    return jsonify({
+    return {
         "total_articles": total_articles,
-        "ai_articles": ai_count,
-        "econ_articles": econ_count,
+        "ai_articles": by_category.get("ai_frontier", 0),
+        "econ_articles": by_category.get("economics_politics", 0),
+        "categories": by_category,
         "today_articles": today_count,
         "week_articles": week_count,
         "top_sources": [{"name": source, "count": count} for source, count in top_sources]
-    })
+    }
 
-# Set up scheduled tasks
-def setup_scheduler():
-    """Set up background scheduler for daily tasks"""
-    scheduler = BackgroundScheduler(daemon=True)
-    
-    # Daily news fetch at 6 AM
-    scheduler.add_job(
-        func=fetch_feeds,
-        trigger="cron",
-        hour=6,
-        minute=0,
-        id="daily_fetch"
-    )
-    
-    # Daily email digest at 7 AM
-    scheduler.add_job(
-        func=send_digest,
-        trigger="cron",
-        hour=7,
-        minute=0,
-        id="daily_digest"
-    )
-    
-    # Additional refresh at 6 PM for evening news
-    scheduler.add_job(
-        func=fetch_feeds,
-        trigger="cron",
-        hour=18,
-        minute=0,
-        id="evening_fetch"
-    )
+@bp.cli.command("rebuild-stats")
+def rebuild_stats_command():
+    """Recompute the article count rollups from scratch"""
+    db = SessionLocal()
+    try:
+        rebuild_daily_counts(db)
+        db.commit()
+        print(f"📊 Rebuilt statistics for {count_articles(db)} articles! Blathers approves! 🦉")
+    finally:
+        db.close()
+
+@bp.cli.command("rebuild-search")
+@click.option("--optimize-only", is_flag=True, help="Only compact the index, don't rebuild it")
+def rebuild_search_command(optimize_only):
+    """Rebuild (and optimize) the full-text search index"""
+    backend = rebuild_search_index(engine, optimize_only=optimize_only)
+    action = "Optimized" if optimize_only else "Rebuilt"
+    print(f"🔎 {action} the {backend} search index! Blathers can find anything now! 🦉")
+
+@bp.cli.command("retention")
+@click.option("--dry-run", is_flag=True, help="Only count the articles past retention")
+@click.option("--enable-incremental-vacuum", "enable_vacuum", is_flag=True,
+              help="First switch an older SQLite database to incremental vacuum (rewrites the file once)")
+def retention_command(dry_run, enable_vacuum):
+    """Archive and delete articles past their retention, then compact the database"""
+    from retention import run_retention, enable_incremental_vacuum
+    if enable_vacuum:
+        enable_incremental_vacuum()
+        print("🧹 Incremental vacuum enabled!")
+    run_retention(dry_run=dry_run)
+
+@bp.cli.command("archive-search")
+@click.option("--category", help="Only this category")
+@click.option("--since", type=click.DateTime(), help="Published on or after (YYYY-MM-DD)")
+@click.option("--until", type=click.DateTime(), help="Published before (YYYY-MM-DD)")
+@click.option("--contains", help="Case-insensitive text the title or summary must contain")
+@click.option("--limit", default=50, show_default=True)
+def archive_search_command(category, since, until, contains, limit):
+    """Look through archived articles (only the months in range are read)"""
+    from retention import get_retention_settings, iter_archived_articles
+    settings = get_retention_settings(get_config())
+    needle = (contains or "").lower()
+    shown = 0
+    for row in iter_archived_articles(settings["archive_dir"], category, since, until):
+        if needle and needle not in f"{row['title']} {row['summary'] or ''}".lower():
+            continue
+        print(f"{row['published']:%Y-%m-%d}  {row['source']}  {row['title']}  {row['link']}")
+        shown += 1
+        if shown >= limit:
+            break
+    if not shown:
+        print("🔍 Nothing in the archive matches")
+
+@bp.cli.command("replay")
+@click.option("--since", type=click.DateTime(), help="Downloaded on or after (YYYY-MM-DD)")
+@click.option("--until", type=click.DateTime(), help="Downloaded before (YYYY-MM-DD)")
+@click.option("--feed", "feeds", multiple=True, help="Only this feed, by name or URL (repeatable)")
+def replay_command(since, until, feeds):
+    """Re-ingest archived feed bodies with the current parsing rules - no network"""
+    from fetch import replay_feeds
+    feed_urls = None
+    if feeds:
+        by_name = {feed["name"]: feed["url"] for group in get_config().get("feeds", {}).values() for feed in group}
+        feed_urls = {by_name.get(feed, feed) for feed in feeds}
+    replay_feeds(since=since, until=until, feed_urls=feed_urls)
+
+@bp.cli.group("recipients")
+def recipients_command():
+    """Manage who gets the daily digest"""
+
+def _save_recipient(db, email, categories):
+    email = email.strip()
+    recipient = db.execute(select(Recipient).where(Recipient.email == email)).scalar()
+    if recipient is None:
+        recipient = Recipient(email=email)
+        db.add(recipient)
+    recipient.categories = ",".join(key.strip() for key in (categories or "").split(",") if key.strip()) or None
+    recipient.active = True
+    return recipient
+
+@recipients_command.command("add")
+@click.argument("email")
+@click.option("--categories", help="Comma-separated category keys (default: every category)")
+def add_recipient_command(email, categories):
+    """Subscribe EMAIL (or change its categories)"""
+    db = SessionLocal()
+    try:
+        _save_recipient(db, email, categories)
+        db.commit()
+        print(f"💌 {email} will get the daily digest!")
+    finally:
+        db.close()
+
+@recipients_command.command("import")
+@click.argument("csv_file", type=click.File("r"))
+def import_recipients_command(csv_file):
+    """Subscribe everyone in a CSV with `email` and optional `categories` columns"""
+    db = SessionLocal()
+    try:
+        count = 0
+        for row in csv.DictReader(csv_file):
+            if (row.get("email") or "").strip():
+                _save_recipient(db, row["email"], row.get("categories"))
+                db.flush()
+                count += 1
+        db.commit()
+        print(f"💌 Imported {count} recipients!")
+    finally:
+        db.close()
+
+@recipients_command.command("remove")
+@click.argument("email")
+def remove_recipient_command(email):
+    """Stop sending the digest to EMAIL (its delivery history is kept)"""
+    db = SessionLocal()
+    try:
+        result = db.execute(update(Recipient).where(Recipient.email == email).values(active=False))
+        db.commit()
+        print(f"👋 Unsubscribed {email}" if result.rowcount else f"❓ {email} isn't subscribed")
+    finally:
+        db.close()
+
+@recipients_command.command("list")
+def list_recipients_command():
+    """Show active recipients and their categories"""
+    db = SessionLocal()
+    try:
+        for recipient in db.execute(select(Recipient).where(Recipient.active).order_by(Recipient.email)).scalars():
+            print(f"{recipient.email}\t{recipient.categories or 'all'}")
+    finally:
+        db.close()
+
+@bp.cli.command("migrate")
+def migrate_command():
+    """Create or upgrade the database schema (run once per deploy, before starting the app)"""
+    init_db()
+
+@bp.cli.command("scheduler")
+@click.option("--mode", type=click.Choice(["on", "auto"]), default="auto", show_default=True,
+              help="on: always run the jobs here; auto: only while holding the database lease")
+def scheduler_command(mode):
+    """Run the scheduled jobs in this process, without the web server"""
+    from scheduler import SchedulerRole
+    role = SchedulerRole(mode).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        role.stop()
+
+def start_scheduler(app, mode):
+    """Make this process "off" (web workers), "on" (always runs the scheduled
+    jobs) or "auto" (contends for a lease in the database; only the holder runs them).
     
-    scheduler.start()
-    print("📅 Scheduled daily tasks activated! Like Isabelle's morning announcements! 📢")
-    return scheduler
+    Never starts anything in a multiprocessing child such as a parse worker,
+    which re-imports this module, and starts at most once per app.
+    """
+    if mode == "off" or multiprocessing.parent_process() is not None or "scheduler" in app.extensions:
+        return None
+    from scheduler import SchedulerRole
+    app.extensions["scheduler"] = SchedulerRole(mode).start()
+    return app.extensions["scheduler"]
+
+def create_app(scheduler=None):
+    """Build the Flask app. Creating it never touches the database or starts threads,
+    unless `scheduler` (default: $SCHEDULER, then "off") asks this process to
+    run the scheduled jobs - see start_scheduler().
+    """
+    load_dotenv()
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "animal-crossing-news-secret")
+    app.register_blueprint(bp)
+    install_static_fingerprints(app)
+    install_request_metrics(app, {"writer": engine, "reader": read_engine})
+    start_scheduler(app, scheduler or os.getenv("SCHEDULER", "off"))
+    return app
+
+# For `flask --app app` and `gunicorn app:app`: never runs the scheduled jobs
+# (use create_app(scheduler=...) or `flask --app app scheduler` for that)
+app = create_app(scheduler="off")
 
 if __name__ == "__main__":
     # Initialize with some data on first run
     print("🌅 Starting Animal Crossing News! 🌟")
+    init_db()
+    debug = os.getenv("FLASK_DEBUG", "0") == "1"
     
-    # Set up scheduler
-    scheduler = setup_scheduler()
-    
-    try:
-        # Try to fetch some initial data
-        print("🔄 Fetching initial news...")
-        fetch_feeds()
-    except Exception as e:
-        print(f"⚠️  Initial fetch failed: {e}")
-        print("📝 You can manually refresh feeds from the web interface!")
+    # The debug reloader runs this file twice; only its serving child does the work
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        # A single process serves the site and runs the scheduled tasks
+        start_scheduler(app, os.getenv("SCHEDULER", "on"))
+        
+        # Fetch some initial data in the background (scheduled polls join it)
+        print("🔄 Fetching initial news in the background...")
+        fetch_jobs.submit()
     
     print("🚀 Starting server on http://localhost:8000")
     print("🏠 Your cozy news website is ready to go!")
@@ -219,5 +595,5 @@ if __name__ == "__main__":
     app.run(
         host="0.0.0.0",
         port=8000,
-        debug=os.getenv("FLASK_DEBUG", "0") == "1"
+        debug=debug
     )
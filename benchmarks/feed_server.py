@@ -0,0 +1,249 @@
+"""
+Synthetic feed server for benchmarks 📡
+
+Serves generated RSS 2.0, Atom and JSON Feed documents from localhost so
+fetch runs can be measured without touching the real news sites.
+
+    python benchmarks/feed_server.py --feeds 50 --items 40 --latency-ms 200
+"""
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import random
+import threading
+import time
+from email.utils import format_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from xml.sax.saxutils import escape
+
+FORMATS = ("rss", "atom", "json")
+
+WORDS = (
+    "island market turnip economy model robot policy vote bank rate inflation "
+    "chip cloud research launch senate trade tariff growth jobs report museum "
+    "fossil bridge harbor festival weather budget startup agent training data"
+).split()
+
+class FeedSpec:
+    """Knobs for the generated corpus"""
+
+    def __init__(self, feeds=25, items=30, item_size=400, duplicate_ratio=0.3,
+                 latency_ms=0, error_rate=0.0, seed=42):
+        self.feeds = feeds
+        self.items = items
+        self.item_size = item_size
+        self.duplicate_ratio = duplicate_ratio
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+def _sentence(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).capitalize() + "."
+
+def generate_items(spec, feed_index, now=None):
+    """Deterministic items for one feed; duplicates are shared 'wire' stories"""
+    now = now or dt.datetime.now(dt.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    rng = random.Random(spec.seed * 1_000_003 + feed_index)
+    items = []
+    for position in range(spec.items):
+        if rng.random() < spec.duplicate_ratio:
+            # Same story syndicated across feeds, with a tracking param that canonicalization strips
+            story = rng.randrange(max(1, spec.items))
+            story_rng = random.Random(spec.seed * 7 + story)
+            link = f"https://wire.example.com/story/{story}?utm_source=feed{feed_index}"
+            title = _sentence(story_rng, 60)
+            summary = _sentence(story_rng, spec.item_size)
+        else:
+            link = f"https://feed{feed_index}.example.com/articles/{position}"
+            title = _sentence(rng, 60)
+            summary = _sentence(rng, spec.item_size)
+        published = now - dt.timedelta(minutes=37 * position + feed_index)
+        items.append({"title": title, "link": link, "summary": summary, "published": published})
+    return items
+
+def render_rss(feed_index, items):
+    entries = "".join(
+        f"<item><title>{escape(item['title'])}</title><link>{escape(item['link'])}</link>"
+        f"<guid isPermaLink=\"false\">{feed_index}-{i}</guid>"
+        f"<description>{escape('<p>' + item['summary'] + '</p>')}</description>"
+        f"<pubDate>{format_datetime(item['published'])}</pubDate></item>"
+        for i, item in enumerate(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+        f"<title>Synthetic feed {feed_index}</title><link>https://feed{feed_index}.example.com/</link>"
+        f"<description>Benchmark feed</description>{entries}</channel></rss>"
+    ).encode("utf-8")
+
+def render_atom(feed_index, items):
+    entries = "".join(
+        f"<entry><title>{escape(item['title'])}</title><link href=\"{escape(item['link'])}\"/>"
+        f"<id>urn:feed:{feed_index}:{i}</id><updated>{item['published'].isoformat()}</updated>"
+        f"<summary type=\"html\">{escape('<p>' + item['summary'] + '</p>')}</summary></entry>"
+        for i, item in enumerate(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<title>Synthetic feed {feed_index}</title><id>urn:feed:{feed_index}</id>"
+        f"<updated>{items[0]['published'].isoformat() if items else ''}</updated>{entries}</feed>"
+    ).encode("utf-8")
+
+def render_json(feed_index, items):
+    return json.dumps({
+        "version": "https://jsonfeed.org/version/1.1",
+        "title": f"Synthetic feed {feed_index}",
+        "items": [
+            {
+                "id": f"{feed_index}-{i}",
+                "url": item["link"],
+                "title": item["title"],
+                "content_html": f"<p>{item['summary']}</p>",
+                "date_published": item["published"].isoformat(),
+            }
+            for i, item in enumerate(items)
+        ],
+    }).encode("utf-8")
+
+RENDERERS = {"rss": render_rss, "atom": render_atom, "json": render_json}
+CONTENT_TYPES = {
+    "rss": "application/rss+xml; charset=utf-8",
+    "atom": "application/atom+xml; charset=utf-8",
+    "json": "application/feed+json; charset=utf-8",
+}
+
+def feed_format(feed_index):
+    """Feeds rotate through RSS, Atom and JSON Feed"""
+    return FORMATS[feed_index % len(FORMATS)]
+
+class SyntheticFeedServer:
+    """Threaded HTTP server for /feeds/<n>.<rss|atom|json> with ETag support"""
+
+    def __init__(self, spec, host="127.0.0.1", port=0):
+        self.spec = spec
+        self._documents = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def feed_urls(self):
+        return [f"{self.base_url}/feeds/{i}.{feed_format(i)}" for i in range(self.spec.feeds)]
+
+    def document(self, feed_index):
+        """(body, etag) for a feed, rendered once"""
+        with self._lock:
+            cached = self._documents.get(feed_index)
+        if cached is None:
+            fmt = feed_format(feed_index)
+            body = RENDERERS[fmt](feed_index, generate_items(self.spec, feed_index))
+            cached = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+            with self._lock:
+                self._documents[feed_index] = cached
+        return cached
+
+    def fails(self, feed_index):
+        """Error injection is deterministic per feed so runs are comparable"""
+        return random.Random(self.spec.seed + feed_index).random() < self.spec.error_rate
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.spec.latency_ms:
+                    time.sleep(server.spec.latency_ms / 1000.0)
+                try:
+                    name = self.path.split("?")[0].rsplit("/", 1)[-1]
+                    feed_index = int(name.split(".")[0])
+                    if not 0 <= feed_index < server.spec.feeds:
+                        raise ValueError(name)
+                except ValueError:
+                    self._reply(404, b"not found", "text/plain")
+                    return
+                if server.fails(feed_index):
+                    with server._lock:
+                        server.errors += 1
+                    self._reply(500, b"injected failure", "text/plain")
+                    return
+                body, etag = server.document(feed_index)
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self._reply(200, body, CONTENT_TYPES[feed_format(feed_index)], etag)
+
+            def _reply(self, status, body, content_type, etag=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic RSS/Atom/JSON feeds")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--feeds", type=int, default=25)
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--item-size", type=int, default=400)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    spec = FeedSpec(args.feeds, args.items, args.item_size, args.duplicate_ratio,
+                    args.latency_ms, args.error_rate)
+    server = SyntheticFeedServer(spec, port=args.port)
+    print(f"📡 Serving {spec.feeds} synthetic feeds at {server.base_url}/feeds/<n>.<rss|atom|json>")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
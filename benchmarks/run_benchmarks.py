@@ -0,0 +1,348 @@
+"""
+Benchmark suite for Animal Crossing News 🏁
+
+Runs the ingest pipeline against the synthetic feed server and times the
+digest and page renders at several article table sizes, all against a
+throwaway database. Results are written as JSON for comparing runs.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --feeds 100 --latency-ms 300 --sizes 10000,100000
+    python benchmarks/run_benchmarks.py --save-corpus corpus/   # record the feed bodies
+    python benchmarks/run_benchmarks.py --corpus corpus/        # replay them instead of serving feeds
+"""
+
+import argparse
+import contextlib
+import datetime as dt
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from feed_server import FeedSpec, SyntheticFeedServer
+
+DEFAULT_SIZES = "10000,100000,1000000"
+
+# Rows written per transaction while growing the table
+SEED_BATCH = 20000
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (parse workers not included)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def timings(fn, repeat):
+    """Run fn `repeat` times and summarize the wall times in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(samples[0], 2),
+        "median_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "max_ms": round(samples[-1], 2),
+    }
+
+class WriteCounter:
+    """Counts INSERT/UPDATE/DELETE statements (and rows for executemany) on an engine"""
+
+    WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.statements = 0
+        self.rows = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(self.WRITE_VERBS):
+            self.statements += 1
+            self.rows += len(parameters) if executemany else 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def snapshot(self):
+        return {"statements": self.statements, "executions": self.rows, "commits": self.commits}
+
+    def delta(self, before):
+        now = self.snapshot()
+        return {key: now[key] - before[key] for key in now}
+
+def write_bench_config(path, feed_urls, args):
+    """config.yaml for the run: the real site/category settings with synthetic feeds"""
+    with open(os.path.join(REPO_ROOT, "config.yaml")) as f:
+        cfg = yaml.safe_load(f)
+    categories = list(cfg.get("feeds") or {"ai_frontier": [], "economics_politics": []})
+    feeds = {key: [] for key in categories}
+    for i, url in enumerate(feed_urls):
+        feeds[categories[i % len(categories)]].append({"name": f"Synthetic Feed {i}", "url": url})
+    cfg["feeds"] = feeds
+    cfg["site"]["num_items_per_feed"] = args.items_per_feed
+    fetch_cfg = cfg.setdefault("fetch", {})
+    # Every synthetic feed lives on one host, so lift the per-host cap unless asked
+    fetch_cfg["per_host_limit"] = args.per_host_limit or fetch_cfg.get("max_workers", 16)
+    if args.corpus or args.save_corpus:
+        cfg["feed_archive"] = {
+            "enabled": bool(args.save_corpus),
+            "dir": os.path.abspath(args.corpus or args.save_corpus),
+        }
+    with open(path, "w") as f:
+        yaml.safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
+
+def bench_ingest(server, writes, runs):
+    """Time full fetch_feeds() runs; later runs exercise the 304/unchanged path"""
+    from fetch import fetch_feeds
+    from models import SessionLocal, Article
+    from sqlalchemy import func, select
+
+    results = []
+    for run in range(runs):
+        requests_before = (server.requests, server.not_modified, server.errors, server.bytes_sent)
+        writes_before = writes.snapshot()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            added = fetch_feeds()
+        elapsed = time.perf_counter() - start
+        with SessionLocal() as db:
+            total = db.execute(select(func.count(Article.id))).scalar()
+        results.append({
+            "run": run + 1,
+            "wall_seconds": round(elapsed, 3),
+            "articles_added": added,
+            "articles_per_second": round(added / elapsed, 1) if elapsed else None,
+            "articles_in_table": total,
+            "peak_rss_mb": peak_rss_mb(),
+            "db_writes": writes.delta(writes_before),
+            "http": {
+                "requests": server.requests - requests_before[0],
+                "not_modified": server.not_modified - requests_before[1],
+                "errors": server.errors - requests_before[2],
+                "bytes": server.bytes_sent - requests_before[3],
+            },
+        })
+        print(f"  🎣 ingest run {run + 1}: {added} articles in {elapsed:.2f}s")
+    return results
+
+def bench_replay(writes, runs):
+    """Time replay_feeds() over a recorded corpus (no server, same input every time);
+    later runs find every link already stored"""
+    from fetch import replay_feeds
+    from models import SessionLocal, Article
+    from sqlalchemy import func, select
+
+    results = []
+    for run in range(runs):
+        writes_before = writes.snapshot()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            added = replay_feeds()
+        elapsed = time.perf_counter() - start
+        with SessionLocal() as db:
+            total = db.execute(select(func.count(Article.id))).scalar()
+        results.append({
+            "run": run + 1,
+            "wall_seconds": round(elapsed, 3),
+            "articles_added": added,
+            "articles_per_second": round(added / elapsed, 1) if elapsed else None,
+            "articles_in_table": total,
+            "peak_rss_mb": peak_rss_mb(),
+            "db_writes": writes.delta(writes_before),
+        })
+        print(f"  📼 replay run {run + 1}: {added} articles in {elapsed:.2f}s")
+    return results
+
+def seed_articles(target, rng):
+    """Grow the articles table to `target` rows with synthetic, recent-looking articles"""
+    from models import SessionLocal, Article, insert_articles
+    from sqlalchemy import func, select
+
+    with SessionLocal() as db:
+        current = db.execute(select(func.count(Article.id))).scalar()
+    if current >= target:
+        return current
+
+    now = dt.datetime.utcnow()
+    categories = ("ai_frontier", "economics_politics")
+    sources = [f"Seed Source {i}" for i in range(40)]
+    start = time.perf_counter()
+    next_id = current
+    while next_id < target:
+        batch = []
+        for i in range(next_id, min(target, next_id + SEED_BATCH)):
+            # Spread over ~90 days, newest first, so the 24h digest window has a realistic share
+            published = now - dt.timedelta(minutes=rng.expovariate(1 / 20000.0))
+            batch.append({
+                "title": f"Seeded story number {i} about {rng.choice(('markets', 'models', 'policy', 'chips'))}",
+                "link": f"https://seed.example.com/articles/{i}",
+                "canonical_link": f"https://seed.example.com/articles/{i}",
+                "summary": "Synthetic benchmark article. " * 8,
+                "published": published,
+                "source": rng.choice(sources),
+                "category": categories[i % len(categories)],
+                "villager_comment": "Yes yes! Benchmarks!",
+                "emoji": "📰",
+                "minhash": None,
+                "cluster_id": None,
+                "is_cluster_lead": True,
+            })
+        with SessionLocal() as db:
+            insert_articles(db, batch)
+            db.commit()
+        next_id += len(batch)
+    print(f"  🌱 seeded {target - current} articles in {time.perf_counter() - start:.1f}s")
+    return target
+
+def bench_reads(client, repeat):
+    """Digest build and the two cached routes, cold (cache dropped) and warm, and search"""
+    from cache import response_cache, forget_generation
+    from emailer import build_digest_html, clear_digest_cache
+
+    def cold(path):
+        def run():
+            response_cache.clear()
+            forget_generation()
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        return run
+
+    def digest_cold():
+        clear_digest_cache()
+        forget_generation()
+        build_digest_html()
+
+    def warm(path):
+        def run():
+            assert client.get(path).status_code == 200
+        return run
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = {
+            "build_digest_html": timings(digest_cold, repeat),
+            "build_digest_html_warm": timings(build_digest_html, repeat),
+            "index_cold": timings(cold("/"), repeat),
+            "index_warm": timings(warm("/"), repeat),
+            "stats_cold": timings(cold("/stats"), repeat),
+            "stats_warm": timings(warm("/stats"), repeat),
+            # One word in a quarter of the seeded titles, and a rarer two-word query
+            "search_common": timings(warm("/api/search?q=markets"), repeat),
+            "search_selective": timings(warm("/api/search?q=story+number+4242"), repeat),
+        }
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ingest, digest and page rendering")
+    parser.add_argument("--feeds", type=int, default=25, help="synthetic feeds to serve")
+    parser.add_argument("--items", type=int, default=30, help="items in each feed document")
+    parser.add_argument("--items-per-feed", type=int, default=15, help="site.num_items_per_feed for the run")
+    parser.add_argument("--item-size", type=int, default=400, help="approximate summary length in bytes")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3, help="share of items syndicated across feeds")
+    parser.add_argument("--latency-ms", type=int, default=0, help="delay before each feed response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of feeds answering HTTP 500")
+    parser.add_argument("--per-host-limit", type=int, default=0, help="fetch.per_host_limit (default: max_workers)")
+    parser.add_argument("--ingest-runs", type=int, default=2, help="fetch_feeds() runs against the server")
+    parser.add_argument("--corpus", help="replay this feed archive directory instead of serving synthetic feeds")
+    parser.add_argument("--save-corpus", help="archive the synthetic feed bodies here for later --corpus runs")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated article table sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per read benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--keep", action="store_true", help="keep the temp directory and database")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(",") if size.strip())
+    workdir = tempfile.mkdtemp(prefix="acnews-bench-")
+
+    # models.py builds its engines at import time, so the temp database must be set first
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+
+    spec = server = None
+    if args.corpus:
+        write_bench_config(os.path.join(workdir, "config.yaml"), [], args)
+    else:
+        spec = FeedSpec(args.feeds, args.items, args.item_size, args.duplicate_ratio,
+                        args.latency_ms, args.error_rate, args.seed)
+        server = SyntheticFeedServer(spec).start()
+        write_bench_config(os.path.join(workdir, "config.yaml"), server.feed_urls(), args)
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        source = f"corpus {args.corpus}" if args.corpus else f"{spec.feeds} synthetic feeds at {server.base_url}"
+        print(f"🏁 Benchmarking in {workdir} ({source})")
+        with contextlib.redirect_stdout(io.StringIO()):
+            import models
+            models.init_db()
+            from app import app
+        writes = WriteCounter(models.engine)
+
+        results = {
+            "started_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "feed_spec": spec.as_dict() if spec else None,
+            "settings": {key: value for key, value in vars(args).items() if key not in ("output", "keep")},
+            "ingest": bench_replay(writes, args.ingest_runs) if args.corpus
+                      else bench_ingest(server, writes, args.ingest_runs),
+            "reads": [],
+        }
+
+        rng = random.Random(args.seed)
+        client = app.test_client()
+        for size in sizes:
+            rows = seed_articles(size, rng)
+            reads = bench_reads(client, args.repeat)
+            results["reads"].append({"articles": rows, **reads})
+            print(f"  📊 {rows} articles: digest {reads['build_digest_html']['median_ms']}ms, "
+                  f"index cold {reads['index_cold']['median_ms']}ms, stats cold {reads['stats_cold']['median_ms']}ms")
+        results["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        os.chdir(original_cwd)
+        if server is not None:
+            server.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        BENCH_DIR, "results", dt.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+if __name__ == "__main__":
+    main()
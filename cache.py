@@ -0,0 +1,149 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, request
+from models import ReadSession, read_generation
+
+try:
+    import brotli
+except ImportError:  # Optional: pip install brotli to also serve br
+    brotli = None
+
+# How long a worker trusts its last read of the data generation
+GENERATION_TTL_SECONDS = 1.0
+
+# Rendered bodies kept per process (old generations fall off the end)
+MAX_CACHED_RESPONSES = 64
+
+# Fingerprinted static assets never change under the same URL
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+_generation_lock = threading.Lock()
+_generation = {"value": 0, "checked": 0.0}
+
+def current_generation():
+    """Data generation from the database, re-read at most once per TTL"""
+    now = time.monotonic()
+    with _generation_lock:
+        if now - _generation["checked"] < GENERATION_TTL_SECONDS:
+            return _generation["value"]
+    with ReadSession() as db:
+        value = read_generation(db)
+    with _generation_lock:
+        _generation.update(value=value, checked=now)
+    return value
+
+def forget_generation():
+    """Make the next request re-read the generation (used right after an in-process ingest)"""
+    with _generation_lock:
+        _generation["checked"] = 0.0
+
+class CachedBody:
+    """A rendered body with its strong ETag and precompressed variants"""
+    
+    def __init__(self, body, mimetype):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body)
+    
+    def pick_encoding(self, accept_encodings):
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding
+        return "identity"
+
+class ResponseCache:
+    """Small LRU of rendered responses keyed by (route key, data generation)"""
+    
+    def __init__(self, max_entries=MAX_CACHED_RESPONSES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_or_render(self, key, render, mimetype):
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        # Render outside the lock; two racing renders just produce the same bytes
+        cached = CachedBody(render(), mimetype)
+        with self._lock:
+            self._entries[key] = cached
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache()
+
+def cached_response(key, render, mimetype="text/html; charset=utf-8"):
+    """Serve `render()` from memory for the current data generation.
+    
+    Honors If-None-Match with a strong per-encoding ETag and serves the
+    precompressed br/gzip body the client accepts.
+    """
+    cached = response_cache.get_or_render((key, current_generation()), render, mimetype)
+    encoding = cached.pick_encoding(request.accept_encodings)
+    etag = cached.etag if encoding == "identity" else f"{cached.etag}-{encoding}"
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(cached.variants[encoding], mimetype=mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"  # always revalidate; 304s are cheap
+    return response
+
+def generation_etag(*parts):
+    """ETag for a response that only changes with the data generation and `parts`"""
+    key = repr((current_generation(),) + parts).encode("utf-8")
+    return hashlib.sha256(key).hexdigest()[:32]
+
+_fingerprints = {}
+
+def static_fingerprint(static_folder, filename):
+    """Short content hash of a static file, recomputed only when it changes"""
+    path = os.path.join(static_folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    cached = _fingerprints.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = _fingerprints[path] = (mtime, hashlib.sha256(f.read()).hexdigest()[:12])
+    return cached[1]
+
+def install_static_fingerprints(app):
+    """Add ?v=<hash> to url_for('static') and cache those URLs for a year"""
+    
+    @app.url_defaults
+    def add_static_fingerprint(endpoint, values):
+        if endpoint == "static" and "filename" in values and "v" not in values:
+            fingerprint = static_fingerprint(app.static_folder, values["filename"])
+            if fingerprint:
+                values["v"] = fingerprint
+    
+    @app.after_request
+    def cache_fingerprinted_static(response):
+        if request.endpoint == "static" and request.args.get("v") and response.status_code == 200:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+            response.cache_control.immutable = True
+            response.headers.pop("Expires", None)
+        return response
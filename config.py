@@ -0,0 +1,40 @@
+import os
+import threading
+import yaml
+
+CONFIG_PATH = "config.yaml"
+
+_cache_lock = threading.Lock()
+_cache = {}
+
+def load_config(path=CONFIG_PATH):
+    """Load configuration from YAML file"""
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+def get_config(path=CONFIG_PATH):
+    """Cached load_config() for request handlers; reloads when the file changes"""
+    mtime = os.stat(path).st_mtime
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = _cache[path] = (mtime, load_config(path))
+    return cached[1]
+
+def get_categories(cfg):
+    """Ordered list of categories from config, with display names and emoji.
+    
+    Every key under `feeds:` is a category; `categories:` only adds labels.
+    """
+    labels = cfg.get("categories") or {}
+    categories = []
+    for key in (cfg.get("feeds") or {}):
+        label = labels.get(key) or {}
+        title = label.get("title") or key.replace("_", " ").title()
+        categories.append({
+            "key": key,
+            "title": title,
+            "digest_title": label.get("digest_title") or title,
+            "emoji": label.get("emoji") or "📰",
+        })
+    return categories
@@ -0,0 +1,100 @@
+import datetime as dt
+import re
+import threading
+from collections import Counter
+from email.utils import parsedate_tz
+from functools import lru_cache
+from dateutil import parser as dtparse
+
+# How each date string was parsed in this process. Only the difference
+# between two snapshots means anything: parse_feed_body() reports each
+# feed's share, and the ingest metrics total those (wherever it ran).
+_parse_counts = Counter()
+_counts_lock = threading.Lock()
+
+# What parsedate_tz may be trusted with: [weekday,] day month year time [zone].
+# It accepts much more, but e.g. "October 17, 2026 03:00 PM +0200" comes out
+# as 03:00 UTC (PM taken for the zone), so anything else goes to dateutil.
+_RFC822_RE = re.compile(
+    r"^(?:[a-z]+,?\s+)?\d{1,2}\s+[a-z]+\s+\d{2,4}\s+\d{1,2}:\d{2}(?::\d{2})?"
+    r"(?:\s+(?:[+-]\d{4}|(?!am\b|pm\b)[a-z]{1,5}))?$",
+    re.IGNORECASE,
+)
+
+def _count(method):
+    with _counts_lock:
+        _parse_counts[method] += 1
+
+def snapshot_counts():
+    with _counts_lock:
+        return Counter(_parse_counts)
+
+def _to_naive_utc(value):
+    """Convert aware datetimes to UTC; naive ones are already treated as UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return value
+
+def _parse_rfc822(text):
+    """RSS pubDate, e.g. 'Sat, 17 Oct 2026 10:00:00 GMT' or '... -0400'"""
+    if not _RFC822_RE.match(text):
+        return None
+    parts = parsedate_tz(text)
+    if parts is None:
+        return None
+    if parts[9] is None:
+        # No usable zone: keep the wall-clock time, like dateutil does
+        return dt.datetime(*parts[:6])
+    return dt.datetime(*parts[:6]) - dt.timedelta(seconds=parts[9])
+
+def _parse_iso8601(text):
+    """Atom/JSON Feed dates, e.g. '2026-10-17T10:00:00Z' or '...+02:00'"""
+    try:
+        return _to_naive_utc(dt.datetime.fromisoformat(text))
+    except ValueError:
+        return None
+
+def _looks_iso(text):
+    return len(text) >= 10 and text[:4].isdigit() and text[4] == "-"
+
+@lru_cache(maxsize=8192)
+def _parse_cached(text):
+    """(naive UTC datetime or None, method) for one date string"""
+    if _looks_iso(text):
+        parsers = ((_parse_iso8601, "iso8601"), (_parse_rfc822, "rfc822"))
+    else:
+        parsers = ((_parse_rfc822, "rfc822"), (_parse_iso8601, "iso8601"))
+    for parse, method in parsers:
+        try:
+            value = parse(text)
+        except (ValueError, OverflowError, TypeError):
+            value = None
+        if value is not None:
+            return value, method
+
+    # Last resort for odd formats; counted so we notice when feeds drift
+    try:
+        return _to_naive_utc(dtparse.parse(text)), "dateutil"
+    except (ValueError, OverflowError, TypeError):
+        return None, "unparseable"
+
+def parse_feed_date(text):
+    """Parse a feed date string to a naive UTC datetime (None if hopeless)"""
+    if not text:
+        return None
+    value, method = _parse_cached(text.strip())
+    _count(method)
+    return value
+
+def struct_time_to_datetime(value):
+    """feedparser's *_parsed fields are UTC struct_times"""
+    try:
+        result = dt.datetime(*value[:6])
+    except (TypeError, ValueError):
+        return None
+    _count("struct_time")
+    return result
+
+def count_missing():
+    """Record an entry with no usable date at all"""
+    _count("missing")
@@ -0,0 +1,291 @@
+import hashlib
+import heapq
+import itertools
+import re
+import struct
+import threading
+import datetime as dt
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from sqlalchemy import select
+from models import Article
+
+# Query parameters that only track where a click came from
+TRACKING_PARAM_PREFIXES = ("utm_", "at_", "mc_", "pk_")
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "yclid",
+    "cmpid", "ncid", "ftag", "mod", "cid", "smid", "taid",
+    "feedtype", "feedname", "rss", "ref",
+    "ito", "emc", "dicbo", "guccounter", "guce_referrer",
+}
+
+# Redirect wrappers that carry the real URL in a query parameter: host -> params
+REDIRECT_WRAPPERS = {
+    "www.google.com": ("url", "q"),
+    "google.com": ("url", "q"),
+    "news.google.com": ("url",),
+    "l.facebook.com": ("u",),
+    "lm.facebook.com": ("u",),
+    "out.reddit.com": ("url",),
+    "www.linkedin.com": ("url",),
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def unwrap_redirect(url):
+    """Follow known redirect wrappers (google.com/url?q=..., l.facebook.com/l.php?u=...)"""
+    for _ in range(3):  # wrappers are occasionally nested
+        parts = urlsplit(url)
+        params = REDIRECT_WRAPPERS.get((parts.hostname or "").lower())
+        if not params:
+            return url
+        query = dict(parse_qsl(parts.query))
+        target = next((query[name] for name in params if query.get(name)), None)
+        if not target or not target.startswith(("http://", "https://")):
+            return url
+        url = target
+    return url
+
+def canonicalize_url(url):
+    """Normalize an article URL so reissued copies of a story compare equal.
+
+    Unwraps redirect wrappers, drops tracking parameters and fragments,
+    upgrades http to https, lowercases the host, removes default ports and
+    trailing slashes, and sorts the remaining query string.
+    """
+    if not url:
+        return url
+    url = unwrap_redirect(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url
+
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port not in DEFAULT_PORTS.values():
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+def link_key(canonical_link):
+    """Compact 8-byte key for the in-memory index (~40 bytes per link in a set)"""
+    return hashlib.blake2b(canonical_link.encode("utf-8"), digest_size=8).digest()
+
+class KnownLinks:
+    """In-process index of canonical links already stored in `articles`.
+
+    Built once from the link column, then kept current by `add()` after each
+    successful commit. It may miss rows written by another process (those
+    still hit ON CONFLICT DO NOTHING), but never reports a link we don't have
+    apart from a ~1e-8 hash collision chance at a million rows.
+    """
+
+    def __init__(self):
+        self._keys = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self, db):
+        """Load every stored link on first use"""
+        with self._lock:
+            if self._loaded:
+                return
+            # Rows without one are later copies of a story that has one (see backfill_canonical_links)
+            for link in db.execute(select(Article.canonical_link).where(Article.canonical_link.isnot(None))).scalars():
+                self._keys.add(link_key(link))
+            self._loaded = True
+
+    def __contains__(self, canonical_link):
+        return link_key(canonical_link) in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, canonical_link):
+        with self._lock:
+            self._keys.add(link_key(canonical_link))
+
+    def reset(self):
+        """Forget everything; the next ensure_loaded() rebuilds from the database"""
+        with self._lock:
+            self._keys = set()
+            self._loaded = False
+
+# Shared by every fetch run in this process
+known_links = KnownLinks()
+
+# --- Near-duplicate story clustering -------------------------------------
+
+# Articles newer than this are candidates for joining a cluster
+CLUSTER_WINDOW_HOURS = 48
+
+# Stories are compared by the Jaccard similarity of their word sets
+# (title + summary, stopwords dropped). The same wire story run by two
+# outlets typically shares 0.55-0.7 of its words even with a rewritten
+# headline; different stories on the same topic share under 0.2.
+MIN_STORY_SIMILARITY = 0.4
+
+# Below this many words, sharing a few is chance ("Apple shares rise" vs "Apple
+# shares fall"), so such articles always lead a cluster of their own
+MIN_STORY_WORDS = 6
+
+# MinHash signature of 72 values, filed under 24 bands of 3. A pair becomes a
+# candidate when any band matches: ~95% of the time at Jaccard 0.5, ~15% at
+# 0.2 (those are then turned away by the signature comparison).
+MINHASH_BANDS = 24
+MINHASH_ROWS = 3
+MINHASH_SIZE = MINHASH_BANDS * MINHASH_ROWS
+
+# Fixed seeds so signatures stored by earlier runs stay comparable
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"minhash-a-{i}".encode(), digest_size=8).digest(), "big") % (_MERSENNE_PRIME - 1) + 1,
+        int.from_bytes(hashlib.blake2b(f"minhash-b-{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME,
+    )
+    for i in range(MINHASH_SIZE)
+]
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "have", "in", "is", "it", "its", "of", "on", "or", "said", "says", "that",
+    "the", "to", "was", "were", "will", "with", "after", "over", "new",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def _tokens(text):
+    return [word for word in _WORD_RE.findall((text or "").lower()) if word not in STOPWORDS]
+
+def shingles(title, summary=""):
+    """The set of words an article is compared by"""
+    return set(_tokens(title)) | set(_tokens(summary))
+
+def minhash(title, summary=""):
+    """MinHash signature (MINHASH_SIZE 32-bit values) of an article's words, or None if it has too few"""
+    words = shingles(title, summary)
+    if len(words) < MIN_STORY_WORDS:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "big") for word in words]
+    return tuple(
+        min((a * value + b) % _MERSENNE_PRIME & _MAX_HASH for value in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def pack_signature(signature):
+    return struct.pack(f"<{MINHASH_SIZE}I", *signature)
+
+def unpack_signature(data):
+    return struct.unpack(f"<{MINHASH_SIZE}I", data)
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / MINHASH_SIZE
+
+def to_signed64(value):
+    """Databases store BIGINT as signed; fold an unsigned 64-bit id into range"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def _cluster_id(text):
+    return to_signed64(int.from_bytes(hashlib.blake2b(text, digest_size=8).digest(), "big"))
+
+class StoryClusters:
+    """LSH index of recent MinHash signatures for assigning articles to story clusters.
+    
+    Each signature is filed under its MINHASH_BANDS bands, so a lookup only
+    compares against articles sharing a band instead of every recent article.
+    Clusters never span categories, so each front-page list keeps one lead per
+    story. The cluster id is a 64-bit hash of the story's first article's signature.
+    
+    A live run builds a fresh index each time. A replay walks weeks of
+    downloads with one index, so it calls evict_before() as it goes to keep
+    only the window around the bodies it's on.
+    """
+    
+    def __init__(self, min_similarity=MIN_STORY_SIMILARITY):
+        self.min_similarity = min_similarity
+        self._buckets = {}  # (category, band, values) -> {seq: (signature, cluster_id)}
+        self._published = []  # heap of (published, seq, category, signature)
+        self._seq = itertools.count()
+    
+    @classmethod
+    def load_recent(cls, db, hours=CLUSTER_WINDOW_HOURS, as_of=None):
+        """Seed the index with signatures published in the `hours` before `as_of` (default now)"""
+        clusters = cls()
+        query = select(
+            Article.category, Article.minhash, Article.cluster_id, Article.title, Article.summary, Article.published,
+        ).where(Article.cluster_id.isnot(None))
+        if as_of is None:
+            query = query.where(Article.published >= dt.datetime.utcnow() - dt.timedelta(hours=hours))
+        else:
+            query = query.where(Article.published >= as_of - dt.timedelta(hours=hours), Article.published <= as_of)
+        for category, packed, cluster_id, title, summary, published in db.execute(query).all():
+            # Rows stored before signatures existed get theirs worked out here
+            signature = unpack_signature(packed) if packed else minhash(title, summary)
+            if signature is not None:
+                clusters._file(category, signature, cluster_id, published)
+        return clusters
+    
+    def _bands(self, category, signature):
+        for band in range(MINHASH_BANDS):
+            yield category, band, signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]
+    
+    def _file(self, category, signature, cluster_id, published=None):
+        seq = next(self._seq)
+        for key in self._bands(category, signature):
+            self._buckets.setdefault(key, {})[seq] = (signature, cluster_id)
+        if published is not None:
+            heapq.heappush(self._published, (published, seq, category, signature))
+    
+    def evict_before(self, cutoff):
+        """Forget signatures of articles published before `cutoff`"""
+        while self._published and self._published[0][0] < cutoff:
+            _, seq, category, signature = heapq.heappop(self._published)
+            for key in self._bands(category, signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.pop(seq, None)
+                    if not bucket:
+                        del self._buckets[key]
+    
+    def find(self, category, signature):
+        """Cluster id of the most similar recent article above the threshold, else None"""
+        best = None
+        seen = set()
+        for key in self._bands(category, signature):
+            for seq, (candidate, cluster_id) in self._buckets.get(key, {}).items():
+                if seq in seen:
+                    continue
+                seen.add(seq)
+                score = similarity(signature, candidate)
+                if score >= self.min_similarity and (best is None or score > best[0]):
+                    best = (score, cluster_id)
+        return best[1] if best else None
+    
+    def assign(self, category, title, summary, published=None):
+        """Sign an article and place it in a cluster.
+        
+        Returns (minhash, cluster_id, is_cluster_lead) as stored on Article.
+        """
+        signature = minhash(title, summary)
+        if signature is None:
+            # Too little to compare by: a story of its own
+            return None, _cluster_id((title or "").encode("utf-8")), True
+        packed = pack_signature(signature)
+        cluster_id = self.find(category, signature)
+        is_lead = cluster_id is None
+        if is_lead:
+            cluster_id = _cluster_id(packed)
+        self._file(category, signature, cluster_id, published)
+        return packed, cluster_id, is_lead
@@ -1,17 +1,60 @@
 import os
-import smtplib
-import ssl
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email import policy
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
 from datetime import datetime, timedelta
 import random
 
 try:
-    from sqlalchemy import select, desc
-    from models import SessionLocal, Article
+    from sqlalchemy import select, update, func
+    from models import SessionLocal, ReadSession, Recipient, DigestRun, DigestDelivery, latest_by_category
+    from cache import current_generation
 except ImportError:
     print("Warning: SQLAlchemy not available. Install requirements first.")
-    select = desc = SessionLocal = Article = None
+    ReadSession = latest_by_category = None
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from config import get_config, get_categories
+from smtp_pool import RateLimiter, SMTPConnectionPool, send_with_retry
+
+# Articles per category in the digest
+DIGEST_ITEMS = 15
+
+# Defaults for digest delivery (overridable under `digest:` in config.yaml)
+DEFAULT_DIGEST_SETTINGS = {
+    "senders": 4,                    # Parallel SMTP connections
+    "rate_per_second": 5,            # Provider send limit across all senders (0 = unlimited)
+    "messages_per_connection": 100,  # Log in again after this many messages
+    "max_attempts": 3,               # Tries per message for temporary (4xx / network) failures
+    "retry_backoff_seconds": 2,      # First retry delay, doubled on each further try
+    "smtp_timeout": 30,
+}
+
+# Delivery results written per commit (a crash resends at most this many)
+DELIVERY_COMMIT_BATCH = 50
+
+# Rendered digests kept per process (old windows/generations fall off the end)
+MAX_CACHED_DIGESTS = 16
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Compiled once per process (no per-render reload checks)
+_digest_templates = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+)
+
+DigestContent = namedtuple("DigestContent", "html text")
+
+_digest_cache_lock = threading.Lock()
+_digest_cache = OrderedDict()
 
 # Fun greetings from our Animal Crossing friends
 NEWSLETTER_GREETINGS = [
@@ -30,167 +73,294 @@ NEWSLETTER_CLOSINGS = [
     "Keep reaching for the stars! ⭐ - Celeste"
 ]
 
-def build_digest_html():
-    """Build HTML email digest of recent articles"""
-    db = SessionLocal()
-    
+def get_digest_settings(cfg):
+    """Merge the `digest:` config section over the delivery defaults"""
+    settings = dict(DEFAULT_DIGEST_SETTINGS)
+    settings.update(cfg.get("digest") or {})
+    return settings
+
+def digest_window(now=None):
+    """Start of the 24-hour digest window, rounded down to the hour so renders can be shared"""
+    now = now or datetime.utcnow()
+    return (now - timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+def load_digest_articles(categories, since):
+    """Lead articles published since `since` for each category, {key: [Article, ...]}"""
+    db = ReadSession()
     try:
-        # Get articles from the last 24 hours
-        since = datetime.utcnow() - timedelta(days=1)
-        
-        # Fetch AI articles
-        ai_articles = db.execute(
-            select(Article)
-            .where(Article.category == "ai_frontier", Article.published >= since)
-            .order_by(desc(Article.published))
-            .limit(15)
-        ).scalars().all()
-        
-        # Fetch economics/politics articles
-        econ_articles = db.execute(
-            select(Article)
-            .where(Article.category == "economics_politics", Article.published >= since)
-            .order_by(desc(Article.published))
-            .limit(15)
-        ).scalars().all()
-        
+        return latest_by_category(db, [c["key"] for c in categories], DIGEST_ITEMS, since=since)
     finally:
         db.close()
+
+def digest_article(article):
+    return {
+        # Truncate long titles
+        "title": article.title if len(article.title) <= 80 else article.title[:77] + "...",
+        "link": article.link,
+        "emoji": article.emoji,
+        "source": article.source,
+        "published": article.published.strftime('%B %d, %Y'),
+        # Plain text (clean_summary() strips markup at ingest); the HTML template escapes it
+        "summary": article.summary,
+        "villager_comment": article.villager_comment,
+    }
+
+def build_digest_model(since):
+    """Everything the digest templates show, for every configured category (plain data, no ORM objects)"""
+    categories = get_categories(get_config())
+    latest = load_digest_articles(categories, since)
+    return {
+        "sections": {
+            c["key"]: {
+                "title": c["digest_title"],
+                "emoji": c["emoji"],
+                "articles": [digest_article(article) for article in latest[c["key"]]],
+            }
+            for c in categories
+        },
+        "greeting": random.choice(NEWSLETTER_GREETINGS),
+        "closing": random.choice(NEWSLETTER_CLOSINGS),
+    }
+
+def _cached_digest(key, build):
+    with _digest_cache_lock:
+        cached = _digest_cache.get(key)
+        if cached is not None:
+            _digest_cache.move_to_end(key)
+            return cached
+    cached = build()
+    with _digest_cache_lock:
+        cached = _digest_cache.setdefault(key, cached)
+        while len(_digest_cache) > MAX_CACHED_DIGESTS:
+            _digest_cache.popitem(last=False)
+    return cached
+
+def clear_digest_cache():
+    with _digest_cache_lock:
+        _digest_cache.clear()
+
+def render_digest(categories=None):
+    """The digest as (html, text) for some categories (default: all configured).
     
-    def build_section(title, articles, section_emoji):
-        if not articles:
-            return f"""
-            <div style="margin: 20px 0;">
-                <h3 style="color: #2F4F4F; font-family: 'Comic Sans MS', cursive; border-bottom: 2px solid #8FBC8F;">
-                    {section_emoji} {title}
-                </h3>
-                <p style="font-style: italic; color: #666;">
-                    🌙 All quiet on this front today! Check back tomorrow!
-                </p>
-            </div>
-            """
-        
-        article_items = ""
-        for article in articles:
-            # Truncate long titles
-            title = article.title if len(article.title) <= 80 else article.title[:77] + "..."
-            
-            article_items += f"""
-            <div style="margin: 15px 0; padding: 15px; background: #F5F5DC; border-left: 4px solid #8FBC8F; border-radius: 5px;">
-                <div style="margin-bottom: 8px;">
-                    <span style="font-size: 18px;">{article.emoji}</span>
-                    <strong><a href="{article.link}" style="color: #2F4F4F; text-decoration: none;">{title}</a></strong>
-                </div>
-                <div style="font-size: 12px; color: #666; margin-bottom: 8px;">
-                    📡 {article.source} • 📅 {article.published.strftime('%B %d, %Y')}
-                </div>
-                {f'<div style="font-size: 14px; color: #444; margin-bottom: 8px; line-height: 1.4;">{article.summary}</div>' if article.summary else ''}
-                <div style="font-style: italic; color: #8FBC8F; font-size: 13px; background: #E8F5E8; padding: 8px; border-radius: 3px;">
-                    💭 {article.villager_comment}
-                </div>
-            </div>
-            """
-        
-        return f"""
-        <div style="margin: 20px 0;">
-            <h3 style="color: #2F4F4F; font-family: 'Comic Sans MS', cursive; border-bottom: 2px solid #8FBC8F; padding-bottom: 5px;">
-                {section_emoji} {title}
-            </h3>
-            {article_items}
-        </div>
-        """
+    Cached by (digest window, data generation, categories): previews,
+    repeated sends and every recipient with the same categories share one
+    render until new articles arrive or the window moves on.
+    """
+    if categories is None:
+        categories = get_categories(get_config())
+    keys = tuple(c["key"] for c in categories)
+    since = digest_window()
+    generation = current_generation()
     
-    greeting = random.choice(NEWSLETTER_GREETINGS)
-    closing = random.choice(NEWSLETTER_CLOSINGS)
+    def render():
+        model = _cached_digest(("model", since, generation), lambda: build_digest_model(since))
+        context = dict(model, sections=[model["sections"][key] for key in keys if key in model["sections"]])
+        return DigestContent(
+            _digest_templates.get_template("email/digest.html").render(context),
+            _digest_templates.get_template("email/digest.txt").render(context),
+        )
     
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Daily News Digest - Animal Crossing Style!</title>
-    </head>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #2F4F4F; max-width: 800px; margin: 0 auto; padding: 20px; background-color: #F0F8FF;">
-        
-        <!-- Header -->
-        <div style="text-align: center; background: linear-gradient(135deg, #8FBC8F, #98FB98); padding: 20px; border-radius: 15px; margin-bottom: 30px;">
-            <h1 style="color: white; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); font-family: 'Comic Sans MS', cursive; margin: 0;">
-                🌟 Daily News Digest 🌟
-            </h1>
-            <p style="color: white; font-size: 16px; margin: 10px 0 0 0;">
-                Animal Crossing Style • Your Daily Dose of World Happenings!
-            </p>
-        </div>
-        
-        <!-- Greeting -->
-        <div style="background: #FFB6C1; padding: 15px; border-radius: 10px; margin-bottom: 25px; text-align: center;">
-            <p style="margin: 0; font-size: 16px; font-weight: bold;">
-                {greeting}
-            </p>
-        </div>
-        
-        <!-- Content Sections -->
-        {build_section("AI Frontier & Technology", ai_articles, "🤖")}
-        {build_section("Economics & Politics", econ_articles, "💰")}
-        
-        <!-- Footer -->
-        <div style="background: #E8F5E8; padding: 20px; border-radius: 10px; text-align: center; margin-top: 30px;">
-            <p style="margin: 0; font-size: 14px; color: #2F4F4F;">
-                {closing}
-            </p>
-            <p style="margin: 10px 0 0 0; font-size: 12px; color: #666;">
-                🏝️ Delivered with love from your digital island paradise! 🏝️
-            </p>
-        </div>
-        
-    </body>
-    </html>
-    """
+    return _cached_digest(("render", since, generation, keys), render)
+
+def build_digest_html(categories=None):
+    """Build HTML email digest of recent articles"""
+    return render_digest(categories).html
+
+def build_digest_text(categories=None):
+    """The same digest as plain text"""
+    return render_digest(categories).text
+
+def get_smtp_settings():
+    """SMTP server and sender from the environment (None if incomplete)"""
+    settings = {
+        "host": os.getenv("SMTP_HOST"),
+        "port": int(os.getenv("SMTP_PORT", "587")),
+        "username": os.getenv("SMTP_USERNAME"),
+        "password": os.getenv("SMTP_PASSWORD"),
+    }
+    settings["from_email"] = os.getenv("FROM_EMAIL", settings["username"])
+    if not all([settings["host"], settings["username"], settings["password"]]):
+        return None
+    return settings
+
+def add_default_recipient(db):
+    """Seed the recipients table from TO_EMAIL the first time (single-inbox setups)"""
+    to_email = os.getenv("TO_EMAIL", os.getenv("SMTP_USERNAME"))
+    if to_email and db.execute(select(Recipient.id).limit(1)).first() is None:
+        db.add(Recipient(email=to_email))
+        db.flush()
+
+def start_digest_run(db, day, resend=False):
+    """Today's run (or a fresh one with resend=True), with a delivery row for every active recipient"""
+    run = None
+    if not resend:
+        run = db.execute(
+            select(DigestRun).where(DigestRun.digest_date == day).order_by(DigestRun.id.desc()).limit(1)
+        ).scalar()
+    if run is None:
+        run = DigestRun(digest_date=day, started_at=datetime.utcnow())
+        db.add(run)
+        db.flush()
     
-    return html_content
+    # Recipients who subscribed since the run started join it
+    covered = select(DigestDelivery.recipient_id).where(DigestDelivery.run_id == run.id)
+    missing = db.execute(
+        select(Recipient.id, Recipient.email).where(Recipient.active, Recipient.id.not_in(covered))
+    ).all()
+    if missing:
+        db.execute(DigestDelivery.__table__.insert(), [
+            {"run_id": run.id, "recipient_id": recipient_id, "email": email, "status": "pending", "attempts": 0}
+            for recipient_id, email in missing
+        ])
+    run.status = "sending"
+    run.finished_at = None
+    return run
 
-def send_digest():
-    """Send the daily news digest email"""
-    print("📧 Preparing to send daily digest... (like sending a letter to a friend!) ✉️")
+def recipient_sections(recipient, categories):
+    """The configured categories a recipient asked for (all of them if none still exist)"""
+    wanted = set(recipient.category_keys())
+    chosen = [c for c in categories if c["key"] in wanted]
+    return chosen or categories
+
+def build_digest_message(content, from_email):
+    """The digest (text and HTML parts) as wire bytes minus the per-recipient To/Message-ID headers"""
+    message = MIMEMultipart("alternative", policy=policy.SMTP)
+    message["Subject"] = f"🌟 Daily News Digest - {datetime.now().strftime('%B %d, %Y')} 🌟"
+    message["From"] = from_email
+    message["Date"] = formatdate(localtime=True)
+    message.attach(MIMEText(content.text, "plain", policy=policy.SMTP))
+    message.attach(MIMEText(content.html, "html", policy=policy.SMTP))
+    return message.as_bytes()
+
+def address_message(message_bytes, to_email):
+    return f"To: {to_email}\r\nMessage-ID: {make_msgid()}\r\n".encode("utf-8") + message_bytes
+
+def _save_results(db, results):
+    if results:
+        db.execute(update(DigestDelivery), results)
+        db.commit()
+        results.clear()
+
+def _finish_run(db, run):
+    counts = dict(db.execute(
+        select(DigestDelivery.status, func.count()).where(DigestDelivery.run_id == run.id).group_by(DigestDelivery.status)
+    ).all())
+    run.recipients = sum(counts.values())
+    run.sent = counts.get("sent", 0)
+    run.failed = counts.get("failed", 0) + counts.get("rejected", 0)
+    run.status = "done" if run.sent == run.recipients else "partial"
+    run.finished_at = datetime.utcnow()
+    db.commit()
+    return counts
+
+def send_digest(resend=False):
+    """Send today's digest to every active recipient.
     
-    # Get email configuration
-    smtp_host = os.getenv("SMTP_HOST")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_username = os.getenv("SMTP_USERNAME")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-    from_email = os.getenv("FROM_EMAIL", smtp_username)
-    to_email = os.getenv("TO_EMAIL", smtp_username)
+    Each distinct category selection is rendered once, messages go out over
+    a small pool of reused SMTP connections under a shared rate limit, and
+    every recipient's result is recorded. Calling it again the same day only
+    sends to recipients that haven't got it yet (resend=True starts over).
+    Returns True when nobody is left waiting for today's digest.
+    """
+    print("📧 Preparing to send daily digest... (like sending a letter to a friend!) ✉️")
     
-    if not all([smtp_host, smtp_username, smtp_password, to_email]):
+    smtp = get_smtp_settings()
+    if smtp is None:
         print("❌ Email configuration incomplete! Check your environment variables.")
         return False
+    settings = get_digest_settings(get_config())
+    categories = get_categories(get_config())
     
+    db = SessionLocal()
+    pool = None
     try:
-        # Create email message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = f"🌟 Daily News Digest - {datetime.now().strftime('%B %d, %Y')} 🌟"
-        message["From"] = from_email
-        message["To"] = to_email
+        add_default_recipient(db)
+        run = start_digest_run(db, datetime.now().date(), resend=resend)
+        db.commit()
+        
+        todo = db.execute(
+            select(DigestDelivery, Recipient)
+            .join(Recipient, Recipient.id == DigestDelivery.recipient_id)
+            .where(DigestDelivery.run_id == run.id, DigestDelivery.status.in_(("pending", "failed")))
+        ).all()
+        if not todo:
+            counts = _finish_run(db, run)
+            print(f"📬 Today's digest already went out to {counts.get('sent', 0)} recipients!")
+            return True
+        
+        # One render per distinct category selection (shared with previews via the digest cache)
+        messages = {}
+        jobs = []
+        for delivery, recipient in todo:
+            sections = recipient_sections(recipient, categories)
+            key = tuple(c["key"] for c in sections)
+            if key not in messages:
+                messages[key] = build_digest_message(render_digest(sections), smtp["from_email"])
+            jobs.append((delivery.id, delivery.email, delivery.attempts or 0, messages[key]))
+        print(f"✉️  Sending to {len(jobs)} recipients ({len(messages)} digest variants)...")
         
-        # Build HTML content
-        html_content = build_digest_html()
-        html_part = MIMEText(html_content, "html")
-        message.attach(html_part)
+        pool = SMTPConnectionPool(
+            smtp["host"], smtp["port"], smtp["username"], smtp["password"],
+            size=settings["senders"],
+            messages_per_connection=settings["messages_per_connection"],
+            timeout=settings["smtp_timeout"],
+        )
+        try:
+            pool.check()
+        except Exception as e:
+            run.status, run.error = "partial", f"{type(e).__name__}: {e}"
+            db.commit()
+            print(f"❌ Failed to send digest: {e}")
+            return False
         
-        # Send email
-        context = ssl.create_default_context()
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls(context=context)
-            server.login(smtp_username, smtp_password)
-            server.sendmail(from_email, [to_email], message.as_string())
+        limiter = RateLimiter(settings["rate_per_second"])
         
-        print("✅ Daily digest sent successfully! 🎉")
+        def deliver(email, message_bytes):
+            # Addressed in the sender thread so only in-flight copies exist
+            return send_with_retry(
+                pool, limiter, smtp["from_email"], email, address_message(message_bytes, email),
+                settings["max_attempts"], settings["retry_backoff_seconds"],
+            )
+        
+        results = []
+        with ThreadPoolExecutor(max_workers=settings["senders"], thread_name_prefix="digest") as senders:
+            futures = {
+                senders.submit(deliver, email, message_bytes): (delivery_id, attempts)
+                for delivery_id, email, attempts, message_bytes in jobs
+            }
+            for future in as_completed(futures):
+                delivery_id, attempts = futures[future]
+                status, tries, error = future.result()
+                results.append({
+                    "id": delivery_id,
+                    "status": status,
+                    "attempts": attempts + tries,
+                    "error": error,
+                    "sent_at": datetime.utcnow() if status == "sent" else None,
+                })
+                if len(results) >= DELIVERY_COMMIT_BATCH:
+                    _save_results(db, results)
+        _save_results(db, results)
+        
+        counts = _finish_run(db, run)
+        failed = counts.get("failed", 0) + counts.get("rejected", 0)
+        if failed:
+            print(f"⚠️  Digest sent to {counts.get('sent', 0)} recipients, {failed} failed "
+                  f"(send again to retry the {counts.get('failed', 0)} temporary failures)")
+            return counts.get("failed", 0) == 0 and counts.get("pending", 0) == 0
+        
+        print(f"✅ Daily digest sent successfully to {counts.get('sent', 0)} recipients! 🎉")
         print("📬 Your news should arrive shortly! (faster than Gulliver's mail!) ⛵")
         return True
         
     except Exception as e:
         print(f"❌ Failed to send digest: {e}")
         return False
+    
+    finally:
+        if pool is not None:
+            pool.close()
+        db.close()
 
 if __name__ == "__main__":
     send_digest()
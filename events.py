@@ -0,0 +1,176 @@
+import json
+import os
+import select
+import threading
+import time
+from collections import deque
+from sqlalchemy import func, text
+from models import engine, SessionLocal, Article, lead_articles_after_id
+
+# Newest article events kept in memory for reconnecting clients
+EVENT_BUFFER_SIZE = 1000
+
+# Comment line sent to idle streams so proxies and browsers keep them open
+HEARTBEAT_SECONDS = 15
+
+# How long a browser waits before reconnecting (ms)
+RECONNECT_MS = 5000
+
+# A stream ends after this long and the browser reconnects with Last-Event-ID,
+# so one open tab never pins a server worker (or trips its timeout) for good
+MAX_STREAM_SECONDS = 300
+
+# Most articles replayed from the database to a client that fell behind the buffer
+MAX_CATCHUP_EVENTS = 200
+
+# How often a process serving /events checks the articles table for new leads
+TAIL_SECONDS = 1
+
+# Most new leads one check publishes (a bigger batch only sends its newest)
+TAIL_BATCH = 500
+
+# Postgres: ingest NOTIFYs this channel, so tails wake at once and only
+# fall back to a check every HEARTBEAT_SECONDS
+NOTIFY_CHANNEL = "acnews_articles"
+
+# Article columns pushed to clients
+EVENT_FIELDS = ("id", "title", "link", "source", "category", "published", "emoji", "cluster_id")
+
+def article_event(row):
+    """The JSON-ready payload for one article (a row dict or an Article)"""
+    get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+    event = {name: get(name) for name in EVENT_FIELDS}
+    if event["published"] is not None:
+        event["published"] = event["published"].isoformat() + "Z"
+    return event
+
+def format_sse(event):
+    """One `article` message in the text/event-stream format; the id is the article id"""
+    return f"id: {event['id']}\nevent: article\ndata: {json.dumps(event)}\n\n"
+
+class ArticleEventBus:
+    """In-process fan-out of newly stored articles to every /events stream.
+
+    The process's ArticleTail publishes new leads once into a bounded buffer
+    ordered by article id; streams block on a shared condition and read
+    whatever is newer than the last id they sent. No per-client queues and
+    no per-client database polling - a client only touches the database when
+    it resumes from an id that has already dropped out of the buffer.
+    """
+
+    def __init__(self, max_events=EVENT_BUFFER_SIZE):
+        self._events = deque(maxlen=max_events)
+        self._condition = threading.Condition()
+        self.last_id = 0
+
+    def publish(self, rows):
+        """Queue freshly committed article rows (call after the commit, not before)"""
+        events = sorted((article_event(row) for row in rows), key=lambda event: event["id"])
+        events = [event for event in events if event["id"] > self.last_id]
+        if not events:
+            return
+        with self._condition:
+            self._events.extend(events)
+            self.last_id = events[-1]["id"]
+            self._condition.notify_all()
+
+    def advance(self, last_id):
+        """Skip ids up to `last_id` without events (what was stored before we started following)"""
+        with self._condition:
+            self.last_id = max(self.last_id, last_id)
+
+    def covers(self, after_id):
+        """Whether every event after `after_id` is still in the buffer"""
+        with self._condition:
+            return bool(self._events) and after_id >= self._events[0]["id"] - 1
+
+    def wait(self, after_id, timeout=HEARTBEAT_SECONDS):
+        """Events newer than `after_id`, blocking up to `timeout` seconds for some"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.last_id > after_id, timeout=timeout)
+            return [event for event in self._events if event["id"] > after_id]
+
+def notify_new_articles(db):
+    """Wake every ArticleTail at commit (Postgres LISTEN/NOTIFY; elsewhere they poll)"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": NOTIFY_CHANNEL})
+
+class ArticleTail:
+    """Feeds this process's ArticleEventBus from the articles table.
+
+    Articles are stored by whichever process fetched them - the scheduler
+    process, or another gunicorn worker running a /refresh - so every process
+    serving /events follows the table itself. That is one thread and one
+    indexed id-range query per TAIL_SECONDS per process, however many
+    streams are open. On Postgres with psycopg2 the thread sleeps in LISTEN
+    instead and wakes on the NOTIFY sent with each ingest commit.
+    """
+
+    def __init__(self, bus, interval=TAIL_SECONDS):
+        self.bus = bus
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def ensure_started(self):
+        """Start following in this process (workers fork after import, so checked per pid)"""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            with SessionLocal() as db:
+                self.bus.advance(db.execute(func.max(Article.id).select()).scalar() or 0)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="article-tail", daemon=True)
+            self._thread.start()
+
+    def poll(self):
+        """Publish cluster leads stored since the last one published"""
+        # The primary, not a replica: a NOTIFY can arrive before a replica has the rows
+        with SessionLocal() as db:
+            leads = lead_articles_after_id(db, self.bus.last_id, TAIL_BATCH)
+            self.bus.publish(leads)
+
+    def _listen(self):
+        """A psycopg2 connection LISTENing on NOTIFY_CHANNEL, or None to poll instead"""
+        if engine.dialect.name != "postgresql":
+            return None
+        try:
+            connection = engine.raw_connection().driver_connection
+            if not hasattr(connection, "poll"):
+                return None
+            connection.autocommit = True
+            connection.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+            return connection
+        except Exception as e:
+            print(f"⚠️  Couldn't LISTEN for new articles, checking every {self.interval}s instead: {e}")
+            return None
+
+    def _wait(self, listener):
+        if listener is None:
+            time.sleep(self.interval)
+            return
+        if select.select([listener], [], [], HEARTBEAT_SECONDS)[0]:
+            listener.poll()
+            listener.notifies.clear()
+
+    def _run(self):
+        listener = self._listen()
+        while True:
+            try:
+                self.poll()
+                self._wait(listener)
+            except Exception as e:
+                print(f"⚠️  Couldn't check for new articles: {e}")
+                time.sleep(self.interval)
+                if listener is not None:
+                    # Most likely the LISTEN connection dropped; open a fresh one
+                    try:
+                        listener.close()
+                    except Exception:
+                        pass
+                    listener = self._listen()
+
+# Shared by the web routes in this process
+article_events = ArticleEventBus()
+article_tail = ArticleTail(article_events)
@@ -0,0 +1,120 @@
+import datetime as dt
+import gzip
+import json
+import os
+import threading
+import uuid
+
+try:
+    import zstandard
+except ImportError:  # Optional: pip install zstandard for smaller, faster archives (gzip otherwise)
+    zstandard = None
+
+# Defaults for the raw feed archive (overridable under `feed_archive:` in config.yaml)
+DEFAULT_FEED_ARCHIVE_SETTINGS = {
+    "enabled": False,               # Keep every downloaded feed body so runs can be replayed offline
+    "dir": "data/feed_archive",     # objects/<ab>/<sha256>.zst (or .gz) + index/<YYYY-MM>.ndjson
+}
+
+OBJECT_EXTENSIONS = (".zst", ".gz")
+
+def get_feed_archive_settings(cfg):
+    """Merge the `feed_archive:` config section over the defaults"""
+    settings = dict(DEFAULT_FEED_ARCHIVE_SETTINGS)
+    settings.update(cfg.get("feed_archive") or {})
+    return settings
+
+class FeedArchive:
+    """Downloaded feed bodies, stored once per distinct content, plus a fetch index.
+
+    Bodies are compressed and named by the sha256 of their raw bytes (the
+    same hash fetch_feeds() already uses to spot unchanged feeds), so a feed
+    that returns the same document all day costs one object. The index has a
+    line per download - (fetched_at, feed, hash) - in monthly files, so a
+    replay of some date range reads only those months.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _object_base(self, body_hash):
+        return os.path.join(self.root, "objects", body_hash[:2], body_hash)
+
+    def has(self, body_hash):
+        base = self._object_base(body_hash)
+        return any(os.path.exists(base + ext) for ext in OBJECT_EXTENSIONS)
+
+    def store(self, body_hash, body):
+        """Write a body unless it's already stored; returns True if it was new"""
+        if self.has(body_hash):
+            return False
+        if zstandard is not None:
+            extension, data = ".zst", zstandard.ZstdCompressor(level=10).compress(body)
+        else:
+            extension, data = ".gz", gzip.compress(body, compresslevel=9)
+        path = self._object_base(body_hash) + extension
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write aside and rename, so a crash never leaves a truncated object under its hash
+        temp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+        return True
+
+    def load(self, body_hash):
+        """The raw bytes of a stored body"""
+        base = self._object_base(body_hash)
+        if os.path.exists(base + ".zst"):
+            if zstandard is None:
+                raise RuntimeError(f"{base}.zst is zstd-compressed - pip install zstandard to read it")
+            with open(base + ".zst", "rb") as f:
+                return zstandard.ZstdDecompressor().stream_reader(f).read()
+        with gzip.open(base + ".gz", "rb") as f:
+            return f.read()
+
+    def record(self, fetches):
+        """Append index lines for a run's downloads (dicts with fetched_at, feed_url,
+        feed_name, category, hash, content_type, bytes). Store the bodies first."""
+        by_month = {}
+        for fetch in fetches:
+            line = dict(fetch, fetched_at=fetch["fetched_at"].isoformat())
+            by_month.setdefault(fetch["fetched_at"].strftime("%Y-%m"), []).append(json.dumps(line, ensure_ascii=False))
+        folder = os.path.join(self.root, "index")
+        with self._lock:
+            os.makedirs(folder, exist_ok=True)
+            for month, lines in by_month.items():
+                with open(os.path.join(folder, month + ".ndjson"), "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def fetches(self, since=None, until=None, feed_urls=None):
+        """Index entries in [since, until) in fetch order, optionally for some feeds only"""
+        folder = os.path.join(self.root, "index")
+        if not os.path.isdir(folder):
+            return []
+        first = since.strftime("%Y-%m") if since else None
+        last = until.strftime("%Y-%m") if until else None
+        found = []
+        for name in sorted(os.listdir(folder)):
+            month = name[:-len(".ndjson")]
+            if not name.endswith(".ndjson") or (first and month < first) or (last and month > last):
+                continue
+            with open(os.path.join(folder, name), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        fetch = json.loads(line)
+                    except ValueError:
+                        # Blank, or a line cut short by a crash mid-append
+                        continue
+                    fetch["fetched_at"] = dt.datetime.fromisoformat(fetch["fetched_at"])
+                    if (since and fetch["fetched_at"] < since) or (until and fetch["fetched_at"] >= until):
+                        continue
+                    if feed_urls is not None and fetch["feed_url"] not in feed_urls:
+                        continue
+                    found.append(fetch)
+        found.sort(key=lambda fetch: fetch["fetched_at"])
+        return found
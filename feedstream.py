@@ -0,0 +1,153 @@
+import io
+import json
+from itertools import islice
+from xml.etree import ElementTree
+import feedparser
+from feedparser import FeedParserDict
+
+try:
+    import ijson
+except ImportError:  # Optional: pip install ijson for incremental JSON Feed parsing
+    ijson = None
+
+# Namespaces whose elements count as the feed's own (what feedparser maps to no prefix)
+CORE_NAMESPACES = {
+    "",
+    "http://purl.org/rss/1.0/",
+    "http://my.netscape.com/rdf/simple/0.9/",
+    "http://purl.org/rss/1.0/modules/rss091#",
+    "http://purl.org/echo/",
+    "http://purl.org/pie/",
+    "http://purl.org/atom/ns#",
+    "http://www.w3.org/2005/Atom",
+}
+
+# Extension namespaces we read a few fields from; everything else (media:,
+# itunes:, ...) is ignored so its titles and summaries can't stand in for the entry's
+EXTENSION_PREFIXES = {
+    "http://purl.org/dc/elements/1.1/": "dc",
+    "http://purl.org/dc/terms/": "dcterms",
+    "http://purl.org/rss/1.0/modules/content/": "content",
+    "http://rssnamespace.org/feedburner/ext/1.0": "feedburner",
+}
+
+# Elements that hold one feed entry (RSS 0.9x/1.0/2.0 and Atom)
+ITEM_TAGS = {"item", "entry"}
+
+# Entry fields by element, in feedparser's terms
+TITLE_TAGS = {"title", "dc:title"}
+SUMMARY_TAGS = {"description", "summary", "dc:description"}
+CONTENT_TAGS = {"content:encoded", "content"}
+PUBLISHED_TAGS = {"pubDate", "published", "issued", "dcterms:issued"}
+UPDATED_TAGS = {"updated", "modified", "dc:date", "dcterms:modified"}
+
+def _tag_name(tag):
+    """'{http://www.w3.org/2005/Atom}entry' -> 'entry', '{...dc/elements/1.1/}date' -> 'dc:date'.
+
+    None for comments/processing instructions and namespaces we don't read.
+    """
+    if not isinstance(tag, str):
+        return None
+    namespace, _, local = tag[1:].rpartition("}") if tag.startswith("{") else ("", "", tag)
+    if namespace in CORE_NAMESPACES:
+        return local
+    prefix = EXTENSION_PREFIXES.get(namespace)
+    return f"{prefix}:{local}" if prefix else None
+
+def _text(element):
+    """Element text; XHTML content is flattened (clean_summary strips markup anyway)"""
+    if len(element):
+        return "".join(element.itertext()).strip()
+    return (element.text or "").strip()
+
+def _entry_from_element(element):
+    """Build a feedparser-style entry from an <item>/<entry> element"""
+    entry = FeedParserDict()
+    content = guid = None
+    guid_is_link = False
+
+    for child in element:
+        name = _tag_name(child.tag)
+        if name in TITLE_TAGS:
+            entry.setdefault("title", _text(child))
+        elif name == "link":
+            href = child.get("href")
+            if href is not None:
+                # Atom: only the alternate link points at the article
+                if child.get("rel", "alternate") == "alternate":
+                    entry.setdefault("link", href.strip())
+            elif child.text:
+                entry.setdefault("link", child.text.strip())
+        elif name == "feedburner:origLink":
+            entry["feedburner_origlink"] = _text(child)
+        elif name in SUMMARY_TAGS:
+            entry.setdefault("summary", _text(child))
+        elif name in CONTENT_TAGS:
+            content = content or _text(child)
+        elif name in PUBLISHED_TAGS:
+            entry.setdefault("published", _text(child))
+        elif name in UPDATED_TAGS:
+            entry.setdefault("updated", _text(child))
+        elif name in ("guid", "id"):
+            guid = _text(child)
+            guid_is_link = name == "guid" and child.get("isPermaLink", "true").lower() == "true"
+
+    # Same fallbacks feedparser applies
+    if not entry.get("summary") and content:
+        entry["summary"] = content
+    if not entry.get("link") and guid_is_link and guid and guid.startswith(("http://", "https://")):
+        entry["link"] = guid
+    if guid:
+        entry["id"] = guid
+    return entry
+
+def iter_xml_entries(body):
+    """Yield entries one at a time from an RSS/Atom document without building the tree"""
+    for _, element in ElementTree.iterparse(io.BytesIO(body), events=("end",)):
+        if _tag_name(element.tag) in ITEM_TAGS:
+            yield _entry_from_element(element)
+            element.clear()
+
+def _entry_from_json_item(item):
+    entry = FeedParserDict()
+    fields = {
+        "title": item.get("title"),
+        "link": item.get("url") or item.get("external_url"),
+        "summary": item.get("summary") or item.get("content_html") or item.get("content_text"),
+        "published": item.get("date_published"),
+        "updated": item.get("date_modified"),
+        "id": item.get("id"),
+    }
+    for key, value in fields.items():
+        if value:
+            entry[key] = str(value)
+    return entry
+
+def iter_json_entries(body):
+    """Yield entries from a JSON Feed, incrementally when ijson is installed"""
+    if ijson is not None:
+        items = ijson.items(io.BytesIO(body), "items.item")
+    else:
+        items = iter(json.loads(body).get("items") or [])
+    for item in items:
+        yield _entry_from_json_item(item)
+
+def is_json_feed(body, content_type=""):
+    if "json" in (content_type or "").lower():
+        return True
+    return body[:64].lstrip().startswith(b"{")
+
+def parse_entries(body, max_items, content_type=""):
+    """First `max_items` entries of a feed, parsing only as far as needed.
+
+    XML is read with iterparse and JSON Feed item-by-item, stopping as soon as
+    `max_items` entries were produced, so the cost follows the items we keep
+    rather than the document size. Documents the strict parsers reject fall
+    back to feedparser's forgiving full parse.
+    """
+    iterator = iter_json_entries if is_json_feed(body, content_type) else iter_xml_entries
+    try:
+        return list(islice(iterator(body), max_items))
+    except Exception:
+        headers = {"content-type": content_type} if content_type else {}
+        return feedparser.parse(body, response_headers=headers).entries[:max_items]
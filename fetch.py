@@ -1,15 +1,31 @@
-import feedparser
-import yaml
 import datetime as dt
 import html
-import bleach
+import json
+import re
+import os
 import random
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import (
+    ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED,
+)
+from concurrent.futures.process import BrokenProcessPool
 from urllib.parse import urlparse
-from models import SessionLocal, Article, init_db
-from dateutil import parser as dtparse
+import requests
+from urllib3.exceptions import ReadTimeoutError, ProtocolError, DecodeError
+from models import SessionLocal, FeedState, init_db, insert_articles, save_fetch_run
+from config import load_config
+from feedstream import parse_entries
+from dates import parse_feed_date, struct_time_to_datetime, count_missing, snapshot_counts
+from dedup import canonicalize_url, known_links, StoryClusters, CLUSTER_WINDOW_HOURS
+from events import notify_new_articles
+from feed_archive import FeedArchive, get_feed_archive_settings
+from polling import get_polling_settings, due_feed_urls, schedule_feed
+from sqlalchemy import select
 
-# Allowed HTML tags for article summaries
-ALLOWED_TAGS = ['b', 'i', 'em', 'strong', 'a', 'code', 'pre', 'p', 'ul', 'ol', 'li', 'br']
 
 # Whimsical villager comments for different article types
 VILLAGER_COMMENTS = {
@@ -37,10 +53,50 @@ CATEGORY_EMOJIS = {
     "economics_politics": ["💰", "📈", "📊", "🏛️", "🗳️", "💼", "🌍", "📰"]
 }
 
-def load_config(path="config.yaml"):
-    """Load configuration from YAML file"""
-    with open(path, "r") as f:
-        return yaml.safe_load(f)
+# Defaults for the concurrent downloader (overridable under `fetch:` in config.yaml)
+DEFAULT_FETCH_SETTINGS = {
+    "max_workers": 16,
+    "per_host_limit": 2,
+    "connect_timeout": 10,  # Seconds to establish a connection
+    "timeout": 30,          # Seconds to wait for the next bytes of a response
+    "feed_deadline": 60,    # Seconds for one whole download, however slowly it trickles (needs urllib3 2)
+    "max_body_bytes": 10 * 1024 * 1024,  # Bigger (decompressed) feeds are refused
+    "run_deadline": 300,    # Seconds for a whole run; unfinished feeds are abandoned
+    "parse_workers": None,  # Processes for parsing/normalizing; None = all cores, 0 = in-process
+    "parse_chunksize": 4,   # Feeds handed to a parse worker per task
+}
+
+# Articles older than this are never stored
+MAX_ARTICLE_AGE_DAYS = 7
+
+# forkserver avoids forking a process that has download/scheduler threads running
+PARSE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+# Parsed, normalized entry as returned by the parse workers (small and picklable)
+EntryRecord = namedtuple("EntryRecord", "source category title link canonical_link summary published")
+
+USER_AGENT = "AnimalCrossingNewsHub/1.0 (+https://github.com/sherryQfeng/news-gathering)"
+
+# Bytes read from the socket at a time while enforcing size and time limits
+BODY_CHUNK_SIZE = 64 * 1024
+
+# Error reported for feeds still unfinished when the run deadline passes
+RUN_DEADLINE_ERROR = "run deadline reached"
+
+# Archived feed bodies parsed and inserted per transaction during a replay
+REPLAY_BATCH_FETCHES = 200
+
+class FeedTooLarge(Exception):
+    """The feed body is bigger than fetch.max_body_bytes"""
+
+class FeedDeadlineExceeded(Exception):
+    """The download didn't finish within fetch.feed_deadline"""
+
+class RunDeadlineExceeded(FeedDeadlineExceeded):
+    """The whole run's deadline passed before this feed was done"""
 
 def clean_summary(summary_text):
     """Clean and sanitize article summary"""
@@ -48,13 +104,11 @@ def clean_summary(summary_text):
         return ""
     
     # First, strip all HTML tags completely for a clean text-only summary
-    import re
     # Remove all HTML tags
-    cleaned = re.sub(r'<[^>]+>', '', summary_text)
+    cleaned = _TAG_RE.sub('', summary_text)
     # Remove extra whitespace and newlines
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = _SPACE_RE.sub(' ', cleaned).strip()
     # Decode HTML entities
-    import html
     cleaned = html.unescape(cleaned)
     
     # Limit length to keep it digestible
@@ -62,28 +116,27 @@ def clean_summary(summary_text):
         cleaned = cleaned[:297] + "..."
     return cleaned
 
-def normalize_datetime(entry):
-    """Try to extract and normalize datetime from feed entry"""
+def normalize_datetime(entry, now=None):
+    """Try to extract and normalize datetime from feed entry (naive UTC; `now` if it has none)"""
     for field in ("published", "updated"):
-        if hasattr(entry, field) and getattr(entry, field):
-            try:
-                parsed_date = dtparse.parse(getattr(entry, field))
-                # Convert to UTC and make timezone-naive for consistency
-                if parsed_date.tzinfo is not None:
-                    parsed_date = parsed_date.utctimetuple()
-                    parsed_date = dt.datetime(*parsed_date[:6])
+        # feedparser may already have parsed it for us
+        parsed_date = struct_time_to_datetime(getattr(entry, f"{field}_parsed", None) or ())
+        if parsed_date is not None:
+            return parsed_date
+        if getattr(entry, field, None):
+            parsed_date = parse_feed_date(getattr(entry, field))
+            if parsed_date is not None:
                 return parsed_date
-            except Exception:
-                continue
-    return dt.datetime.utcnow()
+    count_missing()
+    return now or dt.datetime.utcnow()
 
-def is_recent_article(published_date, max_days_old=30):
-    """Check if article is recent enough (default: within last 30 days)"""
+def is_recent_article(published_date, max_days_old=30, now=None):
+    """Check if article is recent enough (default: within last 30 days of `now`)"""
     if not published_date:
         return False
     
     # Ensure both dates are timezone-naive for comparison
-    cutoff_date = dt.datetime.utcnow() - dt.timedelta(days=max_days_old)
+    cutoff_date = (now or dt.datetime.utcnow()) - dt.timedelta(days=max_days_old)
     
     # Make sure published_date is timezone-naive
     if hasattr(published_date, 'tzinfo') and published_date.tzinfo is not None:
@@ -101,75 +154,651 @@ def get_category_emoji(category):
     emojis = CATEGORY_EMOJIS.get(category, ["📰"])
     return random.choice(emojis)
 
-def fetch_feeds():
-    """Fetch articles from all RSS feeds"""
-    print("🌅 Good morning! Time to gather the daily news! (like collecting fruit!) 🍎")
+def get_fetch_settings(cfg):
+    """Merge the `fetch:` config section over the downloader defaults"""
+    settings = dict(DEFAULT_FETCH_SETTINGS)
+    settings.update(cfg.get("fetch") or {})
+    return settings
+
+class HostLimiter:
+    """Cap how many downloads may talk to the same host at once"""
+    
+    def __init__(self, per_host_limit):
+        self.per_host_limit = max(1, int(per_host_limit))
+        self._lock = threading.Lock()
+        self._semaphores = {}
+    
+    def for_url(self, url):
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._semaphores[host] = semaphore
+        return semaphore
+
+_thread_local = threading.local()
+
+def _http_session():
+    """One requests.Session per worker thread (sessions aren't thread-safe)"""
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = requests.Session()
+        http.headers["User-Agent"] = USER_AGENT
+        _thread_local.http = http
+    return http
+
+def conditional_headers(state):
+    """Build If-None-Match / If-Modified-Since headers from a stored FeedState"""
+    headers = {}
+    if state is None:
+        return headers
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+    return headers
+
+def _body_socket(raw):
+    """The socket a streamed urllib3 response reads its body from, if it can be found.
+
+    http.client forgets the connection's socket for responses that close it
+    (HTTP/1.0, Connection: close), so it's taken from the body's file object.
+    """
+    try:
+        return raw._fp.fp.raw._sock
+    except AttributeError:
+        return getattr(raw.connection, "sock", None)
+
+def read_body(response, max_bytes, deadline, read_timeout=None):
+    """Read a streamed response body, refusing oversized or endlessly trickling feeds.
+    
+    `deadline` is a time.monotonic() value. Each read returns whatever has
+    arrived (read1) and waits at most until the deadline, so a server
+    dribbling a byte at a time can't hold the download past it. The body
+    is left on the response so `response.content` works as usual.
+    """
+    length = response.headers.get("Content-Length", "")
+    if length.isdigit() and int(length) > max_bytes:
+        raise FeedTooLarge(f"feed is {int(length)} bytes (limit {max_bytes})")
+    raw = response.raw
+    sock = _body_socket(raw)
+    chunks = []
+    size = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise FeedDeadlineExceeded("download took too long")
+        if sock is not None:
+            try:
+                sock.settimeout(min(read_timeout, remaining) if read_timeout else remaining)
+            except OSError:
+                # Already closed by the server: what's left of the body is buffered
+                sock = None
+        try:
+            chunk = raw.read1(BODY_CHUNK_SIZE, decode_content=True)
+        except (ReadTimeoutError, ProtocolError, DecodeError) as e:
+            # A read cut short by the deadline surfaces as a timeout or a broken body
+            if time.monotonic() >= deadline:
+                raise FeedDeadlineExceeded("download took too long")
+            # Otherwise the same errors requests' iter_content() raises
+            if isinstance(e, ReadTimeoutError):
+                raise requests.exceptions.ConnectionError(e)
+            if isinstance(e, ProtocolError):
+                raise requests.exceptions.ChunkedEncodingError(e)
+            raise requests.exceptions.ContentDecodingError(e)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise FeedTooLarge(f"feed is over {max_bytes} bytes")
+        chunks.append(chunk)
+    response._content = b"".join(chunks)
+    return response
+
+def download_feed(feed_url, limiter, settings, headers=None, run_deadline=None):
+    """Download a feed body, holding the per-host slot only for the request.
+    
+    Every download is bounded: connect and read timeouts per socket
+    operation, `feed_deadline` for the whole body, `max_body_bytes` for its
+    size, and `run_deadline` (monotonic) for the run it belongs to.
+    The time spent on the request itself (not waiting for the host slot) is
+    left on the response, or on the exception, as `fetch_seconds`.
+    """
+    run_deadline = run_deadline or float("inf")
+    semaphore = limiter.for_url(feed_url)
+    wait = run_deadline - time.monotonic()
+    if wait <= 0 or not semaphore.acquire(timeout=None if wait == float("inf") else wait):
+        raise RunDeadlineExceeded("never got a connection slot")
+    try:
+        started = time.perf_counter()
+        deadline = min(time.monotonic() + settings["feed_deadline"], run_deadline)
+        try:
+            response = _http_session().get(
+                feed_url,
+                timeout=(settings["connect_timeout"], settings["timeout"]),
+                headers=headers,
+                stream=True,
+            )
+            try:
+                read_body(response, settings["max_body_bytes"], deadline, settings["timeout"])
+            finally:
+                response.close()
+        except FeedDeadlineExceeded as e:
+            error = RunDeadlineExceeded(str(e)) if time.monotonic() >= run_deadline else e
+            error.fetch_seconds = time.perf_counter() - started
+            raise error
+        except Exception as e:
+            e.fetch_seconds = time.perf_counter() - started
+            raise
+    finally:
+        semaphore.release()
+    response.fetch_seconds = time.perf_counter() - started
+    response.raise_for_status()
+    return response
+
+def download_feeds(feed_urls, settings, request_headers=None, run_deadline=None):
+    """Start downloading every feed in parallel; returns {url: Future}"""
+    request_headers = request_headers or {}
+    limiter = HostLimiter(settings["per_host_limit"])
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, int(settings["max_workers"])),
+        thread_name_prefix="feed-fetch",
+    )
+    futures = {}
+    for feed_url in feed_urls:
+        if feed_url not in futures:
+            futures[feed_url] = executor.submit(
+                download_feed, feed_url, limiter, settings, request_headers.get(feed_url), run_deadline
+            )
+    # Let the workers finish on their own; callers wait on the futures
+    executor.shutdown(wait=False)
+    return futures
+
+def content_hash(body):
+    """Fingerprint a feed body so byte-identical responses can be skipped"""
+    return hashlib.sha256(body).hexdigest()
+
+def feed_state(db, states, feed_url):
+    """The FeedState for a feed, created (and added to the session) on first use"""
+    state = states.get(feed_url)
+    if state is None:
+        state = states[feed_url] = FeedState(feed_url=feed_url)
+    db.add(state)
+    return state
+
+def remember_feed_state(db, states, feed_url, response, body_hash):
+    """Store the validators from this response for the next conditional request"""
+    state = feed_state(db, states, feed_url)
+    state.last_status = response.status_code
+    state.last_fetched = dt.datetime.utcnow()
+    if response.status_code != 304:
+        state.etag = response.headers.get("ETag")
+        state.last_modified = response.headers.get("Last-Modified")
+        state.content_hash = body_hash
+
+def entry_link(entry):
+    """Article URL for an entry as published (FeedBurner keeps the real one aside)"""
+    return (getattr(entry, "feedburner_origlink", None) or entry.link).strip()
+
+def parse_feed_body(job):
+    """Raw feed bytes -> (EntryRecords, stats). Runs in a parse worker.
+    
+    `as_of` is when the body was downloaded (None = now); article ages are
+    judged from then, so a replayed body keeps the entries it had.
+    """
+    feed_name, category, body, content_type, max_items, as_of = job
+    started = time.perf_counter()
+    dates_before = snapshot_counts()
+    records = []
+    stats = {"entries": 0, "no_link": 0, "too_old": 0}
+    for entry in parse_entries(body, max_items, content_type):
+        stats["entries"] += 1
+        
+        # Skip entries without links
+        if not getattr(entry, "link", None):
+            stats["no_link"] += 1
+            continue
+        
+        # Skip articles older than 7 days to ensure fresh content
+        published_date = normalize_datetime(entry, now=as_of)
+        if not is_recent_article(published_date, max_days_old=MAX_ARTICLE_AGE_DAYS, now=as_of):
+            stats["too_old"] += 1
+            continue
+        
+        link = entry_link(entry)
+        records.append(EntryRecord(
+            source=feed_name,
+            category=category,
+            title=html.unescape(getattr(entry, "title", "Untitled Article")),
+            link=link,
+            canonical_link=canonicalize_url(link),
+            summary=clean_summary(getattr(entry, "summary",
+                                  getattr(entry, "description", ""))),
+            published=published_date,
+        ))
+    
+    # How this feed's dates were parsed, so the parent can total worker counts
+    stats["dates"] = dict(snapshot_counts() - dates_before)
+    stats["parse_seconds"] = time.perf_counter() - started
+    return records, stats
+
+def parse_feed_batch(jobs):
+    """Parse a chunk of feeds; a failure is reported per feed instead of raised"""
+    results = []
+    for job in jobs:
+        try:
+            results.append((parse_feed_body(job), None))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+def get_parse_pool(workers):
+    """Process pool shared by fetch runs in this process (started on first use)"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(PARSE_START_METHOD),
+            )
+        return _parse_pool
+
+def reset_parse_pool():
+    """Drop a broken pool so the next run starts a fresh one"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+class ParseStage:
+    """Ship feed bodies to the process pool in chunks as their downloads finish"""
+    
+    def __init__(self, settings):
+        workers = settings.get("parse_workers")
+        self.workers = (os.cpu_count() or 1) if workers is None else int(workers)
+        self.chunksize = max(1, int(settings.get("parse_chunksize") or 1))
+        self._batch = []
+        self._submitted = []  # (jobs, future or None)
+    
+    def add(self, job):
+        self._batch.append(job)
+        if len(self._batch) >= self.chunksize:
+            self.flush()
+    
+    def flush(self):
+        """Submit the part-filled chunk now (call before waiting on anything slow)"""
+        if not self._batch:
+            return
+        jobs, self._batch = self._batch, []
+        future = None
+        if self.workers > 0:
+            try:
+                future = get_parse_pool(self.workers).submit(parse_feed_batch, jobs)
+            except (BrokenProcessPool, RuntimeError):
+                reset_parse_pool()
+        self._submitted.append((jobs, future))
+    
+    def results(self, deadline=None):
+        """[(records_or_None, error_or_None)] in the order jobs were added.
+        
+        Bodies already downloaded are always parsed: a chunk the pool hasn't
+        finished by `deadline` (time.monotonic()) is parsed right here
+        instead (each body is size- and item-capped, so that's quick).
+        """
+        self.flush()
+        results = []
+        for jobs, future in self._submitted:
+            batch = None
+            if future is not None:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                try:
+                    batch = future.result(timeout=remaining)
+                except FutureTimeout:
+                    future.cancel()
+                except BrokenProcessPool:
+                    reset_parse_pool()
+            if batch is None:
+                # No pool (parse_workers: 0), it died, or it's running late: parse here instead
+                batch = parse_feed_batch(jobs)
+            results.extend(batch)
+        return results
+
+def build_article_row(record):
+    """Turn a parsed entry record into a plain dict ready for a bulk insert"""
+    return {
+        "source": record.source,
+        "title": record.title,
+        "link": record.link,
+        "canonical_link": record.canonical_link,
+        "summary": record.summary,
+        "published": record.published,
+        "category": record.category,
+        "emoji": get_category_emoji(record.category),
+        "villager_comment": get_villager_comment(record.category),
+    }
+
+def queue_new_articles(records, clusters, pending_rows, already_known):
+    """Cluster the parsed records whose links we don't store yet and queue their rows"""
+    for record in records:
+        # Links we already store never reach the database
+        if record.canonical_link in known_links:
+            already_known[record.source] = already_known.get(record.source, 0) + 1
+            continue
+        
+        row = build_article_row(record)
+        row["minhash"], row["cluster_id"], row["is_cluster_lead"] = clusters.assign(
+            record.category, row["title"], row["summary"], row["published"]
+        )
+        pending_rows.append(row)
+
+def summarize_by_source(rows, inserted, already_known):
+    """Count added vs. skipped-duplicate rows per feed for the run report"""
+    summary = {source: [0, count] for source, count in already_known.items()}
+    for row in rows:
+        summary.setdefault(row["source"], [0, 0])[1] += 1
+    for row in inserted:
+        counts = summary[row["source"]]
+        counts[0] += 1
+        counts[1] -= 1
+    return {source: tuple(counts) for source, counts in summary.items()}
+
+def new_feed_log(feed_name, feed_url, category):
+    """Blank run-history row for one feed (every row carries the same keys)"""
+    return {
+        "feed_name": feed_name, "feed_url": feed_url, "category": category,
+        "http_status": None, "fetch_seconds": None, "bytes": None, "parse_seconds": None,
+        "entries": 0, "kept": 0, "duplicates": 0, "too_old": 0, "added": 0,
+        "outcome": None, "error": None, "dates": None, "latencies": None,
+    }
+
+def record_article_latencies(feed_logs, inserted):
+    """Note on each feed's history row how long its new articles took to reach us"""
+    stored_at = dt.datetime.utcnow()
+    latencies = {}
+    for row in inserted:
+        if row["published"] is not None and row["source"] in feed_logs:
+            seconds = max((stored_at - row["published"]).total_seconds(), 0.0)
+            latencies.setdefault(row["source"], []).append(round(seconds, 1))
+    for feed_name, values in latencies.items():
+        feed_logs[feed_name]["latencies"] = json.dumps(values)
+
+def archive_body(archive, archived, feed_name, feed_url, category, response, body_hash):
+    """Keep a downloaded body in the raw feed archive (a failure here never fails the fetch)"""
+    try:
+        archive.store(body_hash, response.content)
+    except OSError as e:
+        print(f"    ⚠️  Couldn't archive the feed body: {e}")
+        return
+    archived.append({
+        "fetched_at": dt.datetime.utcnow(),
+        "feed_url": feed_url,
+        "feed_name": feed_name,
+        "category": category,
+        "hash": body_hash,
+        "content_type": response.headers.get("Content-Type", ""),
+        "bytes": len(response.content),
+    })
+
+def record_fetch_run(run, feeds):
+    """Store the run history (what /metrics reports from); a failure here never fails the fetch"""
+    db = SessionLocal()
+    try:
+        save_fetch_run(db, run, feeds)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"  ⚠️  Couldn't save the fetch run history: {e}")
+    finally:
+        db.close()
+
+def fetch_feeds(due_only=False, progress=None):
+    """Fetch articles from all RSS feeds.
+    
+    With `due_only`, only feeds whose adaptive polling interval has elapsed
+    are fetched (at most `polling.max_feeds_per_tick` of them). `progress`,
+    if given, is called with keyword updates (stage, feeds_total, feeds_done)
+    as the run moves along.
+    """
+    report = progress or (lambda **fields: None)
+    run_started_at = dt.datetime.utcnow()
+    run_timer = time.perf_counter()
+    feed_logs = {}  # feed name -> run-history row
+    feed_published = {}  # feed name -> publish times of its current items
+    insert_seconds = None
+    run_error = None
     
     cfg = load_config()
-    init_db()
+    settings = get_fetch_settings(cfg)
+    deadline = time.monotonic() + settings["run_deadline"]
+    abandoned = []
+    polling = get_polling_settings(cfg)
+    archive_settings = get_feed_archive_settings(cfg)
+    archive = FeedArchive(archive_settings["dir"]) if archive_settings["enabled"] else None
+    archived = []  # index entries for the bodies this run downloaded
     db = SessionLocal()
     added_count = 0
     
+    def feeds_done():
+        return sum(1 for log in feed_logs.values() if log["outcome"])
+    
+    feed_groups = cfg.get("feeds", {})
+    feed_urls = [feed_info["url"] for feeds in feed_groups.values() for feed_info in feeds]
+    states = {
+        state.feed_url: state
+        for state in db.execute(
+            select(FeedState).where(FeedState.feed_url.in_(feed_urls))
+        ).scalars()
+    }
+    
+    if due_only:
+        due = set(due_feed_urls(feed_urls, states, polling["max_feeds_per_tick"], run_started_at))
+        if not due:
+            db.close()
+            report(stage="nothing_due")
+            return 0
+        feed_groups = {
+            category: [feed_info for feed_info in feeds if feed_info["url"] in due]
+            for category, feeds in feed_groups.items()
+        }
+        feed_urls = [url for url in feed_urls if url in due]
+        print(f"⏰ {len(due)} feeds are due for a visit!")
+    else:
+        print("🌅 Good morning! Time to gather the daily news! (like collecting fruit!) 🍎")
+    report(stage="downloading", feeds_total=sum(len(feeds) for feeds in feed_groups.values()))
+    
+    downloads = download_feeds(
+        feed_urls,
+        settings,
+        {url: conditional_headers(states.get(url)) for url in feed_urls},
+        deadline,
+    )
+    
+    # Rows are collected for the whole run and written in one transaction
+    pending_rows = []
+    already_known = {}
+    known_links.ensure_loaded(db)
+    clusters = StoryClusters.load_recent(db)
+    
+    max_items = cfg["site"]["num_items_per_feed"]
+    parse_stage = ParseStage(settings)
+    parsed_feeds = []  # (feed_name, feed_url, response, body_hash) in parse-stage order
+    
+    # Feeds in config order; the parsed results are folded in this order too, so
+    # which article leads its story cluster doesn't depend on download timing
+    feed_order = [(category, feed_info) for category, feeds in feed_groups.items() for feed_info in feeds]
+    for category, feed_info in feed_order:
+        feed_logs[feed_info["name"]] = new_feed_log(feed_info["name"], feed_info["url"], category)
+    
+    def take_download(category, feed_info, future):
+        """Log a finished download and queue its body for parsing if it changed"""
+        feed_name = feed_info["name"]
+        feed_url = feed_info["url"]
+        log = feed_logs[feed_name]
+        print(f"  🔍 Checking {feed_name}...")
+        try:
+            response = future.result()
+        except RunDeadlineExceeded:
+            abandoned.append(feed_name)
+            log.update(outcome="abandoned", error=RUN_DEADLINE_ERROR)
+            print(f"    ⏰ Gave up on {feed_name}: {RUN_DEADLINE_ERROR}")
+            return
+        except Exception as e:
+            failed = getattr(e, "response", None)
+            log.update(
+                outcome="fetch_error",
+                error=f"{type(e).__name__}: {e}",
+                fetch_seconds=getattr(e, "fetch_seconds", None),
+                http_status=failed.status_code if failed is not None else None,
+            )
+            print(f"    ❌ Error fetching {feed_name}: {e}")
+            return
+        
+        log.update(
+            http_status=response.status_code,
+            fetch_seconds=getattr(response, "fetch_seconds", None),
+            bytes=len(response.content),
+        )
+        
+        # Nothing new since last time - skip parsing entirely
+        if response.status_code == 304:
+            log["outcome"] = "not_modified"
+            remember_feed_state(db, states, feed_url, response, None)
+            print(f"    💤 Not modified since last visit")
+            return
+        
+        body_hash = content_hash(response.content)
+        if archive is not None:
+            archive_body(archive, archived, feed_name, feed_url, category, response, body_hash)
+        state = states.get(feed_url)
+        if state is not None and state.content_hash == body_hash:
+            log["outcome"] = "unchanged"
+            remember_feed_state(db, states, feed_url, response, body_hash)
+            print(f"    💤 Same content as last visit")
+            return
+        
+        # Parsing and normalizing happen on the process pool while later downloads finish
+        parse_stage.add((
+            feed_name, category, response.content,
+            response.headers.get("Content-Type", ""), max_items, None,
+        ))
+        parsed_feeds.append((feed_name, feed_url, response, body_hash))
+    
     try:
-        for category, feeds in cfg.get("feeds", {}).items():
-            print(f"📡 Fetching {category} news...")
+        print(f"📡 Fetching {len(feed_order)} feeds...")
+        waiting = {}  # download future -> feeds sharing that URL
+        for category, feed_info in feed_order:
+            waiting.setdefault(downloads[feed_info["url"]], []).append((category, feed_info))
+        
+        # Handle downloads as they finish, so one slow host holds up nothing else
+        while waiting:
+            done, _ = wait(waiting, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                for category, feed_info in waiting.pop(future):
+                    take_download(category, feed_info, future)
+            # Don't hold a part-filled chunk back while waiting for the next download
+            parse_stage.flush()
+            report(feeds_done=feeds_done())
+        
+        for feeds in waiting.values():
+            for _, feed_info in feeds:
+                abandoned.append(feed_info["name"])
+                feed_logs[feed_info["name"]].update(outcome="abandoned", error=RUN_DEADLINE_ERROR)
+                print(f"  ⏰ Gave up on {feed_info['name']}: {RUN_DEADLINE_ERROR}")
+        
+        report(stage="parsing", feeds_done=feeds_done())
+        position = {feed_info["name"]: index for index, (_, feed_info) in enumerate(feed_order)}
+        outcomes = sorted(zip(parsed_feeds, parse_stage.results(deadline)), key=lambda item: position[item[0][0]])
+        for (feed_name, feed_url, response, body_hash), (parsed, error) in outcomes:
+            report(feeds_done=feeds_done())
+            log = feed_logs[feed_name]
+            if error is not None:
+                log.update(outcome="parse_error", error=error)
+                print(f"  ❌ Error parsing {feed_name}: {error}")
+                continue
             
-            for feed_info in feeds:
-                feed_name = feed_info["name"]
-                feed_url = feed_info["url"]
-                
-                print(f"  🔍 Checking {feed_name}...")
-                
-                try:
-                    # Parse the RSS feed
-                    parsed_feed = feedparser.parse(feed_url)
-                    
-                    # Limit items per feed as configured
-                    max_items = cfg["site"]["num_items_per_feed"]
-                    entries = parsed_feed.entries[:max_items]
-                    
-                    for entry in entries:
-                        # Skip entries without links
-                        if not hasattr(entry, 'link') or not entry.link:
-                            continue
-                        
-                        # Get the publication date
-                        published_date = normalize_datetime(entry)
-                        
-                        # Skip articles older than 7 days to ensure fresh content
-                        if not is_recent_article(published_date, max_days_old=7):
-                            print(f"    ⏭️  Skipping old article: {getattr(entry, 'title', 'Untitled')[:50]}... ({published_date.strftime('%Y-%m-%d') if published_date else 'no date'})")
-                            continue
-                        
-                        # Create article object
-                        article = Article(
-                            source=feed_name,
-                            title=html.unescape(getattr(entry, "title", "Untitled Article")),
-                            link=entry.link,
-                            summary=clean_summary(getattr(entry, "summary", 
-                                                  getattr(entry, "description", ""))),
-                            published=published_date,
-                            category=category,
-                            emoji=get_category_emoji(category),
-                            villager_comment=get_villager_comment(category)
-                        )
-                        
-                        try:
-                            db.add(article)
-                            db.commit()
-                            added_count += 1
-                            print(f"    ✅ Added: {article.title[:50]}...")
-                        except Exception as e:
-                            # Likely a duplicate (unique constraint on link)
-                            db.rollback()
-                            print(f"    ⏭️  Skipped duplicate: {article.title[:30]}...")
-                            
-                except Exception as e:
-                    print(f"    ❌ Error fetching {feed_name}: {e}")
-                    continue
+            records, stats = parsed
+            feed_published[feed_name] = [record.published for record in records]
+            log.update(
+                outcome="parsed",
+                parse_seconds=stats["parse_seconds"],
+                entries=stats["entries"],
+                kept=len(records),
+                too_old=stats["too_old"],
+            )
+            if stats["too_old"]:
+                print(f"  ⏭️  {feed_name}: skipped {stats['too_old']} articles older than {MAX_ARTICLE_AGE_DAYS} days")
+            log["dates"] = json.dumps(stats["dates"])
+            date_fallbacks = stats["dates"].get("dateutil", 0) + stats["dates"].get("unparseable", 0)
+            if date_fallbacks:
+                print(f"  🗓️  {feed_name}: {date_fallbacks} dates needed the slow fallback parser")
+            
+            queue_new_articles(records, clusters, pending_rows, already_known)
+            remember_feed_state(db, states, feed_url, response, body_hash)
+        
+        # One batched INSERT ... ON CONFLICT DO NOTHING for everything we collected
+        report(stage="saving", feeds_done=feeds_done())
+        insert_timer = time.perf_counter()
+        inserted = insert_articles(db, pending_rows)
+        
+        summary = summarize_by_source(pending_rows, inserted, already_known)
+        for feed_name, (added, skipped) in summary.items():
+            if feed_name in feed_logs:
+                feed_logs[feed_name].update(added=added, duplicates=skipped)
+        
+        # Plan each feed's next visit from what this one found (same transaction as the articles)
+        for log in feed_logs.values():
+            schedule_feed(
+                feed_state(db, states, log["feed_url"]), log["outcome"], log["added"],
+                feed_published.get(log["feed_name"], ()), polling,
+            )
+        
+        if inserted:
+            notify_new_articles(db)
+        db.commit()
+        insert_seconds = time.perf_counter() - insert_timer
+        added_count = len(inserted)
+        
+        for row in inserted:
+            known_links.add(row["canonical_link"])
+        record_article_latencies(feed_logs, inserted)
+        
+        for feed_name, (added, skipped) in summary.items():
+            print(f"  ✅ {feed_name}: added {added}, skipped {skipped} duplicates")
+        
+        if abandoned:
+            print(f"⏰ Run deadline of {settings['run_deadline']}s reached - saved what we had, "
+                  f"abandoned {len(abandoned)} feeds: {', '.join(abandoned)}")
+    
+    except Exception as e:
+        run_error = f"{type(e).__name__}: {e}"
+        raise
     
     finally:
         db.close()
+        if archived:
+            try:
+                archive.record(archived)
+            except OSError as e:
+                print(f"  ⚠️  Couldn't write the feed archive index: {e}")
+        feed_rows = list(feed_logs.values())
+        record_fetch_run({
+            "started_at": run_started_at,
+            "finished_at": dt.datetime.utcnow(),
+            "duration_seconds": time.perf_counter() - run_timer,
+            "feeds": len(feed_rows),
+            "feeds_failed": sum(1 for row in feed_rows if row["outcome"] in ("fetch_error", "parse_error")),
+            "feeds_abandoned": len(abandoned),
+            "articles_added": added_count,
+            "insert_seconds": insert_seconds,
+            "error": run_error,
+        }, feed_rows)
     
     print(f"🎉 Finished! Added {added_count} new articles to our collection!")
     print("📅 All articles are guaranteed to be from the last 7 days!")
@@ -177,5 +806,93 @@ def fetch_feeds():
         print("💡 No new articles found - your database is already up to date with fresh content!")
     return added_count
 
+def replay_feeds(since=None, until=None, feed_urls=None, progress=None):
+    """Re-run parsing, normalizing, dedup and insert over archived feed bodies - no network.
+
+    Walks the feed archive's index in download order (optionally only
+    [since, until) and some feeds) with today's code and config: a feed
+    still listed in config.yaml gets its current name and category, and
+    article ages and story clusters (the 48h window) are judged from when
+    each body was downloaded. A body equal
+    to the feed's previous one is skipped, just as live runs skip unchanged
+    feeds. Links already stored are left alone, so replay into a fresh
+    database to rebuild every row under new rules. Polling state isn't
+    touched. Returns the number of articles added.
+    """
+    report = progress or (lambda **fields: None)
+    cfg = load_config()
+    settings = get_fetch_settings(cfg)
+    archive = FeedArchive(get_feed_archive_settings(cfg)["dir"])
+    max_items = cfg["site"]["num_items_per_feed"]
+    configured = {
+        feed_info["url"]: (feed_info["name"], category)
+        for category, feeds in (cfg.get("feeds") or {}).items() for feed_info in feeds
+    }
+
+    downloads = archive.fetches(since, until, feed_urls)
+    changed = []
+    previous = {}  # feed url -> hash of its previous body
+    for fetch in downloads:
+        if previous.get(fetch["feed_url"]) != fetch["hash"]:
+            changed.append(fetch)
+        previous[fetch["feed_url"]] = fetch["hash"]
+    print(f"📼 Replaying {len(changed)} archived feed bodies ({len(downloads)} downloads) from {archive.root}...")
+    report(stage="parsing", feeds_total=len(changed), feeds_done=0)
+
+    started = time.perf_counter()
+    added_count = 0
+    failed = 0
+    done = 0  # Bodies handled so far, replayed or not (like a live run's feeds_done)
+    db = SessionLocal()
+    try:
+        known_links.ensure_loaded(db)
+        # Clusters are judged as they were at download time: the window slides along with the bodies
+        window = dt.timedelta(hours=CLUSTER_WINDOW_HOURS)
+        clusters = StoryClusters.load_recent(db, as_of=changed[0]["fetched_at"] if changed else None)
+        for start in range(0, len(changed), REPLAY_BATCH_FETCHES):
+            # Bodies are read while earlier ones are already being parsed on the pool
+            parse_stage = ParseStage(settings)
+            loaded = []  # (fetch, feed name) in parse-stage order
+            batch = changed[start:start + REPLAY_BATCH_FETCHES]
+            for fetch in batch:
+                name, category = configured.get(fetch["feed_url"], (fetch["feed_name"], fetch["category"]))
+                try:
+                    body = archive.load(fetch["hash"])
+                except OSError as e:
+                    failed += 1
+                    print(f"  ❌ Couldn't read {name}'s body from {fetch['fetched_at']:%Y-%m-%d %H:%M}: {e}")
+                    continue
+                parse_stage.add((name, category, body, fetch["content_type"], max_items, fetch["fetched_at"]))
+                loaded.append((fetch, name))
+
+            pending_rows = []
+            already_known = {}
+            seen = set()  # Consecutive bodies of a feed mostly repeat the same items
+            for (fetch, name), (parsed, error) in zip(loaded, parse_stage.results()):
+                if error is not None:
+                    failed += 1
+                    print(f"  ❌ Error parsing {name} from {fetch['fetched_at']:%Y-%m-%d %H:%M}: {error}")
+                    continue
+                records = [record for record in parsed[0] if record.canonical_link not in seen]
+                seen.update(record.canonical_link for record in records)
+                clusters.evict_before(fetch["fetched_at"] - window)
+                queue_new_articles(records, clusters, pending_rows, already_known)
+
+            inserted = insert_articles(db, pending_rows)
+            db.commit()
+            for row in inserted:
+                known_links.add(row["canonical_link"])
+            added_count += len(inserted)
+            done += len(batch)
+            report(feeds_done=done, articles_added=added_count)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"🎉 Replayed {len(changed) - failed} feed bodies in {elapsed:.1f}s and added {added_count} articles!"
+          + (f" ({failed} couldn't be replayed)" if failed else ""))
+    return added_count
+
 if __name__ == "__main__":
+    init_db()
     fetch_feeds()
@@ -0,0 +1,255 @@
+import datetime as dt
+import os
+import socket
+import threading
+import uuid
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
+from cache import forget_generation
+from models import SessionLocal, ReadSession, RefreshJob
+
+# How often a running job writes its progress (which also proves its process is alive)
+JOB_HEARTBEAT_SECONDS = 1
+
+# A running job whose process hasn't written for this long is given up on
+JOB_STALE_SECONDS = 90
+
+# Finished jobs kept around so late status polls still get an answer
+FINISHED_JOB_HOURS = 24
+
+# Attempts at taking the running slot before giving up on a race with other processes
+SUBMIT_ATTEMPTS = 5
+
+def _iso(value):
+    return value.isoformat() + "Z" if value else None
+
+class FetchJob:
+    """One fetch run as seen by /refresh callers and the status endpoint (a snapshot of its row)"""
+
+    def __init__(self, row):
+        self.id = row.id
+        self.due_only = row.kind == "due_feeds"
+        self.state = row.state
+        self.stage = row.stage
+        self.feeds_total = row.feeds_total or 0
+        self.feeds_done = row.feeds_done or 0
+        self.articles_added = row.articles_added or 0
+        self.error = row.error
+        self.requests = row.requests or 1
+        self.created_at = row.created_at
+        self.started_at = row.started_at
+        self.finished_at = row.finished_at
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": "due_feeds" if self.due_only else "all_feeds",
+            "state": self.state,
+            "stage": self.stage,
+            "feeds_total": self.feeds_total,
+            "feeds_done": self.feeds_done,
+            "articles_added": self.articles_added,
+            "error": self.error,
+            "coalesced_requests": self.requests,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+        }
+
+class JobProgress:
+    """Progress callback handed to fetch_feeds(); written to the job's row in the background.
+
+    Updates are batched and written every JOB_HEARTBEAT_SECONDS, along with
+    a heartbeat, so a long silent download doesn't make the job look dead.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"fetch-job-{job_id}-heartbeat", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def update(self, **fields):
+        with self._lock:
+            self._pending.update(fields)
+
+    def _beat(self):
+        while not self._stop.wait(JOB_HEARTBEAT_SECONDS):
+            self.write()
+
+    def write(self, **fields):
+        with self._lock:
+            values, self._pending = dict(self._pending, **fields), {}
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(RefreshJob).where(RefreshJob.id == self.job_id)
+                .values(heartbeat_at=dt.datetime.utcnow(), **values)
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Couldn't save the progress of fetch job {self.job_id}: {e}")
+        finally:
+            db.close()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            return self._pending
+
+def _fetch_feeds(**kwargs):
+    # Imported on first use: the ingest stack (feedparser, parse pool) is slow to load
+    from fetch import fetch_feeds
+    return fetch_feeds(**kwargs)
+
+class FetchJobRunner:
+    """Single-flight background runner for fetch_feeds() across every process.
+
+    Job state lives in the refresh_jobs table, so any web worker can answer
+    a status poll and the single-flight rule holds between workers and the
+    scheduler. At most one run is in flight: a request arriving while one
+    runs joins it instead of starting another. The only exception is a full
+    refresh asked for during a scheduled poll of due feeds. That queues a
+    single follow-up full run (slot "next") that any further full requests
+    also join, and whichever process finishes the current run starts it.
+    """
+
+    def __init__(self, fetch=None):
+        self._fetch = fetch or _fetch_feeds
+        self._lock = threading.Lock()
+
+    @property
+    def holder(self):
+        # Worked out each time: gunicorn forks workers after import
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def submit(self, due_only=False):
+        """Start (or join) a run; returns (job, started_new)"""
+        with self._lock:
+            for attempt in range(SUBMIT_ATTEMPTS):
+                try:
+                    return self._submit(due_only)
+                except IntegrityError:
+                    # Another process took the slot between our read and our write; look again
+                    if attempt == SUBMIT_ATTEMPTS - 1:
+                        raise
+
+    def _submit(self, due_only):
+        now = dt.datetime.utcnow()
+        db = SessionLocal()
+        try:
+            running = db.execute(select(RefreshJob).where(RefreshJob.slot == "running")).scalar()
+            if running is not None and running.heartbeat_at < now - dt.timedelta(seconds=JOB_STALE_SECONDS):
+                print(f"⚠️  Fetch job {running.id} stopped responding ({running.holder}) - starting over")
+                running.state, running.slot, running.finished_at = "failed", None, now
+                running.error = "its process stopped responding"
+                db.flush()
+                running = None
+
+            waiting = db.execute(select(RefreshJob).where(RefreshJob.slot == "next")).scalar()
+            if running is None:
+                if waiting is not None:
+                    # A follow-up whose process went away before it could start it
+                    job, started = waiting, False
+                    job.requests = RefreshJob.requests + 1
+                else:
+                    job, started = RefreshJob(
+                        id=uuid.uuid4().hex[:12], kind="due_feeds" if due_only else "all_feeds",
+                        state="queued", requests=1, created_at=now,
+                    ), True
+                    db.add(job)
+                job.slot, job.holder, job.heartbeat_at = "running", self.holder, now
+                db.commit()
+                self._start(job.id, job.kind == "due_feeds")
+                return FetchJob(job), started
+
+            if due_only or running.kind == "all_feeds":
+                job, started = running, False
+                job.requests = RefreshJob.requests + 1
+            elif waiting is None:
+                # A full refresh wanted while only due feeds are being polled
+                job, started = RefreshJob(
+                    id=uuid.uuid4().hex[:12], kind="all_feeds", state="queued",
+                    slot="next", requests=1, created_at=now,
+                ), True
+                db.add(job)
+            else:
+                job, started = waiting, False
+                job.requests = RefreshJob.requests + 1
+            db.commit()
+            return FetchJob(job), started
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get(self, job_id):
+        with ReadSession() as db:
+            row = db.get(RefreshJob, job_id)
+            return FetchJob(row) if row is not None else None
+
+    def _start(self, job_id, due_only):
+        threading.Thread(target=self._run, args=(job_id, due_only), name=f"fetch-job-{job_id}", daemon=True).start()
+
+    def _run(self, job_id, due_only):
+        progress = JobProgress(job_id)
+        progress.write(state="running", started_at=dt.datetime.utcnow())
+        progress.start()
+        try:
+            added = self._fetch(due_only=due_only, progress=progress.update)
+            result = {"state": "done", "stage": "finished", "articles_added": added}
+        except Exception as e:
+            result = {"state": "failed", "error": f"{type(e).__name__}: {e}"}
+            print(f"❌ Fetch job {job_id} failed: {e}")
+        finally:
+            result = dict(progress.stop(), **result)
+            # Pages rendered from the old data are stale now
+            forget_generation()
+        next_id = self._finish(job_id, result)
+        if next_id is not None:
+            self._start(next_id, False)
+
+    def _finish(self, job_id, result):
+        """Record the outcome, free the slot and claim the follow-up run, if any (its id)"""
+        now = dt.datetime.utcnow()
+        db = SessionLocal()
+        try:
+            finish = (
+                update(RefreshJob).where(RefreshJob.id == job_id)
+                .values(slot=None, finished_at=now, heartbeat_at=now, **result)
+            )
+            db.execute(finish)
+            db.execute(delete(RefreshJob).where(
+                RefreshJob.finished_at < now - dt.timedelta(hours=FINISHED_JOB_HOURS)
+            ))
+            waiting = db.execute(select(RefreshJob).where(RefreshJob.slot == "next")).scalar()
+            next_id = None
+            if waiting is not None:
+                waiting.slot, waiting.holder, waiting.heartbeat_at = "running", self.holder, now
+                next_id = waiting.id
+            try:
+                db.commit()
+            except IntegrityError:
+                # Someone else started a run meanwhile; they'll pick up the follow-up
+                db.rollback()
+                db.execute(finish)
+                db.commit()
+                next_id = None
+            return next_id
+        finally:
+            db.close()
+
+# Shared by the web routes and the scheduler in this process
+fetch_jobs = FetchJobRunner()
@@ -0,0 +1,281 @@
+import bisect
+import calendar
+import json
+import threading
+import time
+from flask import Response, g, request
+from sqlalchemy import select
+from models import ReadSession, FetchRun, FeedFetch
+
+# Latency buckets in seconds (feeds and slow pages live at the top end)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Published -> stored, from "minutes" (adaptive polling) to "days" (a feed that was down)
+ARTICLE_LATENCY_BUCKETS = (60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 3 * 86400, 7 * 86400)
+BYTES_BUCKETS = (1024, 8 * 1024, 32 * 1024, 128 * 1024, 512 * 1024, 2 * 1024 * 1024, 8 * 1024 * 1024)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Fetch runs read from the history tables per query when catching up
+HISTORY_BATCH_RUNS = 500
+
+_registry = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """In-process metric family; one lock-protected dict lookup per update"""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (+Inf last), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][slot] += 1
+            state[1] += value
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+# --- Ingest ---------------------------------------------------------------
+# Fetches run in the scheduler process (or whichever worker took a /refresh),
+# so these are never updated where they happen: every process serving
+# /metrics folds in the fetch_runs/feed_fetches rows it hasn't counted yet
+# at scrape time, and all of them report the same totals.
+
+FEED_FETCH_SECONDS = Histogram(
+    "acnews_feed_fetch_seconds", "Time to download one feed", ["feed"])
+FEED_PARSE_SECONDS = Histogram(
+    "acnews_feed_parse_seconds", "Time to parse and normalize one feed", ["feed"])
+FEED_BYTES = Histogram(
+    "acnews_feed_bytes", "Size of downloaded feed bodies", ["feed"], buckets=BYTES_BUCKETS)
+FEED_FETCHES = Counter(
+    "acnews_feed_fetches_total", "Feed fetches by outcome", ["feed", "outcome"])
+FEED_HTTP_RESPONSES = Counter(
+    "acnews_feed_http_responses_total", "Feed HTTP responses by status", ["feed", "status"])
+FEED_ENTRIES = Counter(
+    "acnews_feed_entries_total", "Feed entries by what happened to them", ["feed", "result"])
+FEED_DATES = Counter(
+    "acnews_feed_dates_total", "Entry dates by how they were parsed", ["feed", "method"])
+FETCH_RUN_SECONDS = Histogram(
+    "acnews_fetch_run_seconds", "Wall time of a whole fetch run")
+FETCH_INSERT_SECONDS = Histogram(
+    "acnews_fetch_insert_seconds", "Batched article insert and commit time per run")
+FETCH_RUNS = Counter(
+    "acnews_fetch_runs_total", "Fetch runs by result", ["result"])
+ARTICLE_LATENCY_SECONDS = Histogram(
+    "acnews_article_latency_seconds", "Delay between an article's publish time and it being stored",
+    buckets=ARTICLE_LATENCY_BUCKETS)
+LAST_FETCH_RUN = Gauge(
+    "acnews_last_fetch_run_timestamp_seconds", "Unix time the last fetch run finished")
+
+# --- Web --------------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "acnews_http_request_seconds", "Flask request latency", ["endpoint", "method", "status"])
+HTTP_DB_SECONDS = Histogram(
+    "acnews_http_db_seconds", "Database time spent inside one Flask request", ["endpoint"])
+DB_QUERY_SECONDS = Histogram(
+    "acnews_db_query_seconds", "Individual SQL statement time", ["engine"])
+
+def observe_fetch_run(run, feeds):
+    """Fold one stored run and its per-feed rows into the ingest metrics"""
+    for feed in feeds:
+        name = feed["feed_name"]
+        FEED_FETCHES.inc(feed=name, outcome=feed["outcome"])
+        if feed["http_status"] is not None:
+            FEED_HTTP_RESPONSES.inc(feed=name, status=feed["http_status"])
+        if feed["fetch_seconds"] is not None:
+            FEED_FETCH_SECONDS.observe(feed["fetch_seconds"], feed=name)
+        if feed["bytes"]:
+            FEED_BYTES.observe(feed["bytes"], feed=name)
+        if feed["parse_seconds"] is not None:
+            FEED_PARSE_SECONDS.observe(feed["parse_seconds"], feed=name)
+        for result in ("entries", "kept", "duplicates", "too_old", "added"):
+            if feed[result]:
+                FEED_ENTRIES.inc(feed[result], feed=name, result=result)
+        for method, count in json.loads(feed["dates"] or "{}").items():
+            FEED_DATES.inc(count, feed=name, method=method)
+        for seconds in json.loads(feed["latencies"] or "[]"):
+            ARTICLE_LATENCY_SECONDS.observe(seconds)
+
+    if run["duration_seconds"] is not None:
+        FETCH_RUN_SECONDS.observe(run["duration_seconds"])
+    if run["insert_seconds"] is not None:
+        FETCH_INSERT_SECONDS.observe(run["insert_seconds"])
+    FETCH_RUNS.inc(result="error" if run["error"] else "ok")
+    if run["finished_at"] is not None:
+        LAST_FETCH_RUN.set(calendar.timegm(run["finished_at"].timetuple()))
+
+class _FetchHistory:
+    """How far this process has read the run history into the ingest metrics"""
+
+    def __init__(self):
+        self.last_run_id = 0
+        self._lock = threading.Lock()
+
+    def catch_up(self, db):
+        """Observe every stored run newer than the last one observed, oldest first"""
+        with self._lock:
+            while True:
+                runs = db.execute(
+                    select(FetchRun.__table__).where(FetchRun.id > self.last_run_id)
+                    .order_by(FetchRun.id).limit(HISTORY_BATCH_RUNS)
+                ).mappings().all()
+                if not runs:
+                    return
+                feeds = {}
+                for feed in db.execute(
+                    select(FeedFetch.__table__)
+                    .where(FeedFetch.run_id.between(runs[0]["id"], runs[-1]["id"]))
+                ).mappings():
+                    feeds.setdefault(feed["run_id"], []).append(feed)
+                for run in runs:
+                    observe_fetch_run(run, feeds.get(run["id"], ()))
+                self.last_run_id = runs[-1]["id"]
+
+_fetch_history = _FetchHistory()
+
+def observe_fetch_history():
+    """Bring the ingest metrics up to date with the fetch_runs/feed_fetches tables"""
+    db = ReadSession()
+    try:
+        _fetch_history.catch_up(db)
+    except Exception as e:
+        print(f"⚠️  Couldn't read the fetch run history for /metrics: {e}")
+    finally:
+        db.close()
+
+def render_metrics():
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+_request_local = threading.local()
+
+# Engines already timed in this process (each app created by create_app() shares them)
+_timed_engines = set()
+
+def install_query_timing(engine, name):
+    """Time every statement on `engine`, and charge it to the current Flask request"""
+    from sqlalchemy import event
+
+    if id(engine) in _timed_engines:
+        return
+    _timed_engines.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+        DB_QUERY_SECONDS.observe(elapsed, engine=name)
+        if getattr(_request_local, "db_seconds", None) is not None:
+            _request_local.db_seconds += elapsed
+
+def install_request_metrics(app, engines=None):
+    """Request latency and per-request DB time for every route, plus GET /metrics.
+    
+    `engines` maps a label to an engine; an engine listed twice is timed once.
+    """
+    for name, engine in (engines or {}).items():
+        install_query_timing(engine, name)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        _request_local.db_seconds = 0.0
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            endpoint = request.endpoint or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                endpoint=endpoint, method=request.method, status=response.status_code,
+            )
+            HTTP_DB_SECONDS.observe(_request_local.db_seconds, endpoint=endpoint)
+        _request_local.db_seconds = None
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        """Prometheus scrape endpoint: ingest series from the run history, web series per process"""
+        observe_fetch_history()
+        return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,11 +1,61 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, UniqueConstraint
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import (
+    create_engine, event, inspect, text, true, select, bindparam, desc, delete, update, func, union_all, tuple_,
+    Column, Index, Integer, BigInteger, Boolean, Float, String, Text, Date, DateTime, LargeBinary,
+    ForeignKey, UniqueConstraint,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.orm import declarative_base, sessionmaker, aliased
+from search import ensure_search_index
 import os
+from collections import Counter
 from datetime import datetime
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///animal_crossing_news.db")
+
+# Production SQLite profile: WAL lets web reads proceed while ingest commits
+SQLITE_PRAGMAS = {
+    # Only takes effect on a brand-new file (before WAL writes the header); lets retention free pages
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_KB", str(64 * 1024))),  # negative = KiB
+    "temp_store": "MEMORY",
+}
+
+def _is_file_sqlite(url):
+    return url.startswith("sqlite") and ":memory:" not in url and url.rstrip("/") != "sqlite:"
+
+def _apply_sqlite_pragmas(engine, read_only=False):
+    """Run the profile pragmas on every new connection of `engine`"""
+    
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+# Writer engine: ingest, digests and maintenance commands
 engine = create_engine(DATABASE_URL, future=True)
+
+# Reader engine: web routes only ever read, so on SQLite they get their own
+# query_only connections that never wait behind an ingest transaction
+if _is_file_sqlite(DATABASE_URL):
+    _apply_sqlite_pragmas(engine)
+    read_engine = create_engine(DATABASE_URL, future=True)
+    _apply_sqlite_pragmas(read_engine, read_only=True)
+else:
+    read_engine = engine
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+ReadSession = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
 
 class Article(Base):
@@ -14,21 +64,501 @@ class Article(Base):
     id = Column(Integer, primary_key=True)
     source = Column(String(120), index=True)
     title = Column(Text, nullable=False)
-    link = Column(Text, nullable=False)
+    link = Column(Text, nullable=False)  # As the feed gave it; what readers click
+    canonical_link = Column(Text)  # dedup.canonicalize_url(link): the duplicate check, never shown
     summary = Column(Text)
     published = Column(DateTime, default=datetime.utcnow)
     category = Column(String(40), index=True)  # "ai_frontier" | "economics_politics"
     emoji = Column(String(10), default="📰")  # Fun emoji for each article
     villager_comment = Column(Text)  # Whimsical comment from an Animal Crossing villager
+    minhash = Column(LargeBinary)  # MinHash signature of the title + summary words (see dedup.py)
+    cluster_id = Column(BigInteger, index=True)  # Story cluster shared by near-duplicates
+    is_cluster_lead = Column(Boolean, nullable=False, default=True, server_default=true())
     
-    __table_args__ = (UniqueConstraint('link', name='uq_article_link'),)
+    __table_args__ = (
+        UniqueConstraint('link', name='uq_article_link'),
+        # Reissued copies of a story (tracking parameters, http vs https) share this
+        Index('uq_articles_canonical_link', canonical_link, unique=True),
+        # Serves "newest N in a category" as a bounded index range scan
+        Index('ix_articles_category_published', category, published.desc()),
+        # Keyset pages of /api/articles (the rowid/id tie-break rides along in the index)
+        Index('ix_articles_published', published),
+        Index('ix_articles_source_published', source, published),
+    )
     
     def __repr__(self):
         return f"<Article(title='{self.title[:50]}...', source='{self.source}')>"
 
+class FeedState(Base):
+    """Per-feed HTTP cache validators (so unchanged feeds can be skipped) and polling schedule"""
+    __tablename__ = "feed_states"
+    
+    id = Column(Integer, primary_key=True)
+    feed_url = Column(Text, nullable=False)
+    etag = Column(Text)
+    last_modified = Column(String(64))
+    content_hash = Column(String(64))  # sha256 of the last body we parsed
+    last_status = Column(Integer)
+    last_fetched = Column(DateTime)
+    # Adaptive polling (see polling.py)
+    next_fetch_at = Column(DateTime, index=True)
+    poll_interval = Column(Integer)  # Seconds, before jitter
+    publish_rate = Column(Float)  # Smoothed articles per hour
+    failures = Column(Integer, default=0)  # Failed polls in a row
+    unchanged_polls = Column(Integer, default=0)  # Polls in a row with nothing new
+    
+    __table_args__ = (UniqueConstraint('feed_url', name='uq_feed_state_url'),)
+    
+    def __repr__(self):
+        return f"<FeedState(feed_url='{self.feed_url}', last_status={self.last_status})>"
+
+class ArticleDailyCount(Base):
+    """Pre-aggregated article counts per day x source x category, maintained on insert"""
+    __tablename__ = "article_daily_counts"
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False, index=True)  # UTC date of `published`
+    source = Column(String(120), nullable=False)
+    category = Column(String(40), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (UniqueConstraint('day', 'source', 'category', name='uq_daily_count_key'),)
+    
+    def __repr__(self):
+        return f"<ArticleDailyCount(day={self.day}, source='{self.source}', count={self.count})>"
+
+class DataGeneration(Base):
+    """Single-row counter bumped whenever article data changes (keys the response cache)"""
+    __tablename__ = "data_generation"
+    
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    bumped_at = Column(DateTime)
+
+class FetchRun(Base):
+    """One fetch_feeds() run, kept for spotting slow or failing ingests"""
+    __tablename__ = "fetch_runs"
+    
+    id = Column(Integer, primary_key=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime)
+    duration_seconds = Column(Float)
+    feeds = Column(Integer, default=0)
+    feeds_failed = Column(Integer, default=0)
+    feeds_abandoned = Column(Integer, default=0)  # Unfinished when the run deadline passed
+    articles_added = Column(Integer, default=0)
+    insert_seconds = Column(Float)  # The run's single batched insert + commit
+    error = Column(Text)  # Set when the run itself blew up
+    
+    def __repr__(self):
+        return f"<FetchRun(started_at={self.started_at}, articles_added={self.articles_added})>"
+
+class FeedFetch(Base):
+    """What happened to one feed during a fetch run"""
+    __tablename__ = "feed_fetches"
+    
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey("fetch_runs.id"), nullable=False, index=True)
+    feed_name = Column(String(120))
+    feed_url = Column(Text, nullable=False)
+    category = Column(String(40))
+    http_status = Column(Integer)
+    fetch_seconds = Column(Float)
+    bytes = Column(Integer)
+    parse_seconds = Column(Float)
+    entries = Column(Integer, default=0)  # Entries read from the document
+    kept = Column(Integer, default=0)  # Fresh entries with a link
+    duplicates = Column(Integer, default=0)  # Kept entries whose link we already had
+    too_old = Column(Integer, default=0)
+    added = Column(Integer, default=0)
+    outcome = Column(String(20))  # "parsed" | "not_modified" | "unchanged" | "fetch_error" | "parse_error" | "abandoned"
+    error = Column(Text)
+    dates = Column(Text)  # JSON {method: count}: how entry dates were parsed (see dates.py)
+    latencies = Column(Text)  # JSON list: seconds from publish to stored, per added article
+    
+    def __repr__(self):
+        return f"<FeedFetch(feed_name='{self.feed_name}', outcome='{self.outcome}')>"
+
+class Recipient(Base):
+    """A digest subscriber and the categories they want"""
+    __tablename__ = "recipients"
+    
+    id = Column(Integer, primary_key=True)
+    email = Column(String(320), nullable=False)
+    categories = Column(Text)  # Comma-separated category keys; empty = every category
+    active = Column(Boolean, nullable=False, default=True, server_default=true())
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (UniqueConstraint('email', name='uq_recipient_email'),)
+    
+    def category_keys(self):
+        return [key.strip() for key in (self.categories or "").split(",") if key.strip()]
+    
+    def __repr__(self):
+        return f"<Recipient(email='{self.email}', categories='{self.categories}')>"
+
+class DigestRun(Base):
+    """One day's digest delivery; re-running send_digest() the same day resumes it"""
+    __tablename__ = "digest_runs"
+    
+    id = Column(Integer, primary_key=True)
+    digest_date = Column(Date, nullable=False, index=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+    recipients = Column(Integer, default=0)
+    sent = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    status = Column(String(20))  # "sending" | "done" | "partial"
+    error = Column(Text)
+    
+    def __repr__(self):
+        return f"<DigestRun(digest_date={self.digest_date}, status='{self.status}', sent={self.sent})>"
+
+class DigestDelivery(Base):
+    """What happened to one recipient's copy of a digest run"""
+    __tablename__ = "digest_deliveries"
+    
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey("digest_runs.id"), nullable=False)
+    recipient_id = Column(Integer, ForeignKey("recipients.id"), nullable=False)
+    email = Column(String(320), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # "pending" | "sent" | "failed" | "rejected"
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+    sent_at = Column(DateTime)
+    
+    __table_args__ = (
+        UniqueConstraint('run_id', 'recipient_id', name='uq_digest_delivery'),
+        Index('ix_digest_deliveries_run_status', run_id, status),
+    )
+    
+    def __repr__(self):
+        return f"<DigestDelivery(email='{self.email}', status='{self.status}')>"
+
+class RefreshJob(Base):
+    """One fetch run as seen by /refresh callers, shared by every process.
+
+    `slot` is the cross-process lock: at most one row is "running" and at
+    most one full refresh waits as "next" (finished rows have NULL, which
+    never conflicts).
+    """
+    __tablename__ = "refresh_jobs"
+
+    id = Column(String(12), primary_key=True)
+    kind = Column(String(20), nullable=False)  # "due_feeds" | "all_feeds"
+    state = Column(String(20), nullable=False, default="queued")  # queued | running | done | failed
+    slot = Column(String(10), unique=True)  # "running" | "next" | NULL once finished
+    stage = Column(String(30))
+    feeds_total = Column(Integer, default=0)
+    feeds_done = Column(Integer, default=0)
+    articles_added = Column(Integer, default=0)
+    error = Column(Text)
+    requests = Column(Integer, default=1)  # Callers coalesced onto this run
+    holder = Column(String(200))  # host:pid running it
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)  # Last write from the running process
+
+    __table_args__ = (
+        Index('ix_refresh_jobs_finished_at', finished_at),
+    )
+
+    def __repr__(self):
+        return f"<RefreshJob(id='{self.id}', kind='{self.kind}', state='{self.state}')>"
+
+class SchedulerLease(Base):
+    """Which process runs the scheduled jobs, and until when (renewed while it's alive)"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(200), nullable=False)  # host:pid:nonce of the leader
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<SchedulerLease(name='{self.name}', holder='{self.holder}', expires_at={self.expires_at})>"
+
+def read_generation(db):
+    """Current data generation (0 before the first ingest)"""
+    return db.execute(select(DataGeneration.value).where(DataGeneration.id == 1)).scalar() or 0
+
+def generation_bumped_at(db):
+    """When article data last changed (None before the first ingest)"""
+    return db.execute(select(DataGeneration.bumped_at).where(DataGeneration.id == 1)).scalar()
+
+def bump_generation(db):
+    """Advance the data generation inside the caller's transaction"""
+    result = db.execute(
+        update(DataGeneration)
+        .where(DataGeneration.id == 1)
+        .values(value=DataGeneration.value + 1, bumped_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        db.add(DataGeneration(id=1, value=1, bumped_at=datetime.utcnow()))
+        db.flush()
+
+def latest_by_category(db, categories, per_category, since=None):
+    """Newest cluster-lead articles for each category, in one query.
+    
+    Built as a UNION ALL of per-category `ORDER BY published DESC LIMIT n`
+    legs: each leg is a short walk of ix_articles_category_published, so the
+    cost depends on n and the number of categories, not on the table size.
+    Returns {category: [Article, ...]} in newest-first order.
+    """
+    grouped = {category: [] for category in categories}
+    legs = []
+    for category in categories:
+        leg = select(Article).where(Article.category == category, Article.is_cluster_lead)
+        if since is not None:
+            leg = leg.where(Article.published >= since)
+        legs.append(leg.order_by(desc(Article.published)).limit(per_category).subquery().select())
+    if not legs:
+        return grouped
+    
+    newest = aliased(Article, union_all(*legs).subquery())
+    for article in db.execute(select(newest)).scalars():
+        grouped[article.category].append(article)
+    for articles in grouped.values():
+        articles.sort(key=lambda article: article.published or datetime.min, reverse=True)
+    return grouped
+
+def lead_articles_after_id(db, after_id, limit):
+    """The newest `limit` cluster leads stored after article `after_id`, oldest first"""
+    query = (
+        select(Article)
+        .where(Article.id > after_id, Article.is_cluster_lead)
+        .order_by(desc(Article.id))
+        .limit(limit)
+    )
+    return list(reversed(db.execute(query).scalars().all()))
+
+# Columns /api/articles can return (pick a subset with `fields=`)
+ARTICLE_API_FIELDS = (
+    "id", "title", "link", "summary", "source", "category", "published",
+    "emoji", "villager_comment", "cluster_id",
+)
+
+def articles_page(db, fields, limit, after=None, category=None, source=None, since=None):
+    """Up to `limit` articles newest first by (published, id), as row mappings.
+    
+    `after` is the (published, id) of the last row already seen. The page
+    starts with an index seek to that key instead of skipping rows like
+    OFFSET does, so page 1000 costs the same as page 1. Rows are fetched in
+    small batches so callers can stream them.
+    """
+    columns = dict.fromkeys(list(fields) + ["published", "id"])
+    query = select(*[getattr(Article, name) for name in columns]).where(Article.published.isnot(None))
+    if category:
+        query = query.where(Article.category == category)
+    if source:
+        query = query.where(Article.source == source)
+    if since is not None:
+        query = query.where(Article.published >= since)
+    if after is not None:
+        query = query.where(tuple_(Article.published, Article.id) < tuple_(*after))
+    query = query.order_by(desc(Article.published), desc(Article.id)).limit(limit)
+    return db.execute(query, execution_options={"yield_per": 100}).mappings()
+
+# Rows per INSERT statement; keeps us well under SQLite's bound-parameter limit
+INSERT_BATCH_SIZE = 500
+
+def _dialect_insert(dialect_name):
+    """Return the dialect's insert() that supports ON CONFLICT DO NOTHING, if any"""
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
+
+def insert_articles(db, rows):
+    """Bulk insert article dicts, skipping links that already exist.
+    
+    Returns the rows that were actually inserted, each with its new `id`.
+    The caller owns the transaction (nothing is committed here).
+    """
+    if not rows:
+        return []
+    
+    table = Article.__table__
+    dialect = db.get_bind().dialect
+    insert = _dialect_insert(dialect.name)
+    inserted = []
+    
+    if insert is not None and dialect.insert_returning:
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            chunk = rows[start:start + INSERT_BATCH_SIZE]
+            stmt = (
+                insert(table)
+                .values(chunk)
+                # Either unique link (as given, or canonical) makes a row a duplicate
+                .on_conflict_do_nothing()
+                .returning(table.c.id, table.c.canonical_link)
+            )
+            new_ids = {link: article_id for article_id, link in db.execute(stmt)}
+            # The first row carrying a link wins, same as the database saw it
+            for row in chunk:
+                if row["canonical_link"] in new_ids:
+                    inserted.append(dict(row, id=new_ids.pop(row["canonical_link"])))
+        record_daily_counts(db, inserted)
+        return inserted
+    
+    # Generic fallback: one savepoint per row so a duplicate doesn't sink the batch
+    for row in rows:
+        try:
+            with db.begin_nested():
+                result = db.execute(table.insert().values(**row))
+            inserted.append(dict(row, id=result.inserted_primary_key[0]))
+        except IntegrityError:
+            continue
+    record_daily_counts(db, inserted)
+    return inserted
+
+def _count_key(row):
+    return (row["published"] or datetime.utcnow()).date(), row["source"] or "", row["category"] or ""
+
+def record_daily_counts(db, rows, sign=1):
+    """Fold inserted (or, with sign=-1, deleted) article rows into the daily rollups.
+    
+    Runs in the caller's transaction so counts and articles commit together.
+    """
+    counts = Counter(_count_key(row) for row in rows)
+    if not counts:
+        return
+    # Any change to the article set invalidates cached pages
+    bump_generation(db)
+    
+    table = ArticleDailyCount.__table__
+    insert = _dialect_insert(db.get_bind().dialect.name)
+    values = [
+        {"day": day, "source": source, "category": category, "count": sign * count}
+        for (day, source, category), count in counts.items()
+    ]
+    
+    if insert is not None:
+        stmt = insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.source, table.c.category],
+            set_={"count": table.c.count + stmt.excluded["count"]},
+        )
+        db.execute(stmt)
+        return
+    
+    for value in values:
+        existing = db.execute(
+            select(ArticleDailyCount).where(
+                ArticleDailyCount.day == value["day"],
+                ArticleDailyCount.source == value["source"],
+                ArticleDailyCount.category == value["category"],
+            )
+        ).scalar_one_or_none()
+        if existing is None:
+            db.add(ArticleDailyCount(**value))
+        else:
+            existing.count += value["count"]
+    db.flush()
+
+def rebuild_daily_counts(db):
+    """Recompute every rollup from the articles table (e.g. after manual DB edits)"""
+    bump_generation(db)
+    table = ArticleDailyCount.__table__
+    day = func.date(Article.published)
+    db.execute(delete(table))
+    db.execute(
+        table.insert().from_select(
+            ["day", "source", "category", "count"],
+            select(
+                day,
+                func.coalesce(Article.source, ""),
+                func.coalesce(Article.category, ""),
+                func.count(Article.id),
+            )
+            .where(Article.published.isnot(None))
+            .group_by(day, func.coalesce(Article.source, ""), func.coalesce(Article.category, "")),
+        )
+    )
+
+def save_fetch_run(db, run, feeds):
+    """Write a run row and its per-feed rows (plain dicts); the caller commits"""
+    fetch_run = FetchRun(**run)
+    db.add(fetch_run)
+    db.flush()
+    if feeds:
+        db.execute(FeedFetch.__table__.insert(), [dict(feed, run_id=fetch_run.id) for feed in feeds])
+    return fetch_run
+
+def _add_missing_columns():
+    """create_all() never alters existing tables, so add new columns/indexes by hand"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def backfill_canonical_links():
+    """Fill canonical_link for rows stored before it existed (their link is the feed's, as given).
+
+    Works through the rows in id order, a batch at a time. When several old
+    links share a canonical form, the oldest row gets it and the rest - later
+    copies of a story we already have - keep NULL, which the duplicate check
+    ignores. Returns the number of rows keyed.
+    """
+    # dedup imports this module, so it's only imported once both are loaded
+    from dedup import canonicalize_url
+    keyed = 0
+    after_id = 0
+    while True:
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(Article.id, Article.link)
+                .where(Article.canonical_link.is_(None), Article.id > after_id)
+                .order_by(Article.id)
+                .limit(INSERT_BATCH_SIZE)
+            ).all()
+            if not rows:
+                return keyed
+            after_id = rows[-1].id
+            wanted = {}
+            for article_id, link in rows:
+                wanted.setdefault(canonicalize_url(link), article_id)
+            taken = set(db.execute(
+                select(Article.canonical_link).where(Article.canonical_link.in_(list(wanted)))
+            ).scalars())
+            updates = [
+                {"row_id": article_id, "key": key}
+                for key, article_id in wanted.items() if key not in taken
+            ]
+            if updates:
+                db.execute(
+                    update(Article.__table__)
+                    .where(Article.__table__.c.id == bindparam("row_id"))
+                    .values(canonical_link=bindparam("key")),
+                    updates,
+                )
+            db.commit()
+            keyed += len(updates)
+
 def init_db():
     """Initialize the database by creating all tables"""
+    new_rollups = not inspect(engine).has_table(ArticleDailyCount.__tablename__)
     Base.metadata.create_all(engine)
+    _add_missing_columns()
+    backfill_canonical_links()
+    ensure_search_index(engine)
+    if new_rollups:
+        # Upgrading an existing database: seed the rollups from its articles
+        with SessionLocal() as db:
+            rebuild_daily_counts(db)
+            db.commit()
     print("🏠 Database initialized! Tom Nook would be proud! 🦝")
 
 def get_db():
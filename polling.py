@@ -0,0 +1,101 @@
+import datetime as dt
+import random
+
+# Defaults for adaptive polling (overridable under `polling:` in config.yaml)
+DEFAULT_POLLING_SETTINGS = {
+    "tick_seconds": 60,              # How often the scheduler looks for due feeds
+    "min_interval_minutes": 5,       # Never poll one feed more often than this
+    "max_interval_minutes": 360,     # ... or less often than this
+    "default_interval_minutes": 30,  # Until a feed's publish rate is known
+    "target_new_per_poll": 1,        # Aim for about this many new articles per visit
+    "backoff_factor": 2,             # Interval multiplier per failed/unchanged poll in a row
+    "max_backoff_steps": 6,
+    "jitter": 0.15,                  # +/- fraction so feeds don't fall into lockstep
+    "max_feeds_per_tick": 10,        # Upper bound on feeds fetched per tick
+}
+
+# Weight of the newest observation in the smoothed publish rate
+RATE_SMOOTHING = 0.5
+
+# Shortest window used when turning item timestamps into a rate
+MIN_RATE_WINDOW_HOURS = 0.25
+
+# Outcomes that count as "nothing new here"
+UNCHANGED_OUTCOMES = {"not_modified", "unchanged"}
+FAILED_OUTCOMES = {"fetch_error", "parse_error", "abandoned"}
+
+def get_polling_settings(cfg):
+    """Merge the `polling:` config section over the defaults"""
+    settings = dict(DEFAULT_POLLING_SETTINGS)
+    settings.update(cfg.get("polling") or {})
+    return settings
+
+def observed_publish_rate(published_times, now):
+    """Articles per hour implied by a feed's current items.
+
+    Counts the items over the window from the oldest one to now (not to the
+    newest), so a feed that has gone quiet reads as slow even if its last
+    few items came in a burst.
+    """
+    times = [published for published in published_times if published is not None]
+    if not times:
+        return None
+    hours = max((now - min(times)).total_seconds() / 3600, MIN_RATE_WINDOW_HOURS)
+    return len(times) / hours
+
+def smooth_rate(previous, observed):
+    if observed is None:
+        return previous
+    if previous is None:
+        return observed
+    return RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * previous
+
+def _clamp_minutes(minutes, settings):
+    return min(max(minutes, settings["min_interval_minutes"]), settings["max_interval_minutes"])
+
+def rate_interval_minutes(publish_rate, settings):
+    """Poll interval that should find about `target_new_per_poll` new articles"""
+    if publish_rate is None:
+        return _clamp_minutes(settings["default_interval_minutes"], settings)
+    if publish_rate <= 0:
+        return settings["max_interval_minutes"]
+    return _clamp_minutes(60 * settings["target_new_per_poll"] / publish_rate, settings)
+
+def schedule_feed(state, outcome, new_articles, published_times, settings, now=None):
+    """Update a FeedState's publish rate, backoff counters and next_fetch_at after a poll"""
+    now = now or dt.datetime.utcnow()
+    if outcome in FAILED_OUTCOMES:
+        state.failures = (state.failures or 0) + 1
+        steps = min(state.failures, settings["max_backoff_steps"])
+        minutes = rate_interval_minutes(state.publish_rate, settings) * settings["backoff_factor"] ** steps
+    else:
+        state.failures = 0
+        if outcome not in UNCHANGED_OUTCOMES:
+            state.publish_rate = smooth_rate(state.publish_rate, observed_publish_rate(published_times, now))
+        if outcome in UNCHANGED_OUTCOMES or not new_articles:
+            state.unchanged_polls = (state.unchanged_polls or 0) + 1
+        else:
+            state.unchanged_polls = 0
+        steps = min(state.unchanged_polls, settings["max_backoff_steps"])
+        minutes = rate_interval_minutes(state.publish_rate, settings) * settings["backoff_factor"] ** steps
+
+    minutes = _clamp_minutes(minutes, settings)
+    # The planned interval before jitter, for the run history and debugging
+    state.poll_interval = int(minutes * 60)
+    jitter = settings["jitter"]
+    minutes *= random.uniform(1 - jitter, 1 + jitter)
+    state.next_fetch_at = now + dt.timedelta(minutes=minutes)
+
+def due_feed_urls(feed_urls, states, limit=None, now=None):
+    """Feeds whose next poll is due, never-polled first, then most overdue first"""
+    now = now or dt.datetime.utcnow()
+    due = []
+    for url in dict.fromkeys(feed_urls):
+        state = states.get(url)
+        next_fetch_at = state.next_fetch_at if state is not None else None
+        if next_fetch_at is None or next_fetch_at <= now:
+            due.append((next_fetch_at or dt.datetime.min, url))
+    due.sort()
+    if limit:
+        due = due[:limit]
+    return [url for _, url in due]
@@ -0,0 +1,223 @@
+import datetime as dt
+import gzip
+import io
+import json
+import os
+import time
+from sqlalchemy import select, delete, func
+from models import SessionLocal, engine, Article, ArticleDailyCount, record_daily_counts
+from search import rebuild_search_index, search_backend
+
+try:
+    import zstandard
+except ImportError:  # Optional: pip install zstandard for smaller, faster archives (gzip otherwise)
+    zstandard = None
+
+# Defaults for article retention (overridable under `retention:` in config.yaml)
+DEFAULT_RETENTION_SETTINGS = {
+    "days": 90,                     # Keep articles this long unless their category says otherwise
+    "categories": {},               # Per-category overrides, e.g. {ai_frontier: 180}
+    "archive_dir": "data/archive",  # <category>/<YYYY-MM>.ndjson.zst (or .gz) files
+    "batch_size": 1000,             # Rows archived and deleted per short write transaction
+    "pause_seconds": 0.05,          # Gap between batches so ingest and the web get the database
+    "vacuum_pages": 0,              # Free pages handed back to the OS per run (0 = all of them)
+}
+
+# Ingest already drops anything older than a week; keeping less would make feeds re-add it
+MIN_RETENTION_DAYS = 8
+
+# Article columns written to the archive
+ARCHIVE_FIELDS = (
+    "id", "source", "title", "link", "summary", "published", "category", "emoji",
+    "villager_comment", "cluster_id", "is_cluster_lead",
+)
+
+ARCHIVE_EXTENSIONS = (".ndjson.zst", ".ndjson.gz")
+
+# Full-text index pages merged after a retention run (keeps the write lock short)
+FTS_MERGE_PAGES = 500
+
+def get_retention_settings(cfg):
+    """Merge the `retention:` config section over the defaults"""
+    settings = dict(DEFAULT_RETENTION_SETTINGS)
+    settings.update(cfg.get("retention") or {})
+    return settings
+
+def retention_days(settings, category):
+    days = (settings["categories"] or {}).get(category, settings["days"])
+    return max(int(days), MIN_RETENTION_DAYS)
+
+# --- Archive files ----------------------------------------------------------
+
+def _compress(payload):
+    if zstandard is not None:
+        return ".ndjson.zst", zstandard.ZstdCompressor(level=10).compress(payload)
+    return ".ndjson.gz", gzip.compress(payload, compresslevel=9)
+
+def write_archive(archive_dir, rows):
+    """Append rows to their <category>/<YYYY-MM> archive file, durably.
+
+    Every call appends one self-contained zstd frame (or gzip member), so
+    files grow without being rewritten and readers see all batches.
+    """
+    by_file = {}
+    for row in rows:
+        key = (row["category"] or "uncategorized", row["published"].strftime("%Y-%m"))
+        by_file.setdefault(key, []).append(row)
+
+    for (category, month), file_rows in by_file.items():
+        lines = []
+        for row in file_rows:
+            record = {name: row[name] for name in ARCHIVE_FIELDS}
+            record["published"] = row["published"].isoformat()
+            lines.append(json.dumps(record, ensure_ascii=False))
+        extension, data = _compress(("\n".join(lines) + "\n").encode("utf-8"))
+        folder = os.path.join(archive_dir, category)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, month + extension), "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+def _month_files(archive_dir, category=None, since=None, until=None):
+    """{(category, month): [paths]} for archive files that can hold rows in [since, until)"""
+    files = {}
+    if not os.path.isdir(archive_dir):
+        return files
+    first = since.strftime("%Y-%m") if since else None
+    last = until.strftime("%Y-%m") if until else None
+    for folder in sorted(os.listdir(archive_dir)):
+        if category and folder != category:
+            continue
+        for name in sorted(os.listdir(os.path.join(archive_dir, folder))):
+            extension = next((ext for ext in ARCHIVE_EXTENSIONS if name.endswith(ext)), None)
+            if extension is None:
+                continue
+            month = name[:-len(extension)]
+            if (first and month < first) or (last and month > last):
+                continue
+            files.setdefault((folder, month), []).append(os.path.join(archive_dir, folder, name))
+    return files
+
+def _read_lines(path):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed - pip install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        with io.TextIOWrapper(raw, encoding="utf-8") as lines:
+            yield from lines
+    else:
+        with gzip.open(path, "rt", encoding="utf-8") as lines:
+            yield from lines
+
+def iter_archived_articles(archive_dir, category=None, since=None, until=None):
+    """Archived articles as dicts, month by month, streamed from disk.
+
+    Only the month files that can overlap [since, until) are opened, and
+    rows are decompressed as they're consumed. A crash between archiving a
+    batch and deleting it can archive a row twice; it's yielded once.
+    """
+    for (_, month), paths in sorted(_month_files(archive_dir, category, since, until).items(),
+                                     key=lambda item: (item[0][1], item[0][0])):
+        seen = set()
+        for path in paths:
+            for line in _read_lines(path):
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if row["id"] in seen:
+                    continue
+                seen.add(row["id"])
+                row["published"] = dt.datetime.fromisoformat(row["published"])
+                if (since and row["published"] < since) or (until and row["published"] >= until):
+                    continue
+                yield row
+
+# --- Retention job ------------------------------------------------------------
+
+def archive_expired(settings, dry_run=False, now=None):
+    """Archive then delete articles past their category's retention, in small batches.
+
+    Each batch is read, written to the archive and fsynced, then deleted
+    (with its daily counts) in its own short transaction, so the write lock
+    is held for milliseconds at a time. Returns {category: rows archived}.
+    """
+    now = now or dt.datetime.utcnow()
+    with SessionLocal() as db:
+        categories = db.execute(select(ArticleDailyCount.category).distinct()).scalars().all()
+
+    archived = {}
+    columns = [getattr(Article, name) for name in ARCHIVE_FIELDS]
+    for category in categories:
+        cutoff = now - dt.timedelta(days=retention_days(settings, category))
+        expired = select(*columns).where(Article.category == category, Article.published < cutoff)
+        archived[category] = 0
+        while True:
+            db = SessionLocal()
+            try:
+                if dry_run:
+                    archived[category] = db.execute(
+                        select(func.count()).where(Article.category == category, Article.published < cutoff)
+                    ).scalar()
+                    break
+                rows = db.execute(expired.order_by(Article.published).limit(settings["batch_size"])).mappings().all()
+                # End the read before the slow part so the delete starts a fresh transaction
+                db.rollback()
+                if not rows:
+                    break
+                write_archive(settings["archive_dir"], rows)
+                db.execute(delete(Article).where(Article.id.in_([row["id"] for row in rows])))
+                record_daily_counts(db, rows, sign=-1)
+                db.commit()
+            finally:
+                db.close()
+            archived[category] += len(rows)
+            time.sleep(settings["pause_seconds"])
+    return archived
+
+def compact_database(settings):
+    """Hand freed pages back to the OS and refresh planner statistics"""
+    if engine.dialect.name == "sqlite":
+        raw = engine.raw_connection()
+        try:
+            # executescript() steps each statement to the end; a plain execute()
+            # would run incremental_vacuum for a single page
+            sqlite = raw.driver_connection
+            if sqlite.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                pages = int(settings["vacuum_pages"] or 0)
+                sqlite.executescript(f"PRAGMA incremental_vacuum({pages});" if pages else "PRAGMA incremental_vacuum;")
+            else:
+                print("💡 This database predates incremental vacuum - run "
+                      "`flask --app app retention --enable-incremental-vacuum` once (it rewrites the file)")
+            script = "ANALYZE articles; ANALYZE article_daily_counts;"
+            if search_backend("sqlite") == "fts5":
+                # A bounded amount of segment merging folds in the delete markers
+                script += f" INSERT INTO articles_fts(articles_fts, rank) VALUES ('merge', {FTS_MERGE_PAGES});"
+            sqlite.executescript(script)
+        finally:
+            raw.close()
+    elif engine.dialect.name == "postgresql":
+        rebuild_search_index(engine, optimize_only=True)  # VACUUM ANALYZE articles
+
+def enable_incremental_vacuum():
+    """Switch an existing SQLite database to auto_vacuum=INCREMENTAL (a one-off full VACUUM)"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+
+def run_retention(settings=None, dry_run=False):
+    """The scheduled retention job: archive and delete expired articles, then compact"""
+    if settings is None:
+        from config import get_config
+        settings = get_retention_settings(get_config())
+    started = time.perf_counter()
+    archived = archive_expired(settings, dry_run=dry_run)
+    total = sum(archived.values())
+    if dry_run:
+        print(f"🗓️  {total} articles are past retention: {archived}")
+        return archived
+    if total:
+        compact_database(settings)
+    print(f"📦 Archived {total} old articles to {settings['archive_dir']} "
+          f"in {time.perf_counter() - started:.1f}s - the museum thanks you! 🦉")
+    return archived
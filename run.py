@@ -78,7 +78,7 @@ def initial_feed_fetch():
             print("🌟 Your news hub is now ready with fresh content!")
         else:
             print("📰 No new articles found, but that's okay!")
-            print("🔄 Articles will be fetched automatically twice daily!")
+            print("🔄 Feeds are checked automatically - busy ones every few minutes!")
         return True
     except Exception as e:
         print(f"⚠️  Initial fetch had some issues: {e}")
@@ -91,21 +91,22 @@ def start_application():
     print("\n🚀 Starting your Animal Crossing News Hub!")
     print("🌐 Your site will be available at: http://localhost:8000")
     print("📧 Daily emails are scheduled for 7 AM (if configured)")
-    print("🔄 News updates happen automatically at 6 AM and 6 PM")
+    print("🔄 Each feed is polled on its own schedule, from every few minutes to a few hours")
     print("\n🏠 Have fun staying informed with your cozy news corner! 🌟")
     print("\n" + "="*60)
     
-    # Import and run the app
-    from app import app, setup_scheduler
-    
-    # Setup scheduler
-    setup_scheduler()
+    # Import and run the app (this single process also runs the scheduled tasks)
+    from app import app, start_scheduler
+    debug = os.getenv("FLASK_DEBUG", "0") == "1"
+    # The debug reloader runs this file twice; only its serving child schedules
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_scheduler(app, os.getenv("SCHEDULER", "on"))
     
     # Run the app
     app.run(
         host="0.0.0.0",
         port=8000,
-        debug=os.getenv("FLASK_DEBUG", "0") == "1"
+        debug=debug
     )
 
 def main():
@@ -0,0 +1,199 @@
+import atexit
+import datetime as dt
+import os
+import socket
+import threading
+import uuid
+from sqlalchemy import update, case, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from models import SessionLocal, SchedulerLease
+from config import get_config
+from polling import get_polling_settings
+
+# A leader that stops renewing loses the lease after this long
+LEASE_SECONDS = 60
+
+SCHEDULER_MODES = ("off", "on", "auto")
+
+class LeaderLease:
+    """A named lease row in the database; whoever holds it unexpired is the leader.
+
+    Works across processes and hosts on SQLite and PostgreSQL alike: taking
+    or renewing the lease is a single conditional UPDATE (or the first
+    INSERT), so two contenders can never both win.
+    """
+
+    def __init__(self, name="scheduler", ttl=LEASE_SECONDS):
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.valid_until = None
+
+    @property
+    def held(self):
+        return self.valid_until is not None and dt.datetime.utcnow() < self.valid_until
+
+    def acquire(self):
+        """Take the lease if it's free or expired, or renew it if it's ours"""
+        now = dt.datetime.utcnow()
+        expires_at = now + dt.timedelta(seconds=self.ttl)
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now),
+                )
+                .values(
+                    holder=self.holder,
+                    expires_at=expires_at,
+                    acquired_at=case((SchedulerLease.holder == self.holder, SchedulerLease.acquired_at), else_=now),
+                )
+            )
+            if result.rowcount == 0:
+                db.add(SchedulerLease(name=self.name, holder=self.holder, acquired_at=now, expires_at=expires_at))
+                db.flush()
+            db.commit()
+            self.valid_until = expires_at
+        except IntegrityError:
+            # Someone else holds it
+            db.rollback()
+            self.valid_until = None
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"⚠️  Couldn't reach the database to renew the scheduler lease: {e}")
+            self.valid_until = None
+        finally:
+            db.close()
+        return self.held
+
+    def release(self):
+        """Expire our lease now so another process can take over without waiting"""
+        if self.valid_until is None:
+            return
+        self.valid_until = None
+        with SessionLocal() as db:
+            db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                .values(expires_at=dt.datetime.utcnow())
+            )
+            db.commit()
+
+# --- Scheduled jobs (imported lazily so web workers never load them) --------
+
+def poll_due_feeds():
+    from jobs import fetch_jobs
+    fetch_jobs.submit(due_only=True)
+
+def run_retention_job():
+    from retention import run_retention
+    run_retention()
+
+def send_daily_digest():
+    from emailer import send_digest
+    send_digest()
+
+def setup_scheduler(is_leader=None):
+    """Create and start the APScheduler with every scheduled task.
+
+    `is_leader` is checked right before each job runs, so a process that
+    has just lost the lease never starts one.
+    """
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    def leader_only(func):
+        def run():
+            if is_leader is None or is_leader():
+                func()
+        run.__name__ = func.__name__
+        return run
+
+    scheduler = BackgroundScheduler(daemon=True)
+    polling = get_polling_settings(get_config())
+
+    # Adaptive polling: every tick, fetch the feeds whose own interval has elapsed
+    # (joins the in-flight run instead if a refresh is already going)
+    scheduler.add_job(
+        func=leader_only(poll_due_feeds),
+        trigger="interval",
+        seconds=polling["tick_seconds"],
+        id="poll_feeds",
+        max_instances=1,
+        coalesce=True
+    )
+
+    # Archive and prune old articles while the island sleeps
+    scheduler.add_job(
+        func=leader_only(run_retention_job),
+        trigger="cron",
+        hour=3,
+        minute=30,
+        id="retention"
+    )
+
+    # Daily email digest at 7 AM
+    scheduler.add_job(
+        func=leader_only(send_daily_digest),
+        trigger="cron",
+        hour=7,
+        minute=0,
+        id="daily_digest"
+    )
+
+    scheduler.start()
+    print("📅 Scheduled daily tasks activated! Like Isabelle's morning announcements! 📢")
+    return scheduler
+
+class SchedulerRole:
+    """Decides whether this process runs the scheduled jobs.
+
+    "on" always runs them (one dedicated process), "off" never does (plain
+    web workers), and "auto" lets every process contend for the database
+    lease: the holder runs the scheduler and renews the lease every third of
+    its lifetime, the others retry just as often and take over within about
+    LEASE_SECONDS if the leader dies.
+    """
+
+    def __init__(self, mode="auto", lease=None):
+        if mode not in SCHEDULER_MODES:
+            raise ValueError(f"scheduler mode must be one of {', '.join(SCHEDULER_MODES)}, not {mode!r}")
+        self.mode = mode
+        self.lease = lease or LeaderLease()
+        self.scheduler = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def is_leader(self):
+        return self.mode == "on" or (self.mode == "auto" and self.lease.held)
+
+    def start(self):
+        if self.mode == "on":
+            self.scheduler = setup_scheduler()
+        elif self.mode == "auto":
+            self._thread = threading.Thread(target=self._contend, name="scheduler-lease", daemon=True)
+            self._thread.start()
+        if self.mode != "off":
+            atexit.register(self.stop)
+        return self
+
+    def _contend(self):
+        while not self._stop.is_set():
+            if self.lease.acquire():
+                if self.scheduler is None:
+                    print(f"👑 This process ({self.lease.holder}) now runs the scheduled tasks")
+                    self.scheduler = setup_scheduler(is_leader=self.is_leader)
+            elif self.scheduler is not None:
+                print("🔁 Lost the scheduler lease - another process runs the scheduled tasks now")
+                self.scheduler.shutdown(wait=False)
+                self.scheduler = None
+            self._stop.wait(self.lease.ttl / 3)
+
+    def stop(self):
+        self._stop.set()
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+        if self.mode == "auto":
+            self.lease.release()
@@ -0,0 +1,241 @@
+import html
+import re
+import sqlite3
+from functools import lru_cache
+from sqlalchemy import text, DateTime
+
+# Relative weight of a title hit over a summary hit when ranking
+TITLE_WEIGHT = 3.0
+
+# Default and largest page size for search results
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# bm25 has to score every match before sorting, so a very common word would
+# cost hundreds of ms at a million rows. Queries therefore rank only the newest
+# this-many matches that pass their filters (FTS5 walks rowids newest-first for free).
+MAX_RANKED_MATCHES = 5000
+
+# Words of context around a hit in the summary snippet
+SNIPPET_WORDS = 24
+
+# Snippet markers that can't occur in stored text; swapped for <mark> after escaping
+_HIT_START = "\x02"
+_HIT_END = "\x03"
+
+_WORD_RE = re.compile(r"\w+\*?", re.UNICODE)
+
+# --- SQLite: FTS5 external-content table kept in sync by triggers ----------
+
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+        title, summary, content='articles', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, summary)
+        VALUES ('delete', old.id, old.title, old.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, summary ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, summary)
+        VALUES ('delete', old.id, old.title, old.summary);
+        INSERT INTO articles_fts(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END
+    """,
+]
+
+# --- PostgreSQL: generated tsvector column with a GIN index ----------------
+
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_articles_search ON articles USING GIN (search_vector)",
+]
+
+@lru_cache(maxsize=1)
+def sqlite_has_fts5():
+    """Whether the linked SQLite library was built with FTS5"""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(body)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+def search_backend(dialect_name):
+    """"fts5", "tsvector" or "like" (unindexed fallback) for a database dialect"""
+    if dialect_name == "sqlite":
+        return "fts5" if sqlite_has_fts5() else "like"
+    if dialect_name == "postgresql":
+        return "tsvector"
+    return "like"
+
+def ensure_search_index(engine):
+    """Create the full-text index if it's missing, filling it from existing articles"""
+    backend = search_backend(engine.dialect.name)
+    with engine.begin() as conn:
+        if backend == "fts5":
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+            )).first()
+            for statement in SQLITE_FTS_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')"))
+        elif backend == "tsvector":
+            for statement in POSTGRES_SEARCH_DDL:
+                conn.execute(text(statement))
+        else:
+            print("⚠️  Full-text search index unavailable here - search will scan the articles table")
+    return backend
+
+def rebuild_search_index(engine, optimize_only=False):
+    """Rebuild the index from the articles table (unless optimize_only), then compact it"""
+    backend = search_backend(engine.dialect.name)
+    if backend == "fts5":
+        with engine.begin() as conn:
+            if not optimize_only:
+                conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')"))
+            conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('optimize')"))
+    elif backend == "tsvector":
+        # REINDEX/VACUUM can't run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if not optimize_only:
+                conn.execute(text("REINDEX INDEX ix_articles_search"))
+            conn.execute(text("VACUUM ANALYZE articles"))
+    return backend
+
+def fts_query(user_query):
+    """Turn free text into a safe FTS5 query: every word must match, `word*` is a prefix"""
+    terms = []
+    for word in _WORD_RE.findall(user_query or ""):
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+def highlight(value):
+    """HTML-escape a snippet and turn the hit markers into <mark> tags"""
+    escaped = html.escape(value or "")
+    return escaped.replace(_HIT_START, "<mark>").replace(_HIT_END, "</mark>")
+
+def _filters(category, source, since, until):
+    clauses, params = [], {}
+    if category:
+        clauses.append("a.category = :category")
+        params["category"] = category
+    if source:
+        clauses.append("a.source = :source")
+        params["source"] = source
+    if since:
+        clauses.append("a.published >= :since")
+        params["since"] = since
+    if until:
+        clauses.append("a.published < :until")
+        params["until"] = until
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+def search_articles(db, query, category=None, source=None, since=None, until=None,
+                    limit=SEARCH_PAGE_SIZE, offset=0):
+    """Ranked matches for `query` as dicts with highlighted title and summary snippet.
+
+    `since`/`until` are naive UTC datetimes bounding `published`.
+    """
+    limit = max(1, min(int(limit), MAX_SEARCH_PAGE_SIZE))
+    offset = max(0, int(offset))
+    where, params = _filters(category, source, since, until)
+    params.update(limit=limit, offset=offset)
+    backend = search_backend(db.get_bind().dialect.name)
+
+    if backend == "fts5":
+        match = fts_query(query)
+        if not match:
+            return []
+        params.update(match=match, start=_HIT_START, end=_HIT_END)
+        # The cap counts matches that pass the filters, so a small category or
+        # source still gets its newest matches ranked rather than nothing
+        params["ranked"] = MAX_RANKED_MATCHES - 1
+        filtered = " JOIN articles a ON a.id = articles_fts.rowid" if where else ""
+        where += f""" AND articles_fts.rowid >= coalesce((
+            SELECT articles_fts.rowid FROM articles_fts{filtered}
+            WHERE articles_fts MATCH :match{where}
+            ORDER BY articles_fts.rowid DESC LIMIT 1 OFFSET :ranked
+        ), 0)"""
+        sql = f"""
+            SELECT a.id, a.title, a.link, a.source, a.category, a.published, a.emoji,
+                   highlight(articles_fts, 0, :start, :end) AS title_html,
+                   snippet(articles_fts, 1, :start, :end, '…', {SNIPPET_WORDS}) AS snippet_html,
+                   bm25(articles_fts, {TITLE_WEIGHT}, 1.0) AS score
+            FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH :match{where}
+            ORDER BY score
+            LIMIT :limit OFFSET :offset
+        """
+    elif backend == "tsvector":
+        if not (query or "").strip():
+            return []
+        params.update(
+            query=query,
+            title_options=f"StartSel={_HIT_START}, StopSel={_HIT_END}, HighlightAll=true",
+            options=(
+                f"StartSel={_HIT_START}, StopSel={_HIT_END}, MaxWords={SNIPPET_WORDS}, MinWords=8, "
+                "MaxFragments=1, FragmentDelimiter=…"
+            ),
+        )
+        # Rank and page first, so ts_headline only runs on the rows returned
+        sql = f"""
+            SELECT hit.id, hit.title, hit.link, hit.source, hit.category, hit.published, hit.emoji,
+                   ts_headline('english', hit.title, hit.q, :title_options) AS title_html,
+                   ts_headline('english', coalesce(hit.summary, ''), hit.q, :options) AS snippet_html,
+                   hit.score
+            FROM (
+                SELECT a.*, q, ts_rank_cd(a.search_vector, q) AS score
+                FROM articles a, websearch_to_tsquery('english', :query) q
+                WHERE a.search_vector @@ q{where}
+                ORDER BY score DESC
+                LIMIT :limit OFFSET :offset
+            ) hit
+            ORDER BY hit.score DESC
+        """
+    else:
+        words = [word.rstrip("*") for word in _WORD_RE.findall(query or "")]
+        if not words:
+            return []
+        conditions = []
+        for i, word in enumerate(words):
+            params[f"word{i}"] = f"%{word}%"
+            conditions.append(f"(a.title LIKE :word{i} OR a.summary LIKE :word{i})")
+        sql = f"""
+            SELECT a.id, a.title, a.link, a.source, a.category, a.published, a.emoji,
+                   a.title AS title_html, a.summary AS snippet_html, 0 AS score
+            FROM articles a
+            WHERE {" AND ".join(conditions)}{where}
+            ORDER BY a.published DESC
+            LIMIT :limit OFFSET :offset
+        """
+
+    results = []
+    # Raw SQL: tell SQLAlchemy `published` is a datetime (SQLite stores it as text)
+    for row in db.execute(text(sql).columns(published=DateTime), params).mappings():
+        result = dict(row)
+        result["title_html"] = highlight(result["title_html"])
+        result["snippet_html"] = highlight(result["snippet_html"])
+        results.append(result)
+    return results
@@ -0,0 +1,149 @@
+import queue
+import random
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+
+class RateLimiter:
+    """Token bucket shared by every sender thread (messages per second)"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate) if rate else 0.0
+        self.capacity = burst or max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def smtp_error_code(error):
+    """The SMTP reply code behind an exception, if the server sent one"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return min(codes) if codes else None
+    return getattr(error, "smtp_code", None)
+
+def is_transient(error):
+    """Worth retrying: dropped connections, timeouts, 4xx replies and login hiccups"""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        # A credentials problem, not the recipient's fault - leave it for a resumed run
+        return True
+    code = smtp_error_code(error)
+    return code is None or 400 <= code < 500
+
+class SMTPConnectionPool:
+    """Logged-in SMTP connections reused across many messages.
+
+    At most `size` connections exist at once (one per sender thread). A
+    connection is recycled after `messages_per_connection` messages, since
+    many providers cap messages per session, and dropped when it breaks.
+    """
+
+    def __init__(self, host, port, username, password, size=4, messages_per_connection=100, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.messages_per_connection = messages_per_connection
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._context = ssl.create_default_context()
+
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.starttls(context=self._context)
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        server.messages_sent = 0
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection (opening one if none is idle) and give it back afterwards"""
+        self._slots.acquire()
+        server = None
+        try:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._open()
+            yield server
+            server.messages_sent += 1
+            if server.messages_sent >= self.messages_per_connection:
+                self._close(server)
+            else:
+                self._idle.put(server)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+            # The server answered, so the session is still good (unless it's hanging up)
+            if smtp_error_code(e) == 421:
+                server.close()
+            else:
+                self._idle.put(server)
+            raise
+        except Exception:
+            if server is not None:
+                server.close()
+            raise
+        finally:
+            self._slots.release()
+
+    def check(self):
+        """Open (and keep) one connection so bad settings fail before any message goes out"""
+        self._slots.acquire()
+        try:
+            self._idle.put(self._open())
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+def send_with_retry(pool, limiter, from_email, to_email, message_bytes, max_attempts=3, backoff_seconds=2.0):
+    """Send one message, retrying transient failures with exponential backoff.
+
+    Returns (status, attempts, error) with status "sent", "failed"
+    (transient, try again in a later run) or "rejected" (permanent).
+    """
+    error = None
+    for attempt in range(1, max_attempts + 1):
+        limiter.acquire()
+        try:
+            with pool.connection() as server:
+                server.sendmail(from_email, [to_email], message_bytes)
+            return "sent", attempt, None
+        except (smtplib.SMTPException, OSError) as e:
+            error = e
+            if not is_transient(e):
+                return "rejected", attempt, f"{type(e).__name__}: {e}"
+            if attempt < max_attempts:
+                time.sleep(backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+    return "failed", max_attempts, f"{type(error).__name__}: {error}"
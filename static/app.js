@@ -28,27 +28,121 @@ function closeModal() {
     }
 }
 
-// Refresh feeds functionality
+// How often to ask how a refresh job is doing (ms)
+const REFRESH_POLL_INTERVAL = 1000;
+
+const REFRESH_STAGES = {
+    queued: '⏳ Waiting for the current refresh to finish',
+    downloading: '📡 Gathering feeds',
+    parsing: '📖 Reading the news',
+    saving: '💾 Saving articles',
+};
+
+function describeRefresh(job) {
+    const stage = REFRESH_STAGES[job.state === 'queued' ? 'queued' : job.stage] || '🔄 Refreshing news feeds';
+    if (job.feeds_total) {
+        return `${stage}... (${job.feeds_done}/${job.feeds_total} feeds)`;
+    }
+    return `${stage}...`;
+}
+
+// Refresh feeds functionality: start (or join) a background job, then poll its status
 async function refreshFeeds() {
     showModal('🔄 Refreshing news feeds...');
     
     try {
         const response = await fetch('/refresh');
-        const data = await response.json();
+        let job = await response.json();
         
-        if (data.success) {
-            showModal(`✅ Added ${data.new_count} new articles! Refreshing page...`);
+        if (!job.success) {
+            showModal(`❌ Error: ${job.message}`);
+            return;
+        }
+        
+        const statusUrl = job.status_url;
+        while (job.state !== 'done' && job.state !== 'failed') {
+            showModal(describeRefresh(job));
+            await new Promise(resolve => setTimeout(resolve, REFRESH_POLL_INTERVAL));
+            const status = await fetch(statusUrl);
+            job = await status.json();
+            if (!job.success) {
+                showModal(`❌ Error: ${job.message}`);
+                return;
+            }
+        }
+        
+        if (job.state === 'done' && liveStream && liveStream.readyState === EventSource.OPEN) {
+            // New articles already arrived over the live stream
+            showModal(`✅ Added ${job.articles_added} new articles!`);
+            setTimeout(closeModal, 1500);
+        } else if (job.state === 'done') {
+            showModal(`✅ Added ${job.articles_added} new articles! Refreshing page...`);
             setTimeout(() => {
                 window.location.reload();
             }, 1500);
         } else {
-            showModal(`❌ Error: ${data.message}`);
+            showModal(`❌ Error refreshing feeds: ${job.error}`);
         }
     } catch (error) {
         showModal(`❌ Network error: ${error.message}`);
     }
 }
 
+// Live updates: new articles pushed from /events as soon as they're saved
+let liveStream = null;
+
+function startLiveUpdates() {
+    const live = document.getElementById('liveUpdates');
+    if (!live || !window.EventSource) {
+        return;
+    }
+    // The browser reconnects by itself and resumes with Last-Event-ID
+    liveStream = new EventSource(live.dataset.eventsUrl);
+    liveStream.addEventListener('article', event => insertArticle(JSON.parse(event.data)));
+}
+
+function insertArticle(article) {
+    const list = document.querySelector(`.article-list[data-category="${article.category}"]`);
+    if (!list) {
+        return;
+    }
+    const items = Array.from(list.children);
+    const cluster = article.cluster_id === null ? '' : String(article.cluster_id);
+    if (items.some(item => item.querySelector('a').getAttribute('href') === article.link ||
+                           (cluster && item.dataset.cluster === cluster))) {
+        return;
+    }
+    
+    const item = document.createElement('li');
+    item.className = 'live-new';
+    item.dataset.published = article.published || '';
+    item.dataset.cluster = cluster;
+    const link = document.createElement('a');
+    link.href = article.link;
+    link.target = '_blank';
+    link.textContent = article.title;
+    const source = document.createElement('span');
+    source.className = 'source';
+    source.textContent = article.source;
+    item.append(link, ' ', source);
+    
+    // Keep the list newest first (ISO timestamps sort as strings)
+    const before = items.find(other => (other.dataset.published || '') < (article.published || ''));
+    const pageSize = parseInt(list.dataset.pageSize, 10) || items.length + 1;
+    if (!before && items.length >= pageSize) {
+        return;
+    }
+    list.insertBefore(item, before || null);
+    while (list.children.length > pageSize) {
+        list.lastElementChild.remove();
+    }
+    
+    const stats = document.querySelector('.actions .stats');
+    if (stats) {
+        stats.textContent = `${document.querySelectorAll('.article-list li').length} articles`;
+    }
+}
+
 // Send digest functionality
 async function sendDigest() {
     showModal('📧 Sending email digest...');
@@ -168,6 +262,12 @@ document.addEventListener('DOMContentLoaded', function() {
             refreshFeeds();
         }
         
+        // Don't steal keys while typing (e.g. in the search box)
+        const target = event.target;
+        if (target && (target.tagName === 'INPUT' || target.tagName === 'SELECT' || target.tagName === 'TEXTAREA')) {
+            return;
+        }
+        
         // Tab switching with number keys
         if (event.key === '1') {
             switchTab('ai');
@@ -188,6 +288,8 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Add some particle effects on page load
     createParticleEffect();
+    
+    startLiveUpdates();
 });
 
 // Fun particle effect for page load
@@ -0,0 +1,43 @@
+import datetime as dt
+
+import pytest
+
+from dates import parse_feed_date, snapshot_counts
+
+TEN_UTC = dt.datetime(2026, 10, 17, 10)
+
+@pytest.mark.parametrize("text, expected", [
+    # RSS pubDate with a numeric offset or a named zone
+    ("Sat, 17 Oct 2026 10:00:00 GMT", TEN_UTC),
+    ("Sat, 17 Oct 2026 10:00:00 +0000", TEN_UTC),
+    ("Sat, 17 Oct 2026 06:00:00 -0400", TEN_UTC),
+    ("Sat, 17 Oct 2026 12:00:00 +0200", TEN_UTC),
+    ("Sat, 17 Oct 2026 05:00:00 EST", TEN_UTC),
+    ("Sat, 17 Oct 2026 06:00:00 EDT", TEN_UTC),
+    ("Sat, 17 Oct 2026 03:00:00 PDT", TEN_UTC),
+    ("Sat, 17 Oct 2026 10:00:00 UT", TEN_UTC),
+    ("Sat, 17 Oct 2026 10:00:00 Z", TEN_UTC),
+    ("Saturday, 17 October 2026 06:00 -0400", TEN_UTC),
+    ("17 Oct 26 05:00 EST", TEN_UTC),
+    # Atom / JSON Feed
+    ("2026-10-17T10:00:00Z", TEN_UTC),
+    ("2026-10-17T12:00:00+02:00", TEN_UTC),
+    ("2026-10-17T04:30:00-05:30", TEN_UTC),
+    ("2026-10-17T10:00:00", TEN_UTC),
+    # Loose formats the RFC 822 parser would misread go to dateutil
+    ("October 17, 2026 12:00 PM +0200", TEN_UTC),
+    ("October 17, 2026 05:00 AM -0500", TEN_UTC),
+    ("Sat, 17 Oct 2026 10:00 AM", TEN_UTC),
+])
+def test_dates_come_out_as_naive_utc(text, expected):
+    assert parse_feed_date(text) == expected
+
+def test_unknown_zone_abbreviations_keep_the_wall_clock_time():
+    assert parse_feed_date("Sat, 17 Oct 2026 10:00:00 CEST") == TEN_UTC
+
+def test_hopeless_dates_are_none_and_counted():
+    before = snapshot_counts()
+    assert parse_feed_date("sometime last week") is None
+    assert parse_feed_date("") is None
+    assert parse_feed_date(None) is None
+    assert (snapshot_counts() - before) == {"unparseable": 1}
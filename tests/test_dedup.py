@@ -0,0 +1,142 @@
+import datetime as dt
+
+import pytest
+
+from dedup import StoryClusters, canonicalize_url, minhash, shingles, similarity
+
+# (title, summary) as two outlets ran the same wire story: rewritten
+# headline, lightly edited lede. Real syndicated pairs look like this,
+# which is why near-verbatim fingerprints (SimHash within 3 bits) missed them.
+SAME_STORY = [
+ (("Fed holds rates steady, signals two cuts later this year",
+   "The Federal Reserve left its benchmark interest rate unchanged on Wednesday in a range of 5.25% to 5.5% and policymakers projected two quarter-point cuts before the end of the year as inflation continues to cool."),
+  ("Federal Reserve keeps interest rates unchanged, still sees two cuts in 2024",
+   "The Federal Reserve on Wednesday left its benchmark interest rate unchanged in a range of 5.25% to 5.5%, with policymakers projecting two quarter-point cuts before the end of the year as inflation cools.")),
+ (("OpenAI unveils GPT-4o, a faster model that can talk and see",
+   "OpenAI on Monday introduced GPT-4o, a new flagship model that can reason across audio, vision and text in real time and will be available to free users of ChatGPT."),
+  ("ChatGPT maker OpenAI launches GPT-4o with real-time voice",
+   "OpenAI introduced GPT-4o on Monday, a flagship model that reasons across audio, vision and text in real time. The company said it will be available to free ChatGPT users in the coming weeks.")),
+ (("Nvidia tops $3 trillion market value as AI chip rally extends",
+   "Nvidia's market capitalization topped $3 trillion on Wednesday, overtaking Apple to become the second most valuable company in the world as investors bet on demand for its artificial intelligence chips."),
+  ("Nvidia passes Apple to become second most valuable company",
+   "Nvidia's market value topped $3 trillion on Wednesday, overtaking Apple as the world's second most valuable company, as investors continued to bet on demand for its AI chips.")),
+ (("EU lawmakers give final approval to landmark AI Act",
+   "European Union lawmakers gave final approval on Wednesday to the bloc's Artificial Intelligence Act, the world's first comprehensive rules for the technology, which will take effect in stages over the next two years."),
+  ("European Parliament approves world's first major AI law",
+   "The European Parliament on Wednesday gave final approval to the Artificial Intelligence Act, the world's first comprehensive set of rules for the technology. The rules will take effect in stages over the next two years.")),
+ (("US job growth slows to 150,000 in October, unemployment rises to 3.9%",
+   "U.S. employers added 150,000 jobs in October, fewer than expected, and the unemployment rate rose to 3.9%, the Labor Department said on Friday, as strikes by auto workers weighed on payrolls."),
+  ("Hiring cools in October as employers add 150,000 jobs",
+   "Employers added 150,000 jobs in October, fewer than economists expected, and the unemployment rate rose to 3.9%, the Labor Department said Friday. Strikes by auto workers weighed on payrolls.")),
+ (("Google to pay $700 million to settle Play Store antitrust case with states",
+   "Alphabet's Google has agreed to pay $700 million and make changes to its Play Store to settle an antitrust lawsuit brought by U.S. states that accused it of overcharging consumers for apps."),
+  ("Google agrees to $700M settlement over Play Store with US states",
+   "Google agreed to pay $700 million and make changes to its Play Store to settle an antitrust lawsuit from U.S. states that accused the company of overcharging consumers for apps, according to a court filing.")),
+]
+# Same topic and vocabulary, different stories
+DIFFERENT_STORIES = [
+ (SAME_STORY[0][0], ("Fed's Powell says rate cuts not likely until inflation falls further",
+   "Federal Reserve Chair Jerome Powell said on Tuesday the central bank is unlikely to cut interest rates soon because inflation has not fallen enough, pushing back on market bets for early easing.")),
+ (SAME_STORY[1][0], ("OpenAI board ousts Sam Altman as chief executive",
+   "OpenAI's board of directors said on Friday it had removed Sam Altman as chief executive, saying he had not been consistently candid in his communications with the board.")),
+ (SAME_STORY[2][0], ("Nvidia shares fall 10% as investors question AI spending",
+   "Nvidia shares fell 10% on Tuesday, wiping out about $280 billion in market value, as investors questioned whether heavy spending on artificial intelligence chips will pay off.")),
+ (SAME_STORY[4][0], ("US job openings fall to lowest level since 2021",
+   "U.S. job openings fell to 8.1 million in June, the lowest level since early 2021, the Labor Department said on Tuesday, a sign that demand for workers is cooling.")),
+ (SAME_STORY[5][0], ("Judge rules Google illegally monopolized online search",
+   "A federal judge ruled on Monday that Google illegally monopolized the online search market by paying billions of dollars to be the default search engine on smartphones and web browsers.")),
+ (SAME_STORY[3][0], ("EU opens investigation into Meta over election disinformation",
+   "The European Union opened an investigation into Meta on Tuesday over suspected failures to tackle disinformation ahead of European Parliament elections in June.")),
+]
+
+
+def jaccard(a, b):
+    a, b = shingles(*a), shingles(*b)
+    return len(a & b) / len(a | b)
+
+def test_fixture_pairs_straddle_the_threshold():
+    assert all(jaccard(a, b) >= 0.5 for a, b in SAME_STORY)
+    assert all(jaccard(a, b) < 0.25 for a, b in DIFFERENT_STORIES)
+
+def test_signatures_estimate_jaccard():
+    for a, b in SAME_STORY + DIFFERENT_STORIES:
+        assert abs(similarity(minhash(*a), minhash(*b)) - jaccard(a, b)) < 0.2
+
+def test_syndicated_copies_join_the_first_outlets_cluster():
+    clusters = StoryClusters()
+    for first, second in SAME_STORY:
+        _, lead_cluster, lead = clusters.assign("economics_politics", *first)
+        _, cluster, is_lead = clusters.assign("economics_politics", *second)
+        assert lead and not is_lead
+        assert cluster == lead_cluster
+
+def test_different_stories_on_the_same_topic_stay_apart():
+    for first, second in DIFFERENT_STORIES:
+        clusters = StoryClusters()
+        _, lead_cluster, _ = clusters.assign("ai_frontier", *first)
+        _, cluster, is_lead = clusters.assign("ai_frontier", *second)
+        assert is_lead
+        assert cluster != lead_cluster
+
+def test_clusters_never_span_categories():
+    clusters = StoryClusters()
+    first, second = SAME_STORY[0]
+    clusters.assign("economics_politics", *first)
+    _, _, is_lead = clusters.assign("ai_frontier", *second)
+    assert is_lead
+
+def test_articles_with_few_words_lead_their_own_clusters():
+    clusters = StoryClusters()
+    clusters.assign("ai_frontier", "Apple shares rise", "")
+    signature, cluster, is_lead = clusters.assign("ai_frontier", "Apple shares fall", "")
+    assert signature is None and is_lead and cluster is not None
+
+def test_evicted_stories_no_longer_gather_copies():
+    clusters = StoryClusters()
+    first, second = SAME_STORY[0]
+    published = dt.datetime(2026, 7, 1, 12)
+    _, old_cluster, _ = clusters.assign("economics_politics", *first, published)
+    # Months later, in a replay: the old story has slid out of the window
+    clusters.evict_before(dt.datetime(2026, 10, 1) - dt.timedelta(hours=48))
+    _, cluster, is_lead = clusters.assign("economics_politics", *second, dt.datetime(2026, 10, 1))
+    assert is_lead and cluster != old_cluster
+
+def test_stories_inside_the_window_are_kept():
+    clusters = StoryClusters()
+    first, second = SAME_STORY[1]
+    _, lead_cluster, _ = clusters.assign("ai_frontier", *first, dt.datetime(2026, 10, 1, 12))
+    clusters.evict_before(dt.datetime(2026, 10, 1))
+    _, cluster, is_lead = clusters.assign("ai_frontier", *second, dt.datetime(2026, 10, 2))
+    assert not is_lead and cluster == lead_cluster
+
+@pytest.mark.parametrize("link, expected", [
+    # Tracking parameters and fragments go, the rest is sorted
+    ("https://example.com/a?utm_source=rss&utm_medium=feed", "https://example.com/a"),
+    ("https://example.com/a?fbclid=1&ref=rss&page=2", "https://example.com/a?page=2"),
+    ("https://example.com/a?b=2&a=1#comments", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a?q=&x=1", "https://example.com/a?q=&x=1"),
+    # Scheme, host case, default ports and trailing slashes
+    ("http://Example.COM/News/Story/", "https://example.com/News/Story"),
+    ("http://example.com:80/a", "https://example.com/a"),
+    ("https://example.com:443", "https://example.com/"),
+    ("https://example.com:8443/a/", "https://example.com:8443/a"),
+    # Redirect wrappers, including nested ones and encoded targets
+    ("https://www.google.com/url?q=https://example.com/a%3Futm_medium%3Dx&sa=t", "https://example.com/a"),
+    ("https://l.facebook.com/l.php?u=https%3A%2F%2Fexample.com%2Fa%2F", "https://example.com/a"),
+    ("https://out.reddit.com/x?url=https%3A%2F%2Fwww.google.com%2Furl%3Furl%3Dhttps%3A%2F%2Fexample.com%2Fa",
+     "https://example.com/a"),
+    # Look-alikes that aren't wrappers, and links we don't touch
+    ("https://www.google.com/search?q=cats", "https://www.google.com/search?q=cats"),
+    ("ftp://example.com/a/", "ftp://example.com/a/"),
+    (" https://example.com/a ", "https://example.com/a"),
+])
+def test_canonicalize_url(link, expected):
+    assert canonicalize_url(link) == expected
+
+def test_reissued_copies_share_a_canonical_link():
+    copies = [
+        "http://www.example.com/2026/10/17/story/?utm_source=twitter",
+        "https://www.example.com/2026/10/17/story#top",
+        "https://www.google.com/url?url=https://www.example.com/2026/10/17/story/&ved=1",
+    ]
+    assert len({canonicalize_url(link) for link in copies}) == 1
@@ -0,0 +1,74 @@
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetch import DEFAULT_FETCH_SETTINGS, FeedDeadlineExceeded, FeedTooLarge, HostLimiter, download_feed
+
+FEED = b'<?xml version="1.0"?><rss version="2.0"><channel><title>T</title></channel></rss>'
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/trickle.xml":
+            # Headers at once, then one byte every 0.2s: never a full read chunk
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(FEED)))
+            self.end_headers()
+            for byte in FEED:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(0.2)
+        elif self.path == "/silent.xml":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(FEED)))
+            self.end_headers()
+            self.wfile.flush()
+            time.sleep(5)
+        elif self.path == "/gzip.xml":
+            body = gzip.compress(FEED)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/big.xml":
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"x" * 200_000)
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+def settings(**overrides):
+    return dict(DEFAULT_FETCH_SETTINGS, **overrides)
+
+def test_trickling_server_hits_the_feed_deadline(server):
+    started = time.monotonic()
+    with pytest.raises(FeedDeadlineExceeded):
+        download_feed(f"{server}/trickle.xml", HostLimiter(2), settings(feed_deadline=1))
+    assert time.monotonic() - started < 2
+
+def test_silent_server_hits_the_feed_deadline_not_the_read_timeout(server):
+    started = time.monotonic()
+    with pytest.raises(FeedDeadlineExceeded):
+        download_feed(f"{server}/silent.xml", HostLimiter(2), settings(feed_deadline=1, timeout=30))
+    assert time.monotonic() - started < 2
+
+def test_compressed_body_is_decoded(server):
+    response = download_feed(f"{server}/gzip.xml", HostLimiter(2), settings())
+    assert response.content == FEED
+
+def test_oversized_body_is_refused(server):
+    with pytest.raises(FeedTooLarge):
+        download_feed(f"{server}/big.xml", HostLimiter(2), settings(max_body_bytes=100_000))
@@ -0,0 +1,106 @@
+import feedparser
+import pytest
+
+from feedstream import parse_entries
+from fetch import clean_summary, entry_link, normalize_datetime
+
+RSS_EXTENSIONS = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"
+     xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"
+     xmlns:dc="http://purl.org/dc/elements/1.1/"
+     xmlns:content="http://purl.org/rss/1.0/modules/content/"
+     xmlns:feedburner="http://rssnamespace.org/feedburner/ext/1.0">
+<channel><title>Wire</title>
+<item>
+  <media:title>Media title first</media:title>
+  <title>The real title</title>
+  <description>&lt;p&gt;The real &lt;b&gt;summary&lt;/b&gt;&lt;/p&gt;</description>
+  <link>http://feeds.example.com/~r/wire/1</link>
+  <feedburner:origLink>https://example.com/story/1</feedburner:origLink>
+  <pubDate>Sat, 17 Oct 2026 10:00:00 -0400</pubDate>
+</item>
+<item>
+  <title>Only content:encoded</title>
+  <content:encoded>&lt;p&gt;Body from content&lt;/p&gt;</content:encoded>
+  <guid>https://example.com/story/2</guid>
+  <dc:date>2026-10-17T08:30:00+02:00</dc:date>
+</item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/">
+<title>Atom feed</title>
+<entry>
+  <media:title>Thumbnail caption</media:title>
+  <title>Atom entry</title>
+  <link rel="enclosure" href="https://example.com/a.mp3"/>
+  <link rel="alternate" href="https://example.com/atom/1"/>
+  <id>tag:example.com,2026:1</id>
+  <summary type="html">&lt;p&gt;Atom summary&lt;/p&gt;</summary>
+  <published>2026-10-17T10:00:00Z</published>
+  <updated>2026-10-17T12:00:00Z</updated>
+</entry>
+</feed>"""
+
+RSS1 = b"""<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel rdf:about="https://example.com/"><title>RDF</title></channel>
+<item rdf:about="https://example.com/rdf/1">
+  <title>RSS 1.0 item</title>
+  <link>https://example.com/rdf/1</link>
+  <description>Plain summary</description>
+  <dc:date>2026-10-17T06:00:00-05:00</dc:date>
+</item>
+</rdf:RDF>"""
+
+def comparable(entry):
+    """The parts of an entry fetch.py uses"""
+    return {
+        "title": entry.get("title"),
+        "link": entry_link(entry),
+        "summary": clean_summary(entry.get("summary", "")),
+        "published": normalize_datetime(entry),
+    }
+
+@pytest.mark.parametrize("body", [RSS_EXTENSIONS, ATOM, RSS1], ids=["rss-extensions", "atom", "rss1"])
+def test_streaming_parser_matches_feedparser(body):
+    ours = [comparable(entry) for entry in parse_entries(body, 10)]
+    theirs = [comparable(entry) for entry in feedparser.parse(body).entries[:10]]
+    assert ours == theirs
+
+PODCAST = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"
+     xmlns:media="http://search.yahoo.com/mrss/"
+     xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel><title>Show</title>
+<item>
+  <itunes:title>Episode 12</itunes:title>
+  <itunes:summary>Podcast blurb</itunes:summary>
+  <title>What the episode is about</title>
+  <description>The show notes</description>
+  <link>https://example.com/ep/12</link>
+</item>
+<item>
+  <media:description>Caption of the photo</media:description>
+  <title>Photo story</title>
+  <content:encoded>&lt;p&gt;Body from content&lt;/p&gt;</content:encoded>
+  <link>https://example.com/photo/1</link>
+</item>
+</channel></rss>"""
+
+def test_extension_elements_never_stand_in_for_entry_fields():
+    # feedparser would take itunes:summary and media:description here, since they come first
+    episode, photo = parse_entries(PODCAST, 10)
+    assert episode.title == "What the episode is about"
+    assert episode.summary == "The show notes"
+    assert clean_summary(photo.summary) == "Body from content"
+
+    first, second = parse_entries(RSS_EXTENSIONS, 10)
+    assert first.title == "The real title"
+    assert first.feedburner_origlink == "https://example.com/story/1"
+    assert clean_summary(second.summary) == "Body from content"
+    assert second.link == "https://example.com/story/2"
+
+def test_max_items_stops_early():
+    assert len(parse_entries(RSS_EXTENSIONS, 1)) == 1
@@ -0,0 +1,59 @@
+import datetime as dt
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import metrics
+from models import Base, save_fetch_run
+
+def feed_row(name, **fields):
+    row = {
+        "feed_name": name, "feed_url": f"https://{name}.example/rss", "category": "ai_frontier",
+        "http_status": 200, "fetch_seconds": 0.2, "bytes": 4096, "parse_seconds": 0.01,
+        "entries": 10, "kept": 8, "duplicates": 2, "too_old": 2, "added": 6,
+        "outcome": "parsed", "error": None,
+        "dates": json.dumps({"rfc822": 9, "dateutil": 1}), "latencies": json.dumps([120.0, 4000.0]),
+    }
+    row.update(fields)
+    return row
+
+def store_run(session, finished_at, feeds, error=None):
+    save_fetch_run(session, {
+        "started_at": finished_at - dt.timedelta(seconds=5), "finished_at": finished_at,
+        "duration_seconds": 5.0, "feeds": len(feeds), "articles_added": 6,
+        "insert_seconds": 0.05, "error": error,
+    }, feeds)
+    session.commit()
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+def sample(name, **labels):
+    wanted = metrics._format_labels(labels.keys(), labels.values())
+    for line in metrics.render_metrics().splitlines():
+        if line.startswith(f"{name}{wanted} "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_ingest_series_come_from_the_run_history(db):
+    history = metrics._FetchHistory()
+    store_run(db, dt.datetime(2026, 10, 17, 12), [feed_row("hist-a"), feed_row("hist-b", outcome="fetch_error", http_status=503)])
+    history.catch_up(db)
+    assert sample("acnews_feed_fetches_total", feed="hist-a", outcome="parsed") == 1
+    assert sample("acnews_feed_http_responses_total", feed="hist-b", status=503) == 1
+    assert sample("acnews_feed_entries_total", feed="hist-a", result="added") == 6
+    assert sample("acnews_feed_dates_total", feed="hist-a", method="dateutil") == 1
+    assert sample("acnews_last_fetch_run_timestamp_seconds") == dt.datetime(2026, 10, 17, 12, tzinfo=dt.timezone.utc).timestamp()
+
+    # A later scrape only adds runs stored since the last one
+    store_run(db, dt.datetime(2026, 10, 17, 13), [feed_row("hist-a")], error="boom")
+    history.catch_up(db)
+    history.catch_up(db)
+    assert sample("acnews_feed_fetches_total", feed="hist-a", outcome="parsed") == 2
+    assert sample("acnews_fetch_runs_total", result="error") >= 1
@@ -0,0 +1,41 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+import search
+from models import Base, Article
+from search import ensure_search_index, search_articles
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(engine)
+    ensure_search_index(engine)
+    now = dt.datetime(2026, 10, 17, 12)
+    rows = [
+        # An old handful of economics stories, then a flood of newer AI ones
+        dict(title=f"Markets story {i}", link=f"https://econ.example/{i}", source="Wire",
+             category="economics_politics", published=now - dt.timedelta(days=5, hours=i))
+        for i in range(5)
+    ] + [
+        dict(title=f"Markets and models {i}", link=f"https://ai.example/{i}", source="Lab",
+             category="ai_frontier", published=now - dt.timedelta(hours=i))
+        for i in range(40)
+    ]
+    with Session(engine) as session:
+        session.execute(insert(Article), rows)
+        session.commit()
+        yield session
+
+def test_cap_counts_matches_that_pass_the_category_filter(db, monkeypatch):
+    monkeypatch.setattr(search, "MAX_RANKED_MATCHES", 10)
+    assert len(search_articles(db, "markets", category="economics_politics")) == 5
+    assert len(search_articles(db, "markets", source="Wire")) == 5
+
+def test_unfiltered_query_ranks_only_the_newest_matches(db, monkeypatch):
+    monkeypatch.setattr(search, "MAX_RANKED_MATCHES", 10)
+    results = search_articles(db, "markets", limit=100)
+    assert len(results) == 10
+    assert {result["category"] for result in results} == {"ai_frontier"}
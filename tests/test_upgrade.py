@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The articles table as the first release created it: the feed's link, as given
+BASELINE_SCHEMA = """
+CREATE TABLE articles (
+    id INTEGER NOT NULL PRIMARY KEY,
+    source VARCHAR(120),
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    summary TEXT,
+    published DATETIME,
+    category VARCHAR(40),
+    emoji VARCHAR(10),
+    villager_comment TEXT,
+    CONSTRAINT uq_article_link UNIQUE (link)
+)
+"""
+
+BASELINE_LINKS = [
+    "http://www.reuters.com/a?utm_source=rss",
+    "https://www.reuters.com/a?utm_medium=feed",   # the same story, reissued
+    "https://example.com/b/",
+    "https://www.google.com/url?q=https://example.com/c&sa=D",
+]
+
+def run(code, database):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+def make_baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO articles (title, link, published, category) VALUES (?, ?, '2026-10-01 10:00:00', 'ai_frontier')",
+        [(f"Story {i}", link) for i, link in enumerate(BASELINE_LINKS)],
+    )
+    conn.commit()
+    conn.close()
+
+def test_upgrade_keys_old_rows_by_their_canonical_link(tmp_path):
+    database = tmp_path / "baseline.db"
+    make_baseline_db(database)
+    # Twice: the second migrate must leave the backfill alone
+    run("import models; models.init_db(); models.init_db()", database)
+
+    conn = sqlite3.connect(database)
+    rows = conn.execute("SELECT link, canonical_link FROM articles ORDER BY id").fetchall()
+    conn.close()
+    # Links shown to readers are untouched
+    assert [link for link, _ in rows] == BASELINE_LINKS
+    assert [key for _, key in rows] == [
+        "https://www.reuters.com/a",
+        None,  # a later copy of the first row's story
+        "https://example.com/b",
+        "https://example.com/c",
+    ]
+
+def test_upgraded_rows_stop_reissued_copies(tmp_path):
+    database = tmp_path / "baseline.db"
+    make_baseline_db(database)
+    out = run(
+        "import datetime as dt, models\n"
+        "models.init_db()\n"
+        "from dedup import canonicalize_url, known_links\n"
+        "row = lambda link: dict(source='Wire', title='t', link=link, canonical_link=canonicalize_url(link),\n"
+        "    summary='', published=dt.datetime(2026, 10, 2), category='ai_frontier')\n"
+        "with models.SessionLocal() as db:\n"
+        "    known_links.ensure_loaded(db)\n"
+        "    print(canonicalize_url('https://www.reuters.com/a?utm_campaign=x') in known_links)\n"
+        "    print(len(models.insert_articles(db, [row('https://www.reuters.com/a?utm_campaign=x'), row('https://example.com/new')])))\n",
+        database,
+    )
+    assert out.split()[-2:] == ["True", "1"]